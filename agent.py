@@ -25,16 +25,25 @@ from google.genai.types import (
     FunctionResponse,
     FinishReason,
 )
+import threading
 import time
+import uuid
 from rich.console import Console
 from rich.table import Table
 
-from computers import EnvState, Computer
-from logger_config import get_logger
+from computers import EnvState, Computer, AgentCancelled, CancellationToken
+import metrics
+import tracing
+from logger_config import current_log_context, get_logger, lazy, log_context, log_every, truncate
+from run_trace import RunTraceWriter
+from memory_monitor import MemoryMonitor, history_bytes, monitor_from_env
+from token_usage import TokenUsage, budget_from_env
 
 logger = get_logger(__name__)
 
 MAX_RECENT_TURN_WITH_SCREENSHOTS = 3
+# The full usage_metadata dump is logged at most this often (DEBUG only).
+USAGE_DUMP_INTERVAL_S = 30.0
 PREDEFINED_COMPUTER_USE_FUNCTIONS = [
     "open_web_browser",
     "click_at",
@@ -71,6 +80,12 @@ class BrowserAgent:
         query: str,
         model_name: str,
         verbose: bool = True,
+        cancellation_token: Optional[CancellationToken] = None,
+        run_trace: Optional[RunTraceWriter] = None,
+        run_id: Optional[str] = None,
+        token_budget: Optional[int] = None,
+        cost_budget: Optional[float] = None,
+        memory_monitor: Optional[MemoryMonitor] = None,
     ):
         logger.info(f"Inicializando BrowserAgent com modelo: {model_name}")
         logger.debug(f"Query: {query[:100]}..." if len(query) > 100 else f"Query: {query}")
@@ -81,6 +96,26 @@ class BrowserAgent:
         self._model_name = model_name
         self._verbose = verbose
         self.final_reasoning = None
+        self.iteration_count = 0
+        # Tokens and estimated cost per model call and per run; the loop stops once a budget is exceeded.
+        self.usage = TokenUsage(
+            token_budget=token_budget if token_budget is not None else budget_from_env("AGENT_TOKEN_BUDGET", int),
+            cost_budget=cost_budget if cost_budget is not None else budget_from_env("AGENT_COST_BUDGET_USD", float),
+        )
+        self.budget_exceeded: Optional[str] = None
+        # Opt-in tracemalloc sampling every N steps (MEMORY_PROFILE_STEPS); wrappers add their own sources.
+        self.memory_monitor = memory_monitor or monitor_from_env()
+        if self.memory_monitor:
+            self.memory_monitor.add_source("history_text", lambda: history_bytes(self._contents)[0])
+            self.memory_monitor.add_source("history_images", lambda: history_bytes(self._contents)[1])
+        # Shared with the computer so a cancel stops both the loop and the browser waits.
+        self._cancellation = cancellation_token or CancellationToken()
+        self.cancelled = False
+        # Optional binary trace: one record per executed action (see run_trace.py).
+        self._run_trace = run_trace
+        self._last_model_call: dict[str, Any] = {}
+        # Tags every log record of the run (structured logs: LOG_FORMAT=json).
+        self.run_id = run_id or current_log_context().get("run_id") or uuid.uuid4().hex[:12]
         use_vertexai = os.environ.get("USE_VERTEXAI", "0").lower() in ["true", "1"]
         
         logger.info(f"Configurando cliente Gemini - VertexAI: {use_vertexai}")
@@ -156,8 +191,12 @@ class BrowserAgent:
 
     def handle_action(self, action: types.FunctionCall) -> FunctionResponseT:
         """Handles the action and returns the environment state."""
-        logger.info(f"Executando ação: {action.name}")
-        logger.debug(f"Argumentos da ação {action.name}: {action.args}")
+        with log_context(action=action.name), tracing.span("agent.handle_action", action=action.name):
+            return self._handle_action(action)
+
+    def _handle_action(self, action: types.FunctionCall) -> FunctionResponseT:
+        logger.info("Executando ação: %s", action.name)
+        logger.debug("Argumentos da ação %s: %s", action.name, action.args)
         
         start_time = time.time()
         result = None
@@ -170,13 +209,13 @@ class BrowserAgent:
             elif action.name == "click_at":
                 x = self.denormalize_x(action.args["x"])
                 y = self.denormalize_y(action.args["y"])
-                logger.debug(f"Clique em coordenadas: ({x}, {y})")
+                logger.debug("Clique em coordenadas: (%s, %s)", x, y)
                 result = self._browser_computer.click_at(x=x, y=y)
                 
             elif action.name == "hover_at":
                 x = self.denormalize_x(action.args["x"])
                 y = self.denormalize_y(action.args["y"])
-                logger.debug(f"Hover em coordenadas: ({x}, {y})")
+                logger.debug("Hover em coordenadas: (%s, %s)", x, y)
                 result = self._browser_computer.hover_at(x=x, y=y)
                 
             elif action.name == "type_text_at":
@@ -185,14 +224,14 @@ class BrowserAgent:
                 text = action.args["text"]
                 press_enter = action.args.get("press_enter", False)
                 clear_before_typing = action.args.get("clear_before_typing", True)
-                logger.debug(f"Digitando texto em ({x}, {y}): '{text[:50]}...' (press_enter={press_enter}, clear={clear_before_typing})")
+                logger.debug("Digitando texto em (%s, %s): '%s...' (press_enter=%s, clear=%s)", x, y, text[:50], press_enter, clear_before_typing)
                 result = self._browser_computer.type_text_at(
                     x=x, y=y, text=text, press_enter=press_enter, clear_before_typing=clear_before_typing
                 )
                 
             elif action.name == "scroll_document":
                 direction = action.args["direction"]
-                logger.debug(f"Rolando documento: {direction}")
+                logger.debug("Rolando documento: %s", direction)
                 result = self._browser_computer.scroll_document(direction)
                 
             elif action.name == "scroll_at":
@@ -200,7 +239,7 @@ class BrowserAgent:
                 y = self.denormalize_y(action.args["y"])
                 magnitude = action.args.get("magnitude", 800)
                 direction = action.args["direction"]
-                logger.debug(f"Rolando em ({x}, {y}) direção {direction}, magnitude {magnitude}")
+                logger.debug("Rolando em (%s, %s) direção %s, magnitude %s", x, y, direction, magnitude)
 
                 if direction in ("up", "down"):
                     magnitude = self.denormalize_y(magnitude)
@@ -228,12 +267,12 @@ class BrowserAgent:
                 
             elif action.name == "navigate":
                 url = action.args["url"]
-                logger.info(f"Navegando para URL: {url}")
+                logger.info("Navegando para URL: %s", url)
                 result = self._browser_computer.navigate(url)
                 
             elif action.name == "key_combination":
                 keys = action.args["keys"].split("+")
-                logger.debug(f"Pressionando combinação de teclas: {keys}")
+                logger.debug("Pressionando combinação de teclas: %s", keys)
                 result = self._browser_computer.key_combination(keys)
                 
             elif action.name == "drag_and_drop":
@@ -241,7 +280,7 @@ class BrowserAgent:
                 y = self.denormalize_y(action.args["y"])
                 destination_x = self.denormalize_x(action.args["destination_x"])
                 destination_y = self.denormalize_y(action.args["destination_y"])
-                logger.debug(f"Drag and drop de ({x}, {y}) para ({destination_x}, {destination_y})")
+                logger.debug("Drag and drop de (%s, %s) para (%s, %s)", x, y, destination_x, destination_y)
                 result = self._browser_computer.drag_and_drop(
                     x=x, y=y, destination_x=destination_x, destination_y=destination_y
                 )
@@ -250,7 +289,7 @@ class BrowserAgent:
             elif action.name == multiply_numbers.__name__:
                 x = action.args["x"]
                 y = action.args["y"]
-                logger.debug(f"Multiplicando números: {x} * {y}")
+                logger.debug("Multiplicando números: %s * %s", x, y)
                 result = multiply_numbers(x=x, y=y)
                 
             else:
@@ -259,89 +298,140 @@ class BrowserAgent:
                 raise ValueError(error_msg)
             
             elapsed_time = time.time() - start_time
-            logger.info(f"Ação {action.name} concluída em {elapsed_time:.2f}s")
+            metrics.ACTION_SECONDS.observe(elapsed_time, action=action.name)
+            fields = {"duration_ms": round(elapsed_time * 1000, 1)}
+            if isinstance(result, EnvState):
+                fields.update(url=result.url, screenshot_bytes=len(result.screenshot))
+            logger.info("Ação %s concluída em %.2fs", action.name, elapsed_time, extra=fields)
             
             if isinstance(result, EnvState):
-                logger.debug(f"Estado do ambiente - URL: {result.url}, Screenshot size: {len(result.screenshot)} bytes")
+                logger.debug("Estado do ambiente - URL: %s, Screenshot size: %s bytes", result.url, len(result.screenshot))
             elif isinstance(result, dict):
-                logger.debug(f"Resultado customizado: {result}")
+                logger.debug("Resultado customizado: %s", result)
             
             return result
             
         except Exception as e:
             elapsed_time = time.time() - start_time
-            logger.error(f"Erro ao executar ação {action.name} após {elapsed_time:.2f}s: {str(e)}", exc_info=True)
+            metrics.ACTION_ERRORS.inc(action=action.name)
+            logger.error(
+                "Erro ao executar ação %s após %.2fs: %s",
+                action.name,
+                elapsed_time,
+                e,
+                exc_info=True,
+                extra={"duration_ms": round(elapsed_time * 1000, 1), "error_type": type(e).__name__},
+            )
             raise
 
     def get_model_response(
         self, max_retries=5, base_delay_s=1
     ) -> types.GenerateContentResponse:
-        logger.info(f"Solicitando resposta do modelo {self._model_name}")
-        logger.debug(f"Tamanho do histórico de conteúdo: {len(self._contents)} mensagens")
+        with tracing.span("agent.get_model_response", model=self._model_name):
+            return self._get_model_response(max_retries, base_delay_s)
+
+    def _get_model_response(self, max_retries, base_delay_s) -> types.GenerateContentResponse:
+        logger.info("Solicitando resposta do modelo %s", self._model_name)
+        logger.debug("Tamanho do histórico de conteúdo: %s mensagens", len(self._contents))
         
         # Log detalhado do conteúdo sendo enviado
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug("Conteúdo sendo enviado:")
             for idx, content in enumerate(self._contents[-3:], 1):  # Últimas 3 mensagens
-                logger.debug(f"  Mensagem {idx}: role={content.role}, parts={len(content.parts) if content.parts else 0}")
+                logger.debug("  Mensagem %s: role=%s, parts=%s", idx, content.role, len(content.parts) if content.parts else 0)
         
+        metrics.REQUEST_BYTES.observe(self._estimate_request_bytes())
         for attempt in range(max_retries):
             try:
-                logger.debug(f"Tentativa {attempt + 1}/{max_retries} de gerar conteúdo")
+                logger.debug("Tentativa %s/%s de gerar conteúdo", attempt + 1, max_retries)
                 logger.debug("🖥️  Computer Use está ativo na configuração")
                 start_time = time.time()
                 
                 # Computer Use está sempre incluído no config através de self._generate_content_config
-                response = self._client.models.generate_content(
-                    model=self._model_name,
-                    contents=self._contents,
-                    config=self._generate_content_config,  # Computer Use sempre presente aqui
-                )
+                with tracing.span("model.generate_content", attempt=attempt + 1):
+                    response = self._generate_content()
                 
                 elapsed_time = time.time() - start_time
-                logger.info(f"Resposta recebida do modelo em {elapsed_time:.2f}s")
+                metrics.MODEL_LATENCY_SECONDS.observe(elapsed_time)
+                usage = getattr(response, 'usage_metadata', None)
+                step_usage = self.usage.add(usage)
+                for kind in ("prompt", "prompt_image", "cached", "candidates", "thoughts", "total"):
+                    count = getattr(step_usage, kind)
+                    if count:
+                        metrics.TOKENS.inc(count, kind=kind)
+                logger.info(
+                    "Resposta recebida do modelo em %.2fs",
+                    elapsed_time,
+                    extra={
+                        "duration_ms": round(elapsed_time * 1000, 1),
+                        "attempt": attempt + 1,
+                        "history_messages": len(self._contents),
+                        "prompt_tokens": getattr(usage, 'prompt_token_count', None),
+                        "total_tokens": getattr(usage, 'total_token_count', None),
+                    },
+                )
                 
                 # Verificar resposta detalhadamente
                 if response.candidates:
-                    logger.debug(f"Número de candidatos na resposta: {len(response.candidates)}")
+                    logger.debug("Número de candidatos na resposta: %s", len(response.candidates))
                     candidate = response.candidates[0]
-                    logger.debug(f"Finish reason: {candidate.finish_reason}")
+                    logger.debug("Finish reason: %s", candidate.finish_reason)
                     
                     # Log de feedback se disponível
                     if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
                         feedback = response.prompt_feedback
-                        logger.debug(f"Prompt feedback: {feedback}")
+                        logger.debug("Prompt feedback: %s", feedback)
                         if hasattr(feedback, 'block_reason') and feedback.block_reason:
-                            logger.warning(f"⚠️  Bloqueio detectado: {feedback.block_reason}")
+                            logger.warning("⚠️  Bloqueio detectado: %s", feedback.block_reason)
                     
                     # Log de uso
                     if hasattr(response, 'usage_metadata') and response.usage_metadata:
                         usage = response.usage_metadata
-                        logger.debug(f"Usage metadata: {usage}")
+                        # Dump completo amostrado; os tokens já vão como campos da resposta
+                        log_every(logger, USAGE_DUMP_INTERVAL_S, logging.DEBUG, "Usage metadata: %s", usage)
                         if hasattr(usage, 'prompt_token_count'):
-                            logger.debug(f"Tokens usados - Prompt: {usage.prompt_token_count}, "
-                                       f"Candidates: {getattr(usage, 'candidates_token_count', 'N/A')}")
+                            logger.debug("Tokens usados - Prompt: %s, Candidates: %s",
+                                         usage.prompt_token_count, getattr(usage, 'candidates_token_count', 'N/A'))
                 else:
                     logger.warning("⚠️  Resposta recebida mas sem candidatos!")
                     # Tentar obter informações sobre o erro
                     if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
                         feedback = response.prompt_feedback
-                        logger.error(f"Prompt feedback: {feedback}")
+                        logger.error("Prompt feedback: %s", feedback)
                         if hasattr(feedback, 'block_reason') and feedback.block_reason:
-                            logger.error(f"🚫 BLOQUEIO: {feedback.block_reason}")
+                            logger.error("🚫 BLOQUEIO: %s", feedback.block_reason)
                     if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                        logger.error(f"Usage metadata: {response.usage_metadata}")
+                        logger.error("Usage metadata: %s", response.usage_metadata)
                 
+                self._last_model_call = {
+                    "model": self._model_name,
+                    "attempts": attempt + 1,
+                    "latency_seconds": round(elapsed_time, 3),
+                    "history_messages": len(self._contents),
+                    "prompt_tokens": getattr(usage, 'prompt_token_count', None),
+                    "candidates_tokens": getattr(usage, 'candidates_token_count', None),
+                    "total_tokens": getattr(usage, 'total_token_count', None),
+                    "cached_tokens": step_usage.cached,
+                    "image_tokens": step_usage.prompt_image,
+                    "cost_usd": round(step_usage.cost_usd, 6),
+                }
                 return response  # Return response on success
             except Exception as e:
                 error_type = type(e).__name__
                 error_msg = str(e)
-                logger.warning(f"Erro ao gerar conteúdo (tentativa {attempt + 1}/{max_retries}): {error_type}: {error_msg}")
+                logger.warning(
+                    "Erro ao gerar conteúdo (tentativa %s/%s): %s: %s",
+                    attempt + 1,
+                    max_retries,
+                    error_type,
+                    error_msg,
+                    extra={"attempt": attempt + 1, "error_type": error_type},
+                )
                 
                 # Log detalhado do erro
                 if logger.isEnabledFor(logging.DEBUG):
                     import traceback
-                    logger.debug(f"Traceback completo:\n{traceback.format_exc()}")
+                    logger.debug("Traceback completo:\n%s", traceback.format_exc())
                 
                 # Verificar se é erro de API key
                 if "API key" in error_msg or "authentication" in error_msg.lower():
@@ -353,23 +443,54 @@ class BrowserAgent:
                     logger.error("RATE LIMIT ou QUOTA: Aguarde antes de tentar novamente")
                 
                 if attempt < max_retries - 1:
+                    metrics.MODEL_RETRIES.inc()
                     delay = base_delay_s * (2**attempt)
-                    logger.info(f"Tentando novamente em {delay} segundos...")
+                    logger.info("Tentando novamente em %s segundos...", delay)
                     termcolor.cprint(
                         f"Generating content failed on attempt {attempt + 1}. "
                         f"Retrying in {delay} seconds...\n",
                         color="yellow",
                     )
-                    time.sleep(delay)
+                    with tracing.span("model.retry_backoff", attempt=attempt + 1, delay_s=delay):
+                        self._cancellation.sleep(delay)
                 else:
-                    logger.error(f"Falha ao gerar conteúdo após {max_retries} tentativas")
-                    logger.error(f"Último erro: {error_type}: {error_msg}")
+                    logger.error("Falha ao gerar conteúdo após %s tentativas", max_retries)
+                    logger.error("Último erro: %s: %s", error_type, error_msg)
                     termcolor.cprint(
                         f"Generating content failed after {max_retries} attempts.\n",
                         color="red",
                     )
                     raise
 
+    def _generate_content(self) -> types.GenerateContentResponse:
+        """Calls the model without blocking cancellation.
+
+        The SDK call cannot be interrupted, so it runs in a daemon thread while
+        this thread waits in short slices. On cancel the pending request is
+        abandoned and its result discarded.
+        """
+        self._cancellation.raise_if_cancelled()
+        outcome = {}
+
+        def call():
+            try:
+                outcome["response"] = self._client.models.generate_content(
+                    model=self._model_name,
+                    contents=self._contents,
+                    config=self._generate_content_config,  # Computer Use sempre presente aqui
+                )
+            except Exception as e:
+                outcome["error"] = e
+
+        worker = threading.Thread(target=call, name="gemini-request", daemon=True)
+        worker.start()
+        while worker.is_alive():
+            worker.join(0.1)
+            self._cancellation.raise_if_cancelled()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["response"]
+
     def get_text(self, candidate: Candidate) -> Optional[str]:
         """Extracts the text from the candidate."""
         if not candidate.content or not candidate.content.parts:
@@ -396,6 +517,7 @@ class BrowserAgent:
         logger.info("=" * 60)
         
         iteration_start = time.time()
+        metrics.STEPS.inc()
         
         # Generate a response from the model.
         if self._verbose:
@@ -405,13 +527,13 @@ class BrowserAgent:
                 try:
                     response = self.get_model_response()
                 except Exception as e:
-                    logger.error(f"Erro ao obter resposta do modelo: {e}", exc_info=True)
+                    logger.error("Erro ao obter resposta do modelo: %s", e, exc_info=True)
                     return "COMPLETE"
         else:
             try:
                 response = self.get_model_response()
             except Exception as e:
-                logger.error(f"Erro ao obter resposta do modelo: {e}", exc_info=True)
+                logger.error("Erro ao obter resposta do modelo: %s", e, exc_info=True)
                 return "COMPLETE"
 
         if not response.candidates:
@@ -428,7 +550,7 @@ class BrowserAgent:
             try:
                 if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
                     feedback = response.prompt_feedback
-                    logger.error(f"Prompt feedback: {feedback}")
+                    logger.error("Prompt feedback: %s", feedback)
                     error_details.append(f"Prompt feedback: {feedback}")
                     
                     # Verificar se há bloqueio de segurança
@@ -440,15 +562,15 @@ class BrowserAgent:
                         logger.error("=" * 60)
                         logger.error("🚫 BLOQUEIO DE SEGURANÇA DETECTADO")
                         logger.error("=" * 60)
-                        logger.error(f"Razão do bloqueio: {block_reason}")
+                        logger.error("Razão do bloqueio: %s", block_reason)
                         if block_message:
-                            logger.error(f"Mensagem: {block_message}")
+                            logger.error("Mensagem: %s", block_message)
                         
                         # Verificar safety ratings se disponível
                         if hasattr(feedback, 'safety_ratings') and feedback.safety_ratings:
                             logger.error("Safety ratings:")
                             for rating in feedback.safety_ratings:
-                                logger.error(f"  - {rating.category}: {rating.probability}")
+                                logger.error("  - %s: %s", rating.category, rating.probability)
                         
                         logger.error("\n💡 Soluções:")
                         logger.error("  1. Reformule a query de forma mais clara e específica")
@@ -459,18 +581,18 @@ class BrowserAgent:
                 
                 if hasattr(response, 'usage_metadata') and response.usage_metadata:
                     usage = response.usage_metadata
-                    logger.error(f"Usage metadata: {usage}")
+                    logger.error("Usage metadata: %s", usage)
                     if hasattr(usage, 'prompt_token_count'):
-                        logger.error(f"Tokens usados no prompt: {usage.prompt_token_count}")
+                        logger.error("Tokens usados no prompt: %s", usage.prompt_token_count)
                     error_details.append(f"Usage: {usage}")
                 
                 # Tentar obter informações de erro da resposta
                 if hasattr(response, 'error'):
-                    logger.error(f"Erro na resposta: {response.error}")
+                    logger.error("Erro na resposta: %s", response.error)
                     error_details.append(f"Erro: {response.error}")
                     
             except Exception as e:
-                logger.error(f"Erro ao obter detalhes da resposta: {e}")
+                logger.error("Erro ao obter detalhes da resposta: %s", e)
             
             if not is_safety_block:
                 logger.error("\nPossíveis causas:")
@@ -493,7 +615,7 @@ class BrowserAgent:
 
         # Extract the text and function call from the response.
         candidate = response.candidates[0]
-        logger.debug(f"Finish reason do candidato: {candidate.finish_reason}")
+        logger.debug("Finish reason do candidato: %s", candidate.finish_reason)
         
         # Append the model turn to conversation history.
         if candidate.content:
@@ -503,8 +625,8 @@ class BrowserAgent:
         reasoning = self.get_text(candidate)
         function_calls = self.extract_function_calls(candidate)
         
-        logger.info(f"Raciocínio extraído: {reasoning[:200]}..." if reasoning and len(reasoning) > 200 else f"Raciocínio: {reasoning}")
-        logger.info(f"Chamadas de função encontradas: {len(function_calls)}")
+        logger.info("Raciocínio: %s", lazy(truncate, reasoning, 200))
+        logger.info("Chamadas de função encontradas: %s", len(function_calls))
 
         # Retry the request in case of malformed FCs.
         if (
@@ -516,16 +638,21 @@ class BrowserAgent:
 
         if not function_calls:
             logger.info("Nenhuma chamada de função - loop do agente concluído")
-            logger.info(f"Raciocínio final: {reasoning}")
+            logger.info("Raciocínio final: %s", reasoning)
             print(f"Agent Loop Complete: {reasoning}")
             self.final_reasoning = reasoning
+            self._record_trace_step(reasoning, candidate)
             iteration_time = time.time() - iteration_start
-            logger.info(f"Iteração concluída em {iteration_time:.2f}s")
+            logger.info(
+                "Iteração concluída em %.2fs",
+                iteration_time,
+                extra={"duration_ms": round(iteration_time * 1000, 1)},
+            )
             return "COMPLETE"
 
         function_call_strs = []
         for idx, function_call in enumerate(function_calls, 1):
-            logger.info(f"Função {idx}/{len(function_calls)}: {function_call.name}")
+            logger.debug("Função %s/%s: %s", idx, len(function_calls), function_call.name)
             # Print the function call and any reasoning.
             function_call_str = f"Name: {function_call.name}"
             if function_call.args:
@@ -534,33 +661,35 @@ class BrowserAgent:
                     function_call_str += f"\n  {key}: {value}"
                     # Log detalhado dos argumentos
                     if key in ['x', 'y', 'destination_x', 'destination_y']:
-                        logger.debug(f"  {key}: {value} (normalizado)")
+                        logger.debug("  %s: %s (normalizado)", key, value)
                     elif key == 'text':
-                        logger.debug(f"  {key}: '{value[:50]}...' (truncado)" if len(str(value)) > 50 else f"  {key}: '{value}'")
+                        logger.debug("  %s: '%s'", key, lazy(truncate, value, 50))
                     else:
-                        logger.debug(f"  {key}: {value}")
+                        logger.debug("  %s: %s", key, value)
             function_call_strs.append(function_call_str)
 
-        table = Table(expand=True)
-        table.add_column(
-            "Gemini Computer Use Reasoning", header_style="magenta", ratio=1
-        )
-        table.add_column("Function Call(s)", header_style="cyan", ratio=1)
-        table.add_row(reasoning, "\n".join(function_call_strs))
         if self._verbose:
+            table = Table(expand=True)
+            table.add_column(
+                "Gemini Computer Use Reasoning", header_style="magenta", ratio=1
+            )
+            table.add_column("Function Call(s)", header_style="cyan", ratio=1)
+            table.add_row(reasoning, "\n".join(function_call_strs))
             console.print(table)
             print()
 
         function_responses = []
+        encoding_seconds = 0.0
         for idx, function_call in enumerate(function_calls, 1):
-            logger.info(f"Processando função {idx}/{len(function_calls)}: {function_call.name}")
+            # "Executando ação" (INFO) já registra cada função
+            logger.debug("Processando função %s/%s: %s", idx, len(function_calls), function_call.name)
             extra_fr_fields = {}
             
             if function_call.args and (
                 safety := function_call.args.get("safety_decision")
             ):
                 logger.warning("Decisão de segurança requerida!")
-                logger.debug(f"Detalhes de segurança: {safety}")
+                logger.debug("Detalhes de segurança: %s", safety)
                 decision = self._get_safety_confirmation(safety)
                 if decision == "TERMINATE":
                     logger.warning("Loop do agente terminado pelo usuário (decisão de segurança)")
@@ -570,6 +699,7 @@ class BrowserAgent:
                 extra_fr_fields["safety_acknowledgement"] = "true"
                 logger.info("Decisão de segurança confirmada - continuando")
                 
+            action_start = time.perf_counter()
             if self._verbose:
                 with console.status(
                     "Sending command to Computer...", spinner_style=None
@@ -577,39 +707,70 @@ class BrowserAgent:
                     fc_result = self.handle_action(function_call)
             else:
                 fc_result = self.handle_action(function_call)
-            if isinstance(fc_result, EnvState):
-                logger.debug(f"Resposta da função {function_call.name}: EnvState com URL {fc_result.url}")
-                logger.debug(f"Tamanho da screenshot: {len(fc_result.screenshot)} bytes")
-                function_responses.append(
-                    FunctionResponse(
-                        name=function_call.name,
-                        response={
-                            "url": fc_result.url,
-                            **extra_fr_fields,
-                        },
-                        parts=[
-                            types.FunctionResponsePart(
-                                inline_data=types.FunctionResponseBlob(
-                                    mime_type="image/png", data=fc_result.screenshot
-                                )
-                            )
-                        ],
+            self._record_trace_step(
+                reasoning,
+                candidate,
+                function_call=function_call,
+                result=fc_result,
+                action_seconds=time.perf_counter() - action_start,
+            )
+            encoding_start = time.perf_counter()
+            function_response = self._function_response(function_call, fc_result, extra_fr_fields)
+            if function_response is not None:
+                function_responses.append(function_response)
+            encoding_seconds += time.perf_counter() - encoding_start
+
+        self._finish_step(function_responses, encoding_seconds)
+        return "CONTINUE"
+
+    def _function_response(
+        self,
+        function_call: types.FunctionCall,
+        fc_result: FunctionResponseT,
+        extra_fr_fields: dict[str, Any],
+    ) -> Optional[FunctionResponse]:
+        """Encodes an action result (screenshot or dict) as the FunctionResponse sent back to the model."""
+        if isinstance(fc_result, EnvState):
+            logger.debug("Resposta da função %s: EnvState com URL %s", function_call.name, fc_result.url)
+            logger.debug("Tamanho da screenshot: %s bytes", len(fc_result.screenshot))
+            return FunctionResponse(
+                name=function_call.name,
+                response={
+                    "url": fc_result.url,
+                    **extra_fr_fields,
+                },
+                parts=[
+                    types.FunctionResponsePart(
+                        inline_data=types.FunctionResponseBlob(
+                            mime_type="image/png", data=fc_result.screenshot
+                        )
                     )
-                )
-            elif isinstance(fc_result, dict):
-                logger.debug(f"Resposta da função {function_call.name}: {fc_result}")
-                function_responses.append(
-                    FunctionResponse(name=function_call.name, response=fc_result)
-                )
+                ],
+            )
+        if isinstance(fc_result, dict):
+            logger.debug("Resposta da função %s: %s", function_call.name, fc_result)
+            return FunctionResponse(name=function_call.name, response=fc_result)
+        return None
 
+    def _finish_step(self, function_responses: list[FunctionResponse], encoding_seconds: float):
+        """Appends the function responses to the history and prunes old screenshots, with metrics.
+
+        Shared by every run_one_iteration implementation (the web wrapper overrides the step).
+        """
+        encoding_start = time.perf_counter()
         self._contents.append(
             Content(
                 role="user",
                 parts=[Part(function_response=fr) for fr in function_responses],
             )
         )
+        metrics.RESPONSE_ENCODING_SECONDS.observe(encoding_seconds + time.perf_counter() - encoding_start)
+
+        with metrics.REQUEST_BUILD_SECONDS.time():
+            self._prune_old_screenshots()
 
-        # only keep screenshots in the few most recent turns, remove the screenshot images from the old turns.
+    def _prune_old_screenshots(self):
+        """Only keeps screenshots in the few most recent turns; older turns lose their images."""
         turn_with_screenshots_found = 0
         for content in reversed(self._contents):
             if content.role == "user" and content.parts:
@@ -638,7 +799,49 @@ class BrowserAgent:
                             ):
                                 part.function_response.parts = None
 
-        return "CONTINUE"
+    def _estimate_request_bytes(self) -> int:
+        """Approximate request payload size: base64 images plus text parts."""
+        total = 0
+        for content in self._contents:
+            for part in content.parts or ():
+                if part.text:
+                    total += len(part.text)
+                if part.inline_data and part.inline_data.data:
+                    total += len(part.inline_data.data) * 4 // 3
+                if part.function_response and part.function_response.parts:
+                    for fr_part in part.function_response.parts:
+                        if fr_part.inline_data and fr_part.inline_data.data:
+                            total += len(fr_part.inline_data.data) * 4 // 3
+        return total
+
+    def _record_trace_step(
+        self,
+        reasoning: Optional[str],
+        candidate: Candidate,
+        function_call: Optional[types.FunctionCall] = None,
+        result: Optional[FunctionResponseT] = None,
+        action_seconds: float = 0.0,
+    ):
+        """Appends one step (an executed action, or the final answer) to the run trace."""
+        if self._run_trace is None:
+            return
+        meta = {
+            "iteration": self.iteration_count,
+            "timestamp": time.time(),
+            "model_call": self._last_model_call,
+            "finish_reason": str(candidate.finish_reason) if candidate.finish_reason else None,
+            "reasoning": reasoning,
+            "function": function_call.name if function_call else None,
+            "args": dict(function_call.args) if function_call and function_call.args else {},
+            "action_seconds": round(action_seconds, 4),
+        }
+        screenshot = None
+        if isinstance(result, EnvState):
+            meta["url"] = result.url
+            screenshot = result.screenshot
+        elif isinstance(result, dict):
+            meta["result"] = result
+        self._run_trace.append_step(meta, screenshot)
 
     def _get_safety_confirmation(
         self, safety: dict[str, Any]
@@ -659,42 +862,78 @@ class BrowserAgent:
         return "CONTINUE"
 
     def agent_loop(self):
+        with log_context(run_id=self.run_id), tracing.span("agent.agent_loop", run_id=self.run_id, model=self._model_name):
+            self._agent_loop()
+
+    def _agent_loop(self):
         logger.info("=" * 60)
         logger.info("Iniciando loop do agente")
-        logger.info(f"Query: {self._query}")
-        logger.info(f"Modelo: {self._model_name}")
+        logger.info("Query: %s", self._query)
+        logger.info("Modelo: %s", self._model_name)
         logger.info("=" * 60)
         
-        iteration_count = 0
+        self.iteration_count = 0
         status = "CONTINUE"
         max_iterations = 50  # Limite de segurança para evitar loops infinitos
+        if self.memory_monitor:
+            self.memory_monitor.start()
         
-        while status == "CONTINUE":
-            iteration_count += 1
-            
-            if iteration_count > max_iterations:
-                logger.warning(f"Limite de {max_iterations} iterações atingido - finalizando loop")
-                break
-            
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Iteração #{iteration_count}")
-            logger.info(f"{'='*60}\n")
-            
-            status = self.run_one_iteration()
-            
-            if status == "CONTINUE":
-                logger.info(f"Iteração #{iteration_count} concluída - continuando...")
-            else:
-                logger.info(f"Iteração #{iteration_count} concluída - finalizando loop")
+        try:
+            while status == "CONTINUE":
+                self._cancellation.raise_if_cancelled()
+                if self.iteration_count >= max_iterations:
+                    logger.warning("Limite de %s iterações atingido - finalizando loop", max_iterations)
+                    break
+                
+                self.iteration_count += 1
+                iteration_count = self.iteration_count
+                with log_context(iteration=iteration_count), tracing.span("agent.run_one_iteration", iteration=iteration_count):
+                    logger.info("\n" + "=" * 60)
+                    logger.info("Iteração #%s", iteration_count)
+                    logger.info("=" * 60 + "\n")
+                    
+                    status = self.run_one_iteration()
+                    if self.memory_monitor:
+                        self.memory_monitor.step(iteration_count)
+                    
+                    if status == "CONTINUE":
+                        logger.info("Iteração #%s concluída - continuando...", iteration_count)
+                    else:
+                        logger.info("Iteração #%s concluída - finalizando loop", iteration_count)
+                    
+                    if status == "CONTINUE":
+                        self.budget_exceeded = self.usage.budget_exceeded()
+                    if self.budget_exceeded:
+                        logger.warning("Orçamento da execução excedido (%s) - finalizando loop", self.budget_exceeded)
+                        break
+        except AgentCancelled as e:
+            self.cancelled = True
+            logger.warning("Execução cancelada na iteração #%s: %s", self.iteration_count, e)
+        finally:
+            if self.memory_monitor:
+                self.memory_monitor.stop(self.iteration_count)
         
         logger.info("=" * 60)
-        logger.info(f"Loop do agente finalizado após {iteration_count} iterações")
+        logger.info(
+            "Loop do agente finalizado após %s iterações",
+            self.iteration_count,
+            extra={
+                "iterations": self.iteration_count,
+                "total_tokens": self.total_token_count,
+                "cost_usd": round(self.usage.totals.cost_usd, 6),
+            },
+        )
+        logger.info("Uso de tokens: %s", lazy(self.usage.format_summary))
         if self.final_reasoning:
-            logger.info(f"Raciocínio final: {self.final_reasoning}")
+            logger.info("Raciocínio final: %s", self.final_reasoning)
         if hasattr(self, '_safety_block_count') and self._safety_block_count > 0:
-            logger.warning(f"Total de bloqueios de segurança: {self._safety_block_count}")
+            logger.warning("Total de bloqueios de segurança: %s", self._safety_block_count)
         logger.info("=" * 60)
 
+    @property
+    def total_token_count(self) -> int:
+        return self.usage.totals.total
+
     def denormalize_x(self, x: int) -> int:
         return int(x / 1000 * self._browser_computer.screen_size()[0])
 
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark ponta a ponta offline: agente real, navegador real, modelo roteirizado.
+
+Serve os sites de benchmarks/fixtures/e2e (formulário, scroll infinito,
+navegação SPA, popups) em um servidor HTTP local e executa o BrowserAgent
+com o PlaywrightComputer (Chromium headless) sobre cada um. O Gemini é
+substituído por uma política roteirizada: cada cenário é uma sequência fixa
+de chamadas de função, com coordenadas nos elementos das páginas, que o
+agente executa pelo caminho normal (handle_action, espera, screenshot,
+histórico). Ao fim, uma expressão JS confere se o cenário chegou ao estado
+esperado.
+
+Mede passos por segundo, latência p50/p95 por passo, bytes por passo
+(requisição estimada ao modelo e screenshots capturadas) e o pico de RSS do
+processo e do navegador. --model_latency simula o tempo do modelo (padrão 0:
+só o custo local).
+
+Uso:
+    python -m benchmarks.bench_e2e --repeat 3 --output e2e.json
+    python -m benchmarks.bench_e2e --scenarios form spa
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from google.genai import types
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from agent import BrowserAgent  # noqa: E402
+from benchmarks.bench_log_overhead import silence_console  # noqa: E402
+from computers import PlaywrightComputer  # noqa: E402
+
+SCREEN_SIZE = (1440, 900)
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "e2e")
+
+
+class FixtureHandler(http.server.SimpleHTTPRequestHandler):
+    """Arquivos de fixtures/e2e; rotas /spa/* caem no spa.html (history API)"""
+
+    def translate_path(self, path):
+        if path.split("?", 1)[0].startswith("/spa/"):
+            path = "/spa.html"
+        return super().translate_path(path)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Servidor HTTP local em uma thread, em porta livre"""
+
+    def __init__(self):
+        handler = functools.partial(FixtureHandler, directory=FIXTURES_DIR)
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def at(x: int, y: int) -> dict:
+    """Pixels da tela -> coordenadas normalizadas 0-999 do Computer Use"""
+    return {"x": x * 1000 // SCREEN_SIZE[0], "y": y * 1000 // SCREEN_SIZE[1]}
+
+
+# Cada passo é uma lista de (função, argumentos); as coordenadas batem com o CSS das fixtures.
+SCENARIOS = {
+    "form": {
+        "page": "/form.html",
+        "query": "Preencha o cadastro com nome e e-mail, aceite os termos e envie.",
+        "steps": [
+            [("type_text_at", {**at(300, 140), "text": "Maria Silva"})],
+            [("type_text_at", {**at(300, 220), "text": "maria@example.com"})],
+            [("click_at", at(150, 300))],
+            [("click_at", at(200, 385))],
+        ],
+        "expect": "document.getElementById('status').textContent === 'Enviado: Maria Silva'"
+                  " && location.search === '?enviado=1'",
+    },
+    "infinite_scroll": {
+        "page": "/infinite_scroll.html",
+        "query": "Role o feed até carregar pelo menos 60 itens.",
+        "steps": [[("scroll_document", {"direction": "down"})]] * 6
+        + [[("scroll_at", {**at(720, 450), "direction": "down", "magnitude": 800})]] * 2,
+        "expect": "document.querySelectorAll('.item').length >= 60",
+    },
+    "spa": {
+        "page": "/spa/",
+        "query": "Abra o produto 3, volte, avance e termine na página de contato.",
+        "steps": [
+            [("click_at", at(380, 40))],
+            [("click_at", at(250, 265))],
+            [("go_back", {})],
+            [("go_forward", {})],
+            [("click_at", at(580, 40))],
+            [("navigate", {"url": "{base_url}/spa/produtos/5"})],
+            [("go_back", {})],
+        ],
+        "expect": "location.pathname === '/spa/contato'"
+                  " && document.querySelector('#view h1').textContent === 'Contato'",
+    },
+    "popup": {
+        "page": "/popup.html",
+        "query": "Entre pelo provedor e abra os termos de uso.",
+        "steps": [
+            [("click_at", at(250, 125))],  # abre o popup com opener
+            [("click_at", at(250, 125))],  # autoriza; o popup fecha e volta ao opener
+            [("click_at", at(250, 260))],  # target=_blank sem opener substitui a página
+        ],
+        "expect": "location.pathname === '/popup_terms.html' && location.search === '?auth=ok'",
+    },
+}
+
+
+class ScriptedModel:
+    """Substitui o genai.Client: devolve o próximo passo do roteiro a cada chamada"""
+
+    def __init__(self, steps, base_url: str, latency: float = 0.0):
+        self.models = self
+        self._steps = iter(steps)
+        self._base_url = base_url
+        self._latency = latency
+
+    def generate_content(self, model, contents, config):
+        if self._latency:
+            time.sleep(self._latency)
+        step = next(self._steps, None)
+        if step is None:
+            parts = [types.Part(text="Tarefa concluída.")]
+        else:
+            parts = [
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name=name,
+                        args={
+                            key: value.format(base_url=self._base_url) if isinstance(value, str) else value
+                            for key, value in args.items()
+                        },
+                    )
+                )
+                for name, args in step
+            ]
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(role="model", parts=parts),
+                    finish_reason=types.FinishReason.STOP,
+                )
+            ]
+        )
+
+
+class MeasuredComputer(PlaywrightComputer):
+    """Soma os bytes de todas as screenshots capturadas"""
+
+    screenshot_bytes = 0
+
+    def current_state(self):
+        state = super().current_state()
+        self.screenshot_bytes += len(state.screenshot)
+        return state
+
+
+class MeasuredAgent(BrowserAgent):
+    """Registra latência e bytes de cada passo do loop"""
+
+    def __init__(self, *args, rss_sampler=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.step_latencies = []
+        self.request_bytes = []
+        self.step_screenshot_bytes = []
+        self._rss_sampler = rss_sampler
+
+    def run_one_iteration(self):
+        computer = self._browser_computer
+        screenshots_before = computer.screenshot_bytes
+        # Histórico já com as screenshots do passo anterior: o que vai ao modelo
+        self.request_bytes.append(self._estimate_request_bytes())
+        start = time.perf_counter()
+        status = super().run_one_iteration()
+        self.step_latencies.append(time.perf_counter() - start)
+        self.step_screenshot_bytes.append(computer.screenshot_bytes - screenshots_before)
+        if self._rss_sampler:
+            self._rss_sampler.sample()
+        return status
+
+
+class RssSampler:
+    """Pico de RSS do processo e de seus descendentes (Chromium), lido em /proc"""
+
+    def __init__(self):
+        self.peak_tree_bytes = 0
+
+    def sample(self):
+        self.peak_tree_bytes = max(self.peak_tree_bytes, process_tree_rss(os.getpid()))
+
+    @staticmethod
+    def peak_self_bytes() -> int:
+        # ru_maxrss é em KB no Linux e em bytes no macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_tree_rss(root_pid: int) -> int:
+    """RSS somado do processo e descendentes (0 fora do Linux)"""
+    if not os.path.isdir("/proc"):
+        return 0
+    children = {}
+    rss = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        # O nome do processo (entre parênteses) pode conter espaços
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+        rss[int(entry)] = resident_pages * page_size
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        pending.extend(children.get(pid, ()))
+    return total
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_scenario(name: str, base_url: str, model_latency: float, sampler: RssSampler) -> dict:
+    scenario = SCENARIOS[name]
+    computer = MeasuredComputer(screen_size=SCREEN_SIZE, initial_url=base_url + scenario["page"])
+    result = {"scenario": name, "success": False, "error": None}
+    start = time.perf_counter()
+    with computer:
+        sampler.sample()
+        agent = MeasuredAgent(
+            computer,
+            query=scenario["query"],
+            model_name="scripted",
+            verbose=False,
+            rss_sampler=sampler,
+        )
+        agent._client = ScriptedModel(scenario["steps"], base_url, model_latency)
+        try:
+            agent.agent_loop()
+            result["success"] = bool(computer._page.evaluate(scenario["expect"]))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result.update(
+            duration_s=time.perf_counter() - start,
+            step_latencies=agent.step_latencies,
+            request_bytes=agent.request_bytes,
+            screenshot_bytes=agent.step_screenshot_bytes,
+        )
+    return result
+
+
+def summarize(runs) -> dict:
+    latencies = [latency for run in runs for latency in run["step_latencies"]]
+    request_bytes = [size for run in runs for size in run["request_bytes"]]
+    screenshot_bytes = [size for run in runs for size in run["screenshot_bytes"]]
+    loop_time = sum(latencies)
+    return {
+        "runs": len(runs),
+        "successes": sum(run["success"] for run in runs),
+        "errors": [run["error"] for run in runs if run["error"]],
+        "steps": len(latencies),
+        # Só o loop do agente; o lançamento do navegador fica em duration_s
+        "steps_per_s": round(len(latencies) / loop_time, 2) if loop_time else 0.0,
+        "duration_s": round(sum(run["duration_s"] for run in runs), 2),
+        "step_latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "max": round(max(latencies, default=0.0) * 1000, 1),
+            "mean": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "bytes_per_step": {
+            "request": round(statistics.mean(request_bytes)) if request_bytes else 0,
+            "screenshots": round(statistics.mean(screenshot_bytes)) if screenshot_bytes else 0,
+        },
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(FIXTURES_DIR),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções de cada cenário.")
+    parser.add_argument("--model_latency", type=float, default=0.0, help="Segundos simulados por chamada ao modelo.")
+    parser.add_argument("--output", default="bench_e2e_results.json", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    silence_console()
+    sampler = RssSampler()
+    runs = {name: [] for name in args.scenarios}
+    with FixtureServer() as server:
+        for _ in range(args.repeat):
+            for name in args.scenarios:
+                runs[name].append(run_scenario(name, server.base_url, args.model_latency, sampler))
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "screen_size": list(SCREEN_SIZE),
+        "model_latency_s": args.model_latency,
+        "repeat": args.repeat,
+        "scenarios": {name: summarize(scenario_runs) for name, scenario_runs in runs.items()},
+        "total": summarize([run for scenario_runs in runs.values() for run in scenario_runs]),
+        "peak_rss_mb": {
+            "process": round(RssSampler.peak_self_bytes() / 2**20, 1),
+            "process_and_browser": round(sampler.peak_tree_bytes / 2**20, 1),
+        },
+    }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    total = results["total"]
+    return 0 if total["successes"] == total["runs"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
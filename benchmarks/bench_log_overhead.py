@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Microbenchmark do custo de logging por passo do agente (DEBUG desligado).
+
+Executa o caminho real de um passo - BrowserAgent.run_one_iteration com duas
+chamadas de função, handle_action e PlaywrightComputer - sobre uma página e
+um modelo falsos (sem rede, sem navegador). O mesmo passo é medido com o
+logging desativado, em INFO e em DEBUG; a diferença para o modo desativado
+é o custo de logging. O console vai para /dev/null.
+
+Uso:
+    python -m benchmarks.bench_log_overhead --steps 2000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import time
+
+from google.genai import types
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from agent import BrowserAgent  # noqa: E402
+from computers import PlaywrightComputer  # noqa: E402
+
+SCREEN_SIZE = (1440, 900)
+SCREENSHOT = b"\x89PNG" + b"\x00" * 150_000
+
+
+class FakeInput:
+    def click(self, *args, **kwargs):
+        pass
+
+    def move(self, *args, **kwargs):
+        pass
+
+    def type(self, *args, **kwargs):
+        pass
+
+    def press(self, *args, **kwargs):
+        pass
+
+    def down(self, *args, **kwargs):
+        pass
+
+    def up(self, *args, **kwargs):
+        pass
+
+
+class FakePage:
+    url = "https://www.example.com/resultados?q=benchmark"
+    viewport_size = {"width": SCREEN_SIZE[0], "height": SCREEN_SIZE[1]}
+
+    def __init__(self):
+        self.mouse = FakeInput()
+        self.keyboard = FakeInput()
+
+    def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+    def screenshot(self, *args, **kwargs):
+        return SCREENSHOT
+
+
+def model_response() -> types.GenerateContentResponse:
+    """Resposta típica: raciocínio + clique + digitação, com usage_metadata"""
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(
+                    role="model",
+                    parts=[
+                        types.Part(text="Vou clicar no campo de busca e digitar a consulta. " * 8),
+                        types.Part(function_call=types.FunctionCall(name="click_at", args={"x": 500, "y": 300})),
+                        types.Part(
+                            function_call=types.FunctionCall(
+                                name="type_text_at",
+                                args={"x": 500, "y": 300, "text": "preço do voo para lisboa", "press_enter": True},
+                            )
+                        ),
+                    ],
+                ),
+                finish_reason=types.FinishReason.STOP,
+            )
+        ],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=2450, candidates_token_count=85, total_token_count=2535
+        ),
+    )
+
+
+def make_agent() -> BrowserAgent:
+    computer = PlaywrightComputer(screen_size=SCREEN_SIZE, initial_url="about:blank")
+    computer._page = FakePage()
+    computer._sleep = lambda seconds: None
+    agent = BrowserAgent(computer, query="Buscar voos para Lisboa", model_name="benchmark", verbose=False)
+    response = model_response()
+    agent._generate_content = lambda: response
+    return agent
+
+
+def silence_console():
+    """Console dos loggers já configurados -> /dev/null (o arquivo não muda)"""
+    devnull = open(os.devnull, "w")
+    for logger in [logging.getLogger()] + [
+        l for l in logging.Logger.manager.loggerDict.values() if isinstance(l, logging.Logger)
+    ]:
+        for handler in logger.handlers:
+            if type(handler) is logging.StreamHandler:
+                handler.setStream(devnull)
+
+
+def run(agent: BrowserAgent, steps: int) -> float:
+    """Mediana do tempo por passo em µs"""
+    initial_contents = list(agent._contents)
+    per_step = []
+    for _ in range(steps):
+        agent._contents = list(initial_contents)
+        start = time.perf_counter()
+        agent.run_one_iteration()
+        per_step.append(time.perf_counter() - start)
+    return statistics.median(per_step) * 1e6
+
+
+def set_level(level: int):
+    for name in ("agent", "computers.playwright.playwright"):
+        logging.getLogger(name).setLevel(level)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=2000, help="Passos medidos por modo.")
+    parser.add_argument("--rounds", type=int, default=3, help="Rodadas alternando os modos (usa a melhor).")
+    args = parser.parse_args()
+
+    silence_console()
+    agent = make_agent()
+    run(agent, 200)  # aquecimento
+
+    results = {"desativado": [], "INFO": [], "DEBUG": []}
+    for _ in range(args.rounds):
+        logging.disable(logging.CRITICAL)
+        results["desativado"].append(run(agent, args.steps))
+        logging.disable(logging.NOTSET)
+        set_level(logging.INFO)
+        results["INFO"].append(run(agent, args.steps))
+        set_level(logging.DEBUG)
+        results["DEBUG"].append(run(agent, args.steps))
+    set_level(logging.INFO)
+
+    baseline = min(results["desativado"])
+    print(f"{args.steps} passos por modo, mediana por passo (melhor de {args.rounds} rodadas)")
+    print(f"{'modo':12} {'por passo':>12} {'custo de logging':>18}")
+    for mode, values in results.items():
+        best = min(values)
+        print(f"{mode:12} {best:>10.1f}µs {best - baseline:>16.1f}µs")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark do custo de logging por passo do agente: síncrono vs assíncrono.
+
+Cada "passo" emite a mesma quantidade de linhas que um passo real do agente
+(cabeçalhos de iteração, argumentos da função, tempos, URL). O console é
+redirecionado para um arquivo (como a saída capturada de um container) e o
+arquivo de log fica no disco. Entre os passos, a thread do agente espera
+(--step_wait_ms), como faz aguardando o modelo e o navegador. Mede o tempo
+gasto na thread que loga - o que o agente deixa de gastar executando ações.
+
+Uso:
+    python -m benchmarks.bench_logging --steps 500
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import logger_config
+
+LINES_PER_STEP = 40
+
+
+def log_step(logger: logging.Logger, step: int):
+    logger.info("=" * 60)
+    logger.info(f"Iteração #{step}")
+    logger.info("=" * 60)
+    for i in range(LINES_PER_STEP - 6):
+        logger.info(f"Função {i}: click_at x={step % 1000} y={i * 7} - url https://example.com/{step}/{i}")
+    logger.debug("Conteúdo sendo enviado (não emitido em INFO)")
+    logger.warning(f"Resposta recebida do modelo em {0.5 + step % 10 / 10:.2f}s")
+    logger.info(f"Iteração #{step} concluída - continuando...")
+
+
+def run(mode: str, steps: int, step_wait: float, directory: str) -> dict:
+    name = f"bench_logging_{mode}"
+    logger = logger_config.setup_logger(
+        name,
+        level="INFO",
+        log_file=os.path.join(directory, f"{mode}.log"),
+        async_mode=(mode == "async"),
+    )
+    logger.propagate = False
+    per_step = []
+    start = time.perf_counter()
+    for step in range(steps):
+        step_start = time.perf_counter()
+        log_step(logger, step)
+        per_step.append(time.perf_counter() - step_start)
+        time.sleep(step_wait)
+    caller_seconds = time.perf_counter() - start
+    dropped = 0
+    if mode == "async":
+        # Inclui o tempo da thread de fundo até tudo estar escrito
+        dropped = logger_config.get_async_dispatcher().dropped
+        logger_config.flush_async_logging()
+    total_seconds = time.perf_counter() - start
+    return {
+        "per_step_us": statistics.mean(per_step) * 1e6,
+        "p95_step_us": sorted(per_step)[int(len(per_step) * 0.95)] * 1e6,
+        "caller_seconds": caller_seconds,
+        "total_seconds": total_seconds,
+        "dropped": dropped,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=500, help="Passos simulados do agente.")
+    parser.add_argument(
+        "--step_wait_ms",
+        type=float,
+        default=5.0,
+        help="Espera entre passos (modelo/navegador); 0 = logging contínuo.",
+    )
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_logging_")
+    console = open(os.path.join(directory, "console.out"), "w")
+    real_stdout, sys.stdout = sys.stdout, console
+    try:
+        results = {
+            mode: run(mode, args.steps, args.step_wait_ms / 1000, directory)
+            for mode in ("sync", "async")
+        }
+    finally:
+        sys.stdout = real_stdout
+        console.close()
+
+    print(f"{LINES_PER_STEP} linhas por passo, {args.steps} passos (console + arquivo)")
+    print(f"{'':6} {'por passo':>12} {'p95':>12} {'thread do agente':>18} {'total':>12} {'descartados':>12}")
+    for mode, r in results.items():
+        print(
+            f"{mode:6} {r['per_step_us']:>10.0f}µs {r['p95_step_us']:>10.0f}µs "
+            f"{r['caller_seconds']:>17.3f}s {r['total_seconds']:>11.3f}s {r['dropped']:>12}"
+        )
+    speedup = results["sync"]["per_step_us"] / max(results["async"]["per_step_us"], 1e-9)
+    print(f"Redução do custo por passo na thread do agente: {speedup:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
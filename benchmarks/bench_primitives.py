@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Microbenchmark de cada primitiva do PlaywrightComputer em Chromium headless.
+
+Executa click_at, type_text_at, scroll_at, navigate, key_combination,
+drag_and_drop e current_state N vezes sobre as páginas de
+benchmarks/fixtures/e2e (servidor HTTP local, sem rede). O tempo de cada
+chamada é dividido em:
+
+- driver: chamadas à página que vão ao navegador (mouse, teclado, goto,
+  go_back...), com a contagem de idas e voltas;
+- espera: _wait_for_load_state;
+- sleep: _sleep (a pausa fixa de current_state);
+- screenshot: page.screenshot;
+- python: o restante (logging, montagem do EnvState).
+
+Com --baseline os resultados são comparados com uma execução anterior
+salva por --save_baseline; p50 acima da tolerância conta como regressão.
+
+Uso:
+    python -m benchmarks.bench_primitives --runs 30 --save_baseline base.json
+    python -m benchmarks.bench_primitives --runs 30 --baseline base.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.bench_e2e import SCREEN_SIZE, FixtureServer
+from benchmarks.bench_log_overhead import silence_console
+from computers import PlaywrightComputer
+
+BUCKETS = ("driver", "espera", "sleep", "screenshot", "python")
+
+
+class Timings:
+    """Tempo acumulado por categoria na chamada em andamento"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict.fromkeys(BUCKETS[:-1], 0.0)
+        self.round_trips = 0
+
+    def add(self, bucket: str, seconds: float):
+        self.seconds[bucket] += seconds
+
+
+class TimedProxy:
+    """Cronometra os métodos de um objeto do Playwright (page, mouse, keyboard)"""
+
+    # Contabilizado por ProfiledComputer._wait_for_load_state
+    UNTIMED = frozenset({"wait_for_load_state"})
+
+    def __init__(self, target, timings: Timings):
+        self._target = target
+        self._timings = timings
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name in ("mouse", "keyboard"):
+            return TimedProxy(value, self._timings)
+        if not callable(value) or name in self.UNTIMED:
+            return value
+        bucket = "screenshot" if name == "screenshot" else "driver"
+        timings = self._timings
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                timings.add(bucket, time.perf_counter() - start)
+                timings.round_trips += 1
+
+        return timed
+
+
+class ProfiledComputer(PlaywrightComputer):
+    """PlaywrightComputer com esperas e sleeps cronometrados"""
+
+    timings = None
+
+    def _wait_for_load_state(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super()._wait_for_load_state(*args, **kwargs)
+        finally:
+            self.timings.add("espera", time.perf_counter() - start)
+
+    def _sleep(self, seconds: float):
+        start = time.perf_counter()
+        try:
+            return super()._sleep(seconds)
+        finally:
+            self.timings.add("sleep", time.perf_counter() - start)
+
+
+# (página, chamada) - i alterna origem e destino para que a página não fique parada no mesmo estado
+PRIMITIVES = {
+    "click_at": ("/form.html", lambda c, base, i: c.click_at(300, 140)),
+    "type_text_at": ("/form.html", lambda c, base, i: c.type_text_at(300, 140, "Maria Silva")),
+    "scroll_at": ("/infinite_scroll.html", lambda c, base, i: c.scroll_at(720, 450, "down", 800)),
+    "navigate": ("/form.html", lambda c, base, i: c.navigate(base + ("/spa/produtos", "/form.html")[i % 2])),
+    "key_combination": ("/form.html", lambda c, base, i: c.key_combination(["Control", "A"])),
+    "drag_and_drop": (
+        "/drag.html",
+        lambda c, base, i: c.drag_and_drop(*((150, 150, 600, 400), (600, 400, 150, 150))[i % 2]),
+    ),
+    "current_state": ("/form.html", lambda c, base, i: c.current_state()),
+}
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(computer: ProfiledComputer, name: str, base_url: str, runs: int, warmup: int) -> dict:
+    page, call = PRIMITIVES[name]
+    computer._goto(base_url + page)
+    totals = []
+    buckets = {bucket: [] for bucket in BUCKETS}
+    round_trips = []
+    for i in range(warmup + runs):
+        computer.timings.reset()
+        start = time.perf_counter()
+        call(computer, base_url, i)
+        total = time.perf_counter() - start
+        if i < warmup:
+            continue
+        totals.append(total)
+        for bucket, seconds in computer.timings.seconds.items():
+            buckets[bucket].append(seconds)
+        buckets["python"].append(max(0.0, total - sum(computer.timings.seconds.values())))
+        round_trips.append(computer.timings.round_trips)
+    return {
+        "runs": runs,
+        "total_ms": distribution(totals),
+        "buckets_ms": {bucket: distribution(values) for bucket, values in buckets.items()},
+        "round_trips": statistics.median(round_trips),
+    }
+
+
+def distribution(seconds) -> dict:
+    return {
+        "p50": round(percentile(seconds, 0.50) * 1000, 2),
+        "p95": round(percentile(seconds, 0.95) * 1000, 2),
+        "mean": round(statistics.mean(seconds) * 1000, 2),
+    }
+
+
+def print_table(results: dict):
+    print(f"{'primitiva':16} {'p50':>9} {'p95':>9} " + " ".join(f"{b:>10}" for b in BUCKETS) + f" {'idas':>5}")
+    for name, result in results.items():
+        total = result["total_ms"]
+        print(
+            f"{name:16} {total['p50']:>7.1f}ms {total['p95']:>7.1f}ms "
+            + " ".join(f"{result['buckets_ms'][b]['mean']:>8.1f}ms" for b in BUCKETS)
+            + f" {result['round_trips']:>5g}"
+        )
+    print("(colunas por categoria: média por chamada)")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Imprime a variação do p50 por primitiva e devolve as regressões"""
+    regressions = []
+    print(f"\nComparação com a linha de base (tolerância {tolerance:.0%}):")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            print(f"{name:16} sem linha de base")
+            continue
+        old, new = before["total_ms"]["p50"], result["total_ms"]["p50"]
+        change = (new - old) / old if old else 0.0
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        details = ", ".join(
+            f"{bucket} {before['buckets_ms'][bucket]['mean']:.1f}->{result['buckets_ms'][bucket]['mean']:.1f}ms"
+            for bucket in BUCKETS
+        )
+        print(f"{name:16} p50 {old:.1f}->{new:.1f}ms ({change:+.1%}){' REGRESSÃO' if regressed else ''}  [{details}]")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--primitives", nargs="+", choices=list(PRIMITIVES), default=list(PRIMITIVES))
+    parser.add_argument("--runs", type=int, default=20, help="Chamadas medidas por primitiva.")
+    parser.add_argument("--warmup", type=int, default=3, help="Chamadas descartadas antes de medir.")
+    parser.add_argument("--output", help="Arquivo JSON com os resultados.")
+    parser.add_argument("--save_baseline", help="Grava os resultados como linha de base neste arquivo.")
+    parser.add_argument("--baseline", help="Linha de base gravada antes, para comparação.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Aumento relativo do p50 tolerado.")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            parser.error(f"linha de base não encontrada: {args.baseline} (grave uma com --save_baseline)")
+        with open(args.baseline) as f:
+            baseline = json.load(f)["primitives"]
+
+    silence_console()
+    results = {}
+    with FixtureServer() as server:
+        computer = ProfiledComputer(screen_size=SCREEN_SIZE, initial_url=server.base_url + "/form.html")
+        computer.timings = Timings()
+        with computer:
+            computer._page = TimedProxy(computer._page, computer.timings)
+            for name in args.primitives:
+                results[name] = measure(computer, name, server.base_url, args.runs, args.warmup)
+
+    print_table(results)
+    document = {"runs": args.runs, "screen_size": list(SCREEN_SIZE), "primitives": results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+
+    if baseline is not None and compare(results, baseline, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
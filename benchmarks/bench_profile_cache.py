@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark de tempo de carregamento com perfil persistente: frio vs quente.
+
+A mesma "tarefa" (navegar pelas URLs informadas) é executada primeiro com um
+perfil vazio (frio) e depois reutilizando o mesmo perfil (quente).
+
+Uso:
+    python -m benchmarks.bench_profile_cache --url https://example.com --runs 3
+"""
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from computers import PlaywrightComputer
+
+SCREEN_SIZE = (1440, 900)
+
+
+def run_task(urls: list[str], profiles_dir: str, profile_name: str) -> float:
+    """Executa a tarefa e retorna o tempo total de navegação em segundos."""
+    computer = PlaywrightComputer(
+        screen_size=SCREEN_SIZE,
+        initial_url="about:blank",
+        profile_name=profile_name,
+        profiles_dir=profiles_dir,
+    )
+    with computer:
+        start = time.perf_counter()
+        for url in urls:
+            computer.navigate(url)
+        return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", action="append", required=True, help="URL da tarefa (pode repetir).")
+    parser.add_argument("--runs", type=int, default=3, help="Número de repetições frio/quente.")
+    args = parser.parse_args()
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        profiles_dir = tempfile.mkdtemp(prefix="bench_profiles_")
+        try:
+            cold.append(run_task(args.url, profiles_dir, "bench"))
+            warm.append(run_task(args.url, profiles_dir, "bench"))
+        finally:
+            shutil.rmtree(profiles_dir, ignore_errors=True)
+
+    print(f"{'':8} {'mediana':>10} {'mín':>10} {'máx':>10}")
+    for label, samples in (("frio", cold), ("quente", warm)):
+        print(
+            f"{label:8} {statistics.median(samples):>9.2f}s "
+            f"{min(samples):>9.2f}s {max(samples):>9.2f}s"
+        )
+    speedup = statistics.median(cold) / max(statistics.median(warm), 1e-9)
+    print(f"Ganho do cache quente: {speedup:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Teste de carga da interface web com muitos visualizadores simultâneos.
+
+Sobe o servidor no próprio processo, simula um agente publicando logs e
+screenshots em uma sessão e conecta N visualizadores. Cada visualizador mantém
+um stream SSE aberto, baixa cada nova screenshot anunciada e consulta o status
+continuamente. Mede vazão de requisições, latência e entrega de eventos.
+
+Cliente e servidor dividem o mesmo processo (e o GIL), então os números são
+um limite inferior do que o servidor atende sozinho. Com --poll_interval 0 o
+status é consultado sem pausa; screenshots já substituídas por uma versão
+mais nova antes do download aparecem em stale_screenshots.
+
+Uso:
+    python -m benchmarks.load_test_web --viewers 100 --duration 20
+    python -m benchmarks.load_test_web --server werkzeug   # comparação
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import threading
+import time
+
+import serve
+import web_gui
+
+
+class ViewerStats:
+    """Contadores de um visualizador (atualizados apenas pela sua thread)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.events = 0
+        self.screenshots = 0
+        # Versões já substituídas quando o download começou (404 esperado)
+        self.stale_screenshots = 0
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed_get(conn, path, stats):
+    start = time.perf_counter()
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+    except (OSError, http.client.HTTPException):
+        stats.errors += 1
+        conn.close()
+        return None
+    stats.latencies.append(time.perf_counter() - start)
+    if response.status >= 500:
+        stats.errors += 1
+    return response.status
+
+
+def stream_events(port, base, stats, stop):
+    """Lê o stream SSE e baixa cada screenshot anunciada"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    images = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", f"{base}/events")
+        response = conn.getresponse()
+        event = None
+        while not stop.is_set():
+            line = response.readline()
+            if not line:
+                break
+            line = line.decode("utf-8").rstrip("\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                stats.events += 1
+                if event == "screenshot":
+                    version = json.loads(line[len("data: "):])["version"]
+                    status = timed_get(images, f"{base}/screenshot/{version}.png", stats)
+                    if status == 200:
+                        stats.screenshots += 1
+                    elif status == 404:
+                        stats.stale_screenshots += 1
+    except (OSError, http.client.HTTPException):
+        if not stop.is_set():
+            stats.errors += 1
+    finally:
+        conn.close()
+        images.close()
+
+
+def poll_status(port, base, stats, stop, interval):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while not stop.is_set():
+        timed_get(conn, f"{base}/status", stats)
+        if interval:
+            stop.wait(interval)
+    conn.close()
+
+
+def simulate_agent(session, stop, interval, screenshot_bytes):
+    """Publica um passo do agente (logs + screenshot) a cada intervalo"""
+    steps = 0
+    while not stop.wait(interval):
+        steps += 1
+        session.log(f"Executando: click_at (passo {steps})")
+        session.store_screenshot(os.urandom(screenshot_bytes), f"https://example.com/{steps}")
+    return steps
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--viewers", type=int, default=100, help="Visualizadores simultâneos.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Duração em segundos.")
+    parser.add_argument("--server", choices=["waitress", "werkzeug"], default="waitress")
+    parser.add_argument("--threads", type=int, default=serve.DEFAULT_THREADS)
+    parser.add_argument("--step_interval", type=float, default=1.0, help="Segundos entre passos do agente simulado.")
+    parser.add_argument("--poll_interval", type=float, default=0.0, help="Pausa entre consultas de status (0 = contínuo).")
+    parser.add_argument("--screenshot_kb", type=int, default=300, help="Tamanho da screenshot simulada.")
+    parser.add_argument("--output", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    if args.server == "werkzeug":
+        serve.waitress = None
+    server, serve_forever = serve.create_server("127.0.0.1", 0, args.threads)
+    port = server.effective_port if serve.waitress else server.server_port
+    threading.Thread(target=serve_forever, daemon=True).start()
+
+    session = web_gui.sessions.create({"query": "teste de carga"})
+    base = f"/api/sessions/{session.id}"
+    stop = threading.Event()
+    viewers = [ViewerStats() for _ in range(args.viewers)]
+    threads = []
+    for stats in viewers:
+        threads.append(threading.Thread(target=stream_events, args=(port, base, stats, stop), daemon=True))
+        threads.append(threading.Thread(target=poll_status, args=(port, base, stats, stop, args.poll_interval), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    # Aguarda os streams conectarem antes de medir
+    deadline = time.monotonic() + 10
+    while session.events.client_count < args.viewers and time.monotonic() < deadline:
+        time.sleep(0.05)
+    connected = session.events.client_count
+
+    published = []
+    agent = threading.Thread(
+        target=lambda: published.append(
+            simulate_agent(session, stop, args.step_interval, args.screenshot_kb * 1024)
+        ),
+        daemon=True,
+    )
+    for stats in viewers:
+        stats.latencies.clear()
+    start = time.perf_counter()
+    agent.start()
+    stop.wait(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    session.set_status("Concluído", is_running=False)
+    session.events.close_all()
+    agent.join()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    latencies = [latency for stats in viewers for latency in stats.latencies]
+    steps = published[0] if published else 0
+    results = {
+        "server": args.server,
+        "threads": args.threads,
+        "viewers": args.viewers,
+        "sse_connected": connected,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+        },
+        "errors": sum(stats.errors for stats in viewers),
+        "agent_steps": steps,
+        # Screenshots baixadas / (passos x visualizadores)
+        "screenshot_delivery": round(
+            sum(stats.screenshots for stats in viewers) / max(1, steps * args.viewers), 3
+        ),
+        "stale_screenshots": sum(stats.stale_screenshots for stats in viewers),
+    }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0 if results["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
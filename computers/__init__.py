@@ -12,12 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from .computer import Computer, EnvState
+from .cancellation import AgentCancelled, CancellationToken
 from .browserbase.browserbase import BrowserbaseComputer
 from .playwright.playwright import PlaywrightComputer
 
 __all__ = [
     "Computer",
     "EnvState",
+    "AgentCancelled",
+    "CancellationToken",
     "BrowserbaseComputer",
     "PlaywrightComputer",
 ]
@@ -13,7 +13,9 @@
 # limitations under the License.
 import os
 import termcolor
+from typing import Optional
 from ..playwright.playwright import PlaywrightComputer
+from ..cancellation import CancellationToken
 import browserbase
 from playwright.sync_api import sync_playwright
 
@@ -23,8 +25,17 @@ class BrowserbaseComputer(PlaywrightComputer):
         self,
         screen_size: tuple[int, int],
         initial_url: str = "https://www.google.com",
+        resource_profile: str = "none",
+        blocked_domains: Optional[list[str]] = None,
+        cancellation_token: Optional[CancellationToken] = None,
     ):
-        super().__init__(screen_size, initial_url)
+        super().__init__(
+            screen_size,
+            initial_url,
+            resource_profile=resource_profile,
+            blocked_domains=blocked_domains,
+            cancellation_token=cancellation_token,
+        )
 
     def __enter__(self):
         print("Creating session...")
@@ -56,10 +67,10 @@ class BrowserbaseComputer(PlaywrightComputer):
             self._session.connect_url
         )
         self._context = self._browser.contexts[0]
+        self._configure_context()
         self._page = self._context.pages[0]
-        self._page.goto(self._initial_url)
-
-        self._context.on("page", self._handle_new_page)
+        self._page.on("close", self._handle_page_close)
+        self._goto(self._initial_url)
 
         termcolor.cprint(
             f"Session started at https://browserbase.com/sessions/{self._session.id}",
@@ -78,3 +89,4 @@ class BrowserbaseComputer(PlaywrightComputer):
             self._browser.close()
 
         self._playwright.stop()
+        self._log_release_latency()
@@ -0,0 +1,85 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Cancelamento cooperativo de uma execução do agente.
+
+O token é compartilhado entre o loop do agente, a chamada ao modelo e o
+navegador. Cada ponto de espera (sleeps, retries, esperas do Playwright)
+verifica o token em fatias curtas, então um cancelamento interrompe a execução
+em tempo limitado e o navegador é fechado logo em seguida.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class AgentCancelled(BaseException):
+    """Levantada em um ponto de espera após o cancelamento do token.
+
+    Assim como asyncio.CancelledError, deriva de BaseException para que os
+    tratadores genéricos `except Exception` (retries, logs de erro por ação)
+    não a engulam.
+    """
+
+
+class CancellationToken:
+    """Sinal de cancelamento compartilhado entre threads."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+        self._cancelled_at: Optional[float] = None
+        self.release_latency: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Cancelado"):
+        """Solicita o cancelamento (idempotente)."""
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._cancelled_at = time.monotonic()
+        self._event.set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise AgentCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda até o timeout ou o cancelamento.
+
+        Returns:
+            True se o token foi cancelado
+        """
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds: float):
+        """Substitui time.sleep: retorna após `seconds` ou levanta AgentCancelled."""
+        if self._event.wait(seconds):
+            raise AgentCancelled(self.reason)
+
+    def mark_released(self) -> Optional[float]:
+        """Registra que os recursos (navegador) foram liberados.
+
+        Returns:
+            Segundos entre o cancelamento e a liberação, ou None se não houve cancelamento
+        """
+        if self._cancelled_at is None:
+            return None
+        if self.release_latency is None:
+            self.release_latency = time.monotonic() - self._cancelled_at
+        return self.release_latency
@@ -20,9 +20,14 @@ from ..computer import (
     Computer,
     EnvState,
 )
+from ..cancellation import CancellationToken
 import playwright.sync_api
 from playwright.sync_api import sync_playwright
-from typing import Literal
+from typing import Literal, Optional
+from .resource_blocking import ResourceBlocker
+from .profiles import BrowserProfile
+from metrics import SCREENSHOT_CAPTURE_SECONDS, SETTLE_WAIT_SECONDS
+import tracing
 
 # Importar logger configurado
 try:
@@ -82,6 +87,23 @@ PLAYWRIGHT_KEY_MAP = {
 }
 
 
+CHROMIUM_ARGS = [
+    "--disable-extensions",
+    "--disable-file-system",
+    "--disable-plugins",
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    # No '--no-sandbox' arg means the sandbox is on.
+]
+
+# Playwright's default timeout for navigation and load states.
+DEFAULT_WAIT_TIMEOUT_MS = 30000
+# Waits are split into slices of this size so a cancellation is noticed quickly.
+CANCEL_CHECK_INTERVAL_MS = 250
+
+
 class PlaywrightComputer(Computer):
     """Connects to a local Playwright instance."""
 
@@ -91,26 +113,108 @@ class PlaywrightComputer(Computer):
         initial_url: str = "https://www.google.com",
         search_engine_url: str = "https://www.google.com",
         highlight_mouse: bool = False,
+        resource_profile: str = "none",
+        blocked_domains: Optional[list[str]] = None,
+        profile_name: Optional[str] = None,
+        profiles_dir: Optional[str] = None,
+        profile_max_mb: Optional[int] = None,
+        storage_state: Optional[dict] = None,
+        cancellation_token: Optional[CancellationToken] = None,
     ):
         logger.info(f"Inicializando PlaywrightComputer")
         logger.debug(f"Screen size: {screen_size}")
         logger.debug(f"URL inicial: {initial_url}")
         logger.debug(f"Highlight mouse: {highlight_mouse}")
+        logger.debug(f"Perfil de bloqueio de recursos: {resource_profile}")
         
         self._initial_url = initial_url
         self._screen_size = screen_size
         self._search_engine_url = search_engine_url
         self._highlight_mouse = highlight_mouse
+        # Páginas "opener" que ficaram em segundo plano enquanto um popup está ativo.
+        self._page_stack: list[playwright.sync_api.Page] = []
+        self._popup_count = 0
+        self._popup_handling_time = 0.0
+        self._resource_blocker = ResourceBlocker(resource_profile, blocked_domains)
+        # Perfil persistente opcional (user-data-dir + cache HTTP em disco).
+        self._profile = (
+            BrowserProfile(profile_name, profiles_dir, profile_max_mb)
+            if profile_name
+            else None
+        )
+        # storage_state autenticado a restaurar no contexto (cookies + localStorage).
+        self._storage_state = storage_state
+        # Checked at every wait so a cancelled run releases the browser promptly.
+        self._cancellation = cancellation_token or CancellationToken()
+        self._browser = None
+        self._context = None
 
     def _handle_new_page(self, new_page: playwright.sync_api.Page):
         """The Computer Use model only supports a single tab at the moment.
 
         Some websites, however, try to open links in a new tab.
-        For those situations, we intercept the page-opening behavior, and instead overwrite the current page.
+        For those situations, we adopt the new page as the active page instead of
+        re-loading its URL in the current one, so every page is only loaded once
+        and POST targets or one-shot popups keep working.
+
+        - Tabs opened without an opener (e.g. target=_blank links) replace the
+          current page, which is closed.
+        - Popups that keep a reference to their opener (e.g. OAuth windows) become
+          the active page while the opener stays alive in the background; when the
+          popup closes, the opener becomes active again.
+        """
+        if new_page is self._page:
+            return
+        start_time = time.time()
+        previous_page = self._page
+        opener = new_page.opener()
+
+        self._page = new_page
+        new_page.on("close", self._handle_page_close)
+        if opener is not None and not previous_page.is_closed():
+            logger.debug("Popup com opener detectado - mantendo página anterior em segundo plano")
+            self._page_stack.append(previous_page)
+        elif not previous_page.is_closed():
+            previous_page.close()
+        new_page.bring_to_front()
+
+        elapsed = time.time() - start_time
+        self._popup_count += 1
+        self._popup_handling_time += elapsed
+        logger.info("Nova aba adotada como página ativa em %.1fms: %s", elapsed * 1000, new_page.url)
+
+    def _handle_page_close(self, page: playwright.sync_api.Page):
+        """Restores the most recent opener when the active popup is closed.
+
+        If no opener is left open, any other open page of the context becomes
+        active, or a blank one is opened, so the next action never targets a
+        closed page.
         """
-        new_url = new_page.url
-        new_page.close()
-        self._page.goto(new_url)
+        if page is not self._page:
+            if page in self._page_stack:
+                self._page_stack.remove(page)
+            return
+        while self._page_stack:
+            previous_page = self._page_stack.pop()
+            if not previous_page.is_closed():
+                logger.info("Popup fechado - voltando para a página anterior: %s", previous_page.url)
+                self._activate_page(previous_page)
+                return
+        open_pages = [p for p in self._context.pages if p is not page and not p.is_closed()] if self._context else []
+        if open_pages:
+            logger.info("Popup fechado sem página anterior - usando outra aba aberta: %s", open_pages[-1].url)
+            self._activate_page(open_pages[-1])
+        elif self._context is not None:
+            logger.info("Popup fechado sem outras abas - abrindo página em branco")
+            blank_page = self._context.new_page()
+            if self._page is not blank_page:
+                # The context "page" event was not dispatched during new_page()
+                blank_page.on("close", self._handle_page_close)
+                self._activate_page(blank_page)
+
+    def _activate_page(self, page: playwright.sync_api.Page):
+        self._page = page
+        page.bring_to_front()
 
     def __enter__(self):
         logger.info("Criando sessão do Playwright...")
@@ -123,53 +227,138 @@ class PlaywrightComputer(Computer):
         headless = os.environ.get("PLAYWRIGHT_HEADLESS", "true").lower() in ("true", "1", "yes")
         logger.info(f"Lançando navegador Chromium (headless={headless})...")
         
-        self._browser = self._playwright.chromium.launch(
-            args=[
-                "--disable-extensions",
-                "--disable-file-system",
-                "--disable-plugins",
-                "--disable-dev-shm-usage",
-                "--disable-background-networking",
-                "--disable-default-apps",
-                "--disable-sync",
-                # No '--no-sandbox' arg means the sandbox is on.
-            ],
+        viewport = {
+            "width": self._screen_size[0],
+            "height": self._screen_size[1],
+        }
+        try:
+            if self._profile:
+                self._launch_persistent_context(headless, viewport)
+            else:
+                self._browser = self._playwright.chromium.launch(
+                    args=CHROMIUM_ARGS,
+                    headless=headless,
+                )
+                logger.info("Navegador Chromium lançado com sucesso")
+
+                logger.debug(f"Criando contexto do navegador com viewport: {self._screen_size}")
+                self._context = self._browser.new_context(
+                    viewport=viewport,
+                    storage_state=self._storage_state,
+                )
+            logger.debug("Contexto criado")
+            self._configure_context()
+
+            logger.debug("Criando nova página...")
+            # Contextos persistentes já abrem com uma página.
+            if self._context.pages:
+                self._page = self._context.pages[0]
+            else:
+                self._page = self._context.new_page()
+            self._page.on("close", self._handle_page_close)
+            logger.debug("Página criada")
+
+            logger.info(f"Navegando para URL inicial: {self._initial_url}")
+            self._goto(self._initial_url)
+            logger.info(f"Página carregada: {self._page.url}")
+
+            elapsed = time.time() - start_time
+            logger.info(f"Sessão do Playwright criada em {elapsed:.2f}s")
+
+            termcolor.cprint(
+                f"Started local playwright.",
+                color="green",
+                attrs=["bold"],
+            )
+        except BaseException:
+            # __exit__ would never run: release the profile lock, the context and the driver here
+            try:
+                self.__exit__(*sys.exc_info())
+            except Exception as e:
+                logger.error(f"Erro ao liberar o navegador após falha na inicialização: {e}")
+            raise
+        return self
+
+    def _launch_persistent_context(self, headless: bool, viewport: dict):
+        """Launches Chromium on the locked user-data-dir of the named profile."""
+        self._profile.acquire()
+        logger.info(f"Lançando Chromium com perfil persistente: {self._profile.path}")
+        self._context = self._playwright.chromium.launch_persistent_context(
+            str(self._profile.path),
+            args=CHROMIUM_ARGS + [f"--disk-cache-size={self._profile.disk_cache_size}"],
             headless=headless,
+            viewport=viewport,
         )
         logger.info("Navegador Chromium lançado com sucesso")
-        
-        logger.debug(f"Criando contexto do navegador com viewport: {self._screen_size}")
-        self._context = self._browser.new_context(
-            viewport={
-                "width": self._screen_size[0],
-                "height": self._screen_size[1],
-            }
-        )
-        logger.debug("Contexto criado")
-        
-        logger.debug("Criando nova página...")
-        self._page = self._context.new_page()
-        logger.debug("Página criada")
-        
-        logger.info(f"Navegando para URL inicial: {self._initial_url}")
-        self._page.goto(self._initial_url)
-        logger.info(f"Página carregada: {self._page.url}")
+        if self._storage_state:
+            # launch_persistent_context não aceita storage_state; restaurar apenas cookies.
+            self._context.add_cookies(self._storage_state.get("cookies", []))
+
+    def _wait_for_load_state(self, timeout_ms: float = DEFAULT_WAIT_TIMEOUT_MS):
+        """Waits for the 'load' state in short slices, checking for cancellation.
 
+        Behaves like `page.wait_for_load_state()` (same default timeout), but a
+        cancelled token raises AgentCancelled within one slice.
+        """
+        deadline = time.monotonic() + timeout_ms / 1000
+        with SETTLE_WAIT_SECONDS.time(), tracing.span("browser.wait_for_load_state"):
+            while True:
+                self._cancellation.raise_if_cancelled()
+                remaining_ms = (deadline - time.monotonic()) * 1000
+                try:
+                    self._page.wait_for_load_state(
+                        timeout=max(1, min(CANCEL_CHECK_INTERVAL_MS, remaining_ms))
+                    )
+                    return
+                except playwright.sync_api.TimeoutError:
+                    if remaining_ms <= CANCEL_CHECK_INTERVAL_MS:
+                        raise
+
+    def _goto(self, url: str):
+        """Navigates and waits for 'load' with cancellation checks.
+
+        `goto` itself only waits for the response to commit; the rest of the
+        page load goes through `_wait_for_load_state`.
+        """
+        self._cancellation.raise_if_cancelled()
+        with tracing.span("browser.goto", url=url):
+            self._page.goto(url, wait_until="commit")
+            self._wait_for_load_state()
+
+    def _sleep(self, seconds: float):
+        """Cancellable replacement for time.sleep."""
+        with tracing.span("browser.sleep", seconds=seconds):
+            self._cancellation.sleep(seconds)
+
+    def _configure_context(self):
+        """Installs the context-level handlers shared by every environment."""
         self._context.on("page", self._handle_new_page)
         logger.debug("Handler de novas páginas configurado")
+        if self._resource_blocker.enabled:
+            self._resource_blocker.install(self._context)
+            logger.info(f"Perfil de bloqueio de recursos ativo: {self._resource_blocker.profile.name}")
 
-        elapsed = time.time() - start_time
-        logger.info(f"Sessão do Playwright criada em {elapsed:.2f}s")
-        
-        termcolor.cprint(
-            f"Started local playwright.",
-            color="green",
-            attrs=["bold"],
-        )
-        return self
+    def storage_state(self) -> dict:
+        """Returns the cookies and local storage of the current context."""
+        return self._context.storage_state()
+
+    def resource_stats(self) -> dict:
+        """Returns the counters of requests blocked by the resource profile."""
+        return self._resource_blocker.stats.as_dict()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         logger.info("Encerrando sessão do Playwright...")
+        if self._popup_count:
+            logger.info(
+                f"Popups/novas abas tratados: {self._popup_count} "
+                f"(tempo total de tratamento: {self._popup_handling_time * 1000:.1f}ms)"
+            )
+        if self._resource_blocker.enabled:
+            stats = self._resource_blocker.stats
+            logger.info(
+                f"Requisições bloqueadas ({self._resource_blocker.profile.name}): "
+                f"{stats.blocked_requests} (~{stats.estimated_bytes_saved / 1024:.0f} KB economizados)"
+            )
         
         if exc_type:
             logger.warning(f"Exceção detectada no contexto: {exc_type.__name__}: {exc_val}")
@@ -180,9 +369,10 @@ class PlaywrightComputer(Computer):
             logger.debug("Contexto fechado")
             
         try:
-            logger.debug("Fechando navegador...")
-            self._browser.close()
-            logger.debug("Navegador fechado")
+            if self._browser:
+                logger.debug("Fechando navegador...")
+                self._browser.close()
+                logger.debug("Navegador fechado")
         except Exception as e:
             # Browser was already shut down because of SIGINT or such.
             if "Browser.close: Connection closed while reading from the driver" in str(e):
@@ -191,27 +381,37 @@ class PlaywrightComputer(Computer):
             else:
                 logger.error(f"Erro ao fechar navegador: {e}")
                 raise
+        finally:
+            if self._profile:
+                self._profile.release()
 
         logger.debug("Parando Playwright...")
         self._playwright.stop()
         logger.info("Sessão do Playwright encerrada")
+        self._log_release_latency()
+
+    def _log_release_latency(self):
+        """Logs how long it took to release the browser after a cancellation."""
+        latency = self._cancellation.mark_released()
+        if latency is not None:
+            logger.info("Navegador liberado %.2fs após o cancelamento", latency)
 
     def open_web_browser(self) -> EnvState:
         return self.current_state()
 
     def click_at(self, x: int, y: int):
-        logger.debug(f"Clique em coordenadas: ({x}, {y})")
+        logger.debug("Clique em coordenadas: (%s, %s)", x, y)
         self.highlight_mouse(x, y)
         self._page.mouse.click(x, y)
         logger.debug("Aguardando estado de carregamento...")
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         logger.debug("Estado de carregamento alcançado")
         return self.current_state()
 
     def hover_at(self, x: int, y: int):
         self.highlight_mouse(x, y)
         self._page.mouse.move(x, y)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         return self.current_state()
 
     def type_text_at(
@@ -224,7 +424,7 @@ class PlaywrightComputer(Computer):
     ) -> EnvState:
         self.highlight_mouse(x, y)
         self._page.mouse.click(x, y)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
 
         if clear_before_typing:
             if sys.platform == "darwin":
@@ -234,11 +434,11 @@ class PlaywrightComputer(Computer):
             self.key_combination(["Delete"])
 
         self._page.keyboard.type(text)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
 
         if press_enter:
             self.key_combination(["Enter"])
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         return self.current_state()
 
     def _horizontal_document_scroll(
@@ -253,7 +453,7 @@ class PlaywrightComputer(Computer):
         scroll_argument = f"{sign}{horizontal_scroll_amount}"
         # Scroll using JS.
         self._page.evaluate(f"window.scrollBy({scroll_argument}, 0); ")
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         return self.current_state()
 
     def scroll_document(
@@ -278,7 +478,7 @@ class PlaywrightComputer(Computer):
         self.highlight_mouse(x, y)
 
         self._page.mouse.move(x, y)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
 
         dx = 0
         dy = 0
@@ -294,41 +494,38 @@ class PlaywrightComputer(Computer):
             raise ValueError("Unsupported direction: ", direction)
 
         self._page.mouse.wheel(dx, dy)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         return self.current_state()
 
     def wait_5_seconds(self) -> EnvState:
-        time.sleep(5)
+        self._sleep(5)
         return self.current_state()
 
     def go_back(self) -> EnvState:
-        self._page.go_back()
-        self._page.wait_for_load_state()
+        self._page.go_back(wait_until="commit")
+        self._wait_for_load_state()
         return self.current_state()
 
     def go_forward(self) -> EnvState:
-        self._page.go_forward()
-        self._page.wait_for_load_state()
+        self._page.go_forward(wait_until="commit")
+        self._wait_for_load_state()
         return self.current_state()
 
     def search(self) -> EnvState:
         return self.navigate(self._search_engine_url)
 
     def navigate(self, url: str) -> EnvState:
-        logger.info(f"Navegando para URL: {url}")
+        logger.info("Navegando para URL: %s", url)
         normalized_url = url
         if not normalized_url.startswith(("http://", "https://")):
             normalized_url = "https://" + normalized_url
-            logger.debug(f"URL normalizada: {normalized_url}")
+            logger.debug("URL normalizada: %s", normalized_url)
         
         start_time = time.time()
-        self._page.goto(normalized_url)
+        self._goto(normalized_url)
         elapsed = time.time() - start_time
-        logger.info(f"Navegação concluída em {elapsed:.2f}s")
-        
-        logger.debug("Aguardando estado de carregamento...")
-        self._page.wait_for_load_state()
-        logger.debug(f"URL atual após navegação: {self._page.url}")
+        logger.info("Navegação concluída em %.2fs", elapsed)
+        logger.debug("URL atual após navegação: %s", self._page.url)
         return self.current_state()
 
     def key_combination(self, keys: list[str]) -> EnvState:
@@ -350,30 +547,33 @@ class PlaywrightComputer(Computer):
     ) -> EnvState:
         self.highlight_mouse(x, y)
         self._page.mouse.move(x, y)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         self._page.mouse.down()
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
 
         self.highlight_mouse(destination_x, destination_y)
         self._page.mouse.move(destination_x, destination_y)
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         self._page.mouse.up()
         return self.current_state()
 
     def current_state(self) -> EnvState:
         logger.debug("Obtendo estado atual da página...")
-        self._page.wait_for_load_state()
+        self._wait_for_load_state()
         # Even if Playwright reports the page as loaded, it may not be so.
         # Add a manual sleep to make sure the page has finished rendering.
-        time.sleep(0.5)
+        self._sleep(0.5)
         
         screenshot_start = time.time()
-        screenshot_bytes = self._page.screenshot(type="png", full_page=False)
+        with tracing.span("browser.screenshot") as span:
+            screenshot_bytes = self._page.screenshot(type="png", full_page=False)
+            span.set_attribute("bytes", len(screenshot_bytes))
         screenshot_time = time.time() - screenshot_start
+        SCREENSHOT_CAPTURE_SECONDS.observe(screenshot_time)
         
         current_url = self._page.url
-        logger.debug(f"Screenshot capturada em {screenshot_time:.2f}s ({len(screenshot_bytes)} bytes)")
-        logger.debug(f"URL atual: {current_url}")
+        logger.debug("Screenshot capturada em %.2fs (%s bytes)", screenshot_time, len(screenshot_bytes))
+        logger.debug("URL atual: %s", current_url)
         
         return EnvState(screenshot=screenshot_bytes, url=current_url)
 
@@ -414,4 +614,4 @@ class PlaywrightComputer(Computer):
     """
         )
         # Wait a bit for the user to see the cursor.
-        time.sleep(1)
+        self._sleep(1)
@@ -0,0 +1,196 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Perfis persistentes do navegador (user-data-dir + cache HTTP em disco).
+
+Cada perfil nomeado vive em `<profiles_dir>/<nome>` e é protegido por um lock
+de arquivo, para que execuções concorrentes não corrompam o mesmo perfil.
+Ao liberar o perfil, os diretórios de cache do Chromium são podados (arquivos
+mais antigos primeiro) até o perfil caber no limite de tamanho configurado.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILES_DIR = "browser_profiles"
+DEFAULT_PROFILE_MAX_MB = 500
+LOCK_FILE_NAME = ".profile.lock"
+
+# Subdiretórios do user-data-dir que contêm apenas cache e podem ser
+# descartados sem perder cookies, localStorage ou sessões.
+CHROMIUM_CACHE_DIRS = (
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/Service Worker/CacheStorage",
+    "Default/Service Worker/ScriptCache",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "ShaderCache",
+)
+
+# Sem ponto inicial: ".", ".." e nomes ocultos sairiam de profiles_dir ou o esconderiam
+_PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$")
+
+
+class ProfileLockedError(RuntimeError):
+    """O perfil já está em uso por outra execução."""
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class BrowserProfile:
+    """Diretório de perfil nomeado com lock exclusivo e limite de tamanho."""
+
+    def __init__(
+        self,
+        name: str,
+        profiles_dir: Optional[str] = None,
+        max_size_mb: Optional[int] = None,
+    ):
+        if not _PROFILE_NAME_RE.match(name):
+            raise ValueError(f"Nome de perfil inválido: {name!r}")
+        profiles_dir = profiles_dir or os.environ.get(
+            "PLAYWRIGHT_PROFILES_DIR", DEFAULT_PROFILES_DIR
+        )
+        if max_size_mb is None:
+            max_size_mb = int(
+                os.environ.get("PLAYWRIGHT_PROFILE_MAX_MB", DEFAULT_PROFILE_MAX_MB)
+            )
+        self.name = name
+        self.path = Path(profiles_dir) / name
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self._lock_file = None
+
+    @property
+    def disk_cache_size(self) -> int:
+        """Limite passado ao Chromium via --disk-cache-size (metade do limite total)."""
+        return self.max_size_bytes // 2
+
+    def acquire(self):
+        """Obtém o lock exclusivo do perfil (não bloqueante).
+
+        Raises:
+            ProfileLockedError: Se outra execução estiver usando o perfil
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path / LOCK_FILE_NAME, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise ProfileLockedError(
+                f"Perfil do navegador '{self.name}' já está em uso por outra execução"
+            )
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        logger.info(f"Perfil do navegador '{self.name}' bloqueado: {self.path}")
+
+    def release(self):
+        """Libera o lock e aplica o limite de tamanho do perfil."""
+        if self._lock_file is None:
+            return
+        try:
+            self.enforce_size_cap()
+        finally:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._lock_file.seek(0)
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self._lock_file.close()
+                self._lock_file = None
+            logger.debug(f"Perfil do navegador '{self.name}' liberado")
+
+    def size_bytes(self) -> int:
+        return _dir_size(self.path)
+
+    def enforce_size_cap(self) -> int:
+        """Remove arquivos de cache mais antigos até o perfil caber no limite.
+
+        Apenas diretórios de cache são podados; cookies e armazenamento local
+        são preservados mesmo que o perfil continue acima do limite.
+
+        Returns:
+            Número de bytes removidos
+        """
+        total = self.size_bytes()
+        if total <= self.max_size_bytes:
+            return 0
+
+        cache_files = []
+        for cache_dir in CHROMIUM_CACHE_DIRS:
+            for root, _, files in os.walk(self.path / cache_dir):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    try:
+                        st = os.lstat(file_path)
+                    except OSError:
+                        continue
+                    cache_files.append((st.st_mtime, st.st_size, file_path))
+        cache_files.sort()
+
+        evicted = 0
+        for _, size, file_path in cache_files:
+            if total - evicted <= self.max_size_bytes:
+                break
+            try:
+                os.remove(file_path)
+                evicted += size
+            except OSError:
+                pass
+
+        logger.info(
+            f"Perfil '{self.name}': {evicted / 1024 / 1024:.1f} MB de cache removidos "
+            f"(limite {self.max_size_bytes / 1024 / 1024:.0f} MB)"
+        )
+        if total - evicted > self.max_size_bytes:
+            logger.warning(
+                f"Perfil '{self.name}' continua acima do limite "
+                f"({(total - evicted) / 1024 / 1024:.1f} MB) sem dados de cache para remover"
+            )
+        return evicted
@@ -0,0 +1,207 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Perfis de bloqueio de recursos para o contexto do navegador.
+
+O agente só precisa dos pixels que importam para as decisões; vídeos, fontes,
+anúncios e beacons de analytics apenas atrasam o `wait_for_load_state`.
+Os perfis são instalados via `context.route` e contam quantas requisições
+foram bloqueadas e uma estimativa dos bytes economizados.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+import playwright.sync_api
+
+# Domínios de anúncios, rastreadores e analytics bloqueados pelo perfil
+# "no-third-party-trackers". Subdomínios também são bloqueados.
+TRACKER_DOMAINS = frozenset({
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "analytics.twitter.com",
+    "ads-twitter.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "newrelic.com",
+    "nr-data.net",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+    "bat.bing.com",
+    "clarity.ms",
+})
+
+# Tamanho médio estimado (em bytes) por tipo de recurso. Requisições bloqueadas
+# nunca são baixadas, então a economia é uma estimativa.
+ESTIMATED_RESOURCE_BYTES = {
+    "media": 500_000,
+    "font": 40_000,
+    "image": 30_000,
+    "script": 25_000,
+    "stylesheet": 15_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+    # navigator.sendBeacon e <a ping> chegam como "ping"
+    "ping": 500,
+    "other": 2_000,
+}
+
+
+@dataclass(frozen=True)
+class ResourceProfile:
+    """Perfil nomeado de bloqueio de recursos."""
+
+    name: str
+    blocked_resource_types: frozenset = frozenset()
+    blocked_domains: frozenset = frozenset()
+    description: str = ""
+
+    @property
+    def blocks_anything(self) -> bool:
+        return bool(self.blocked_resource_types or self.blocked_domains)
+
+
+RESOURCE_PROFILES = {
+    "none": ResourceProfile(
+        name="none",
+        description="Não bloqueia nenhuma requisição",
+    ),
+    "no-media": ResourceProfile(
+        name="no-media",
+        blocked_resource_types=frozenset({"media", "font"}),
+        description="Bloqueia vídeo, áudio e fontes web",
+    ),
+    "no-third-party-trackers": ResourceProfile(
+        name="no-third-party-trackers",
+        blocked_resource_types=frozenset({"ping"}),
+        blocked_domains=TRACKER_DOMAINS,
+        description="Bloqueia anúncios, rastreadores e beacons de analytics",
+    ),
+    "lean": ResourceProfile(
+        name="lean",
+        blocked_resource_types=frozenset({"media", "font", "ping"}),
+        blocked_domains=TRACKER_DOMAINS,
+        description="Combina no-media e no-third-party-trackers",
+    ),
+}
+
+
+def _domain_matches(host: str, domains: frozenset) -> bool:
+    """Verifica se o host (ou qualquer domínio pai) está na lista."""
+    host = host.lower().rstrip(".")
+    if host in domains:
+        return True
+    parts = host.split(".")
+    for i in range(1, len(parts) - 1):
+        if ".".join(parts[i:]) in domains:
+            return True
+    return False
+
+
+@dataclass
+class ResourceBlockingStats:
+    """Contadores de requisições bloqueadas."""
+
+    blocked_requests: int = 0
+    estimated_bytes_saved: int = 0
+    blocked_by_type: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "blocked_requests": self.blocked_requests,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
+
+
+class ResourceBlocker:
+    """Handler de `context.route` que aplica um perfil de bloqueio."""
+
+    def __init__(
+        self,
+        profile: str = "none",
+        extra_blocked_domains: Optional[Iterable[str]] = None,
+    ):
+        if profile not in RESOURCE_PROFILES:
+            raise ValueError(
+                f"Perfil de bloqueio desconhecido: {profile}. "
+                f"Opções: {', '.join(RESOURCE_PROFILES)}"
+            )
+        base = RESOURCE_PROFILES[profile]
+        extra = frozenset(
+            d.strip().lower() for d in (extra_blocked_domains or []) if d.strip()
+        )
+        self.profile = ResourceProfile(
+            name=base.name if not extra else f"{base.name}+custom",
+            blocked_resource_types=base.blocked_resource_types,
+            blocked_domains=base.blocked_domains | extra,
+            description=base.description,
+        )
+        self.stats = ResourceBlockingStats()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.profile.blocks_anything
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if resource_type in self.profile.blocked_resource_types:
+            return True
+        if not self.profile.blocked_domains:
+            return False
+        host = urlsplit(url).hostname or ""
+        return _domain_matches(host, self.profile.blocked_domains)
+
+    def install(self, context: playwright.sync_api.BrowserContext):
+        """Instala o handler no contexto, se o perfil bloquear algo.
+
+        Com o perfil "none" nenhuma rota é registrada, evitando o custo de
+        interceptar todas as requisições.
+        """
+        if self.enabled:
+            context.route("**/*", self._handle_route)
+
+    def _handle_route(self, route: playwright.sync_api.Route):
+        request = route.request
+        resource_type = request.resource_type
+        if self.should_block(request.url, resource_type):
+            with self._lock:
+                self.stats.blocked_requests += 1
+                self.stats.estimated_bytes_saved += ESTIMATED_RESOURCE_BYTES.get(
+                    resource_type, ESTIMATED_RESOURCE_BYTES["other"]
+                )
+                self.stats.blocked_by_type[resource_type] = (
+                    self.stats.blocked_by_type.get(resource_type, 0) + 1
+                )
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Canal de eventos Server-Sent Events (SSE) para a interface web
+
+Cada visualizador conectado recebe sua própria fila limitada. O publicador
+nunca bloqueia: se um cliente lento enche a fila, os eventos pendentes dele
+são descartados e um evento `resync` pede que ele recarregue o estado completo.
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Iterator, Optional
+
+DEFAULT_CLIENT_QUEUE_SIZE = 256
+DEFAULT_HEARTBEAT_INTERVAL = 15.0
+DEFAULT_MAX_CLIENTS = 200
+
+
+class TooManyClientsError(RuntimeError):
+    """Número máximo de clientes SSE atingido"""
+
+
+class Subscription:
+    """Fila de eventos de um cliente conectado"""
+
+    def __init__(self, maxsize: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, message: str):
+        """Enfileira sem bloquear; em caso de fila cheia, pede resync"""
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Cliente lento: descartar o backlog e pedir que recarregue o estado
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            try:
+                self.queue.put_nowait(format_sse("resync", {"dropped": self.dropped}))
+            except queue.Full:
+                pass
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Formata uma mensagem no formato text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBroker:
+    """Distribui eventos para vários clientes SSE"""
+
+    def __init__(
+        self,
+        client_queue_size: int = DEFAULT_CLIENT_QUEUE_SIZE,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        max_clients: int = DEFAULT_MAX_CLIENTS,
+    ):
+        self.client_queue_size = client_queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.max_clients = max_clients
+        self._subscriptions: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        """
+        Registra um novo cliente
+
+        Raises:
+            TooManyClientsError: Se o limite de clientes foi atingido
+        """
+        subscription = Subscription(self.client_queue_size)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_clients:
+                raise TooManyClientsError(
+                    f"Limite de {self.max_clients} clientes SSE atingido"
+                )
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def queued_bytes(self) -> int:
+        """Tamanho das mensagens ainda não entregues, somado entre os clientes"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        total = 0
+        for subscription in subscriptions:
+            with subscription.queue.mutex:
+                total += sum(len(message) for message in subscription.queue.queue)
+        return total
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.closed = True
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: str, data: dict, event_id: Optional[int] = None):
+        """Publica um evento para todos os clientes (nunca bloqueia)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+        message = format_sse(event, data, event_id)
+        for subscription in subscriptions:
+            subscription.offer(message)
+
+    def close_all(self):
+        """Encerra todos os streams (ex: no desligamento do servidor)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.closed = True
+            subscription.offer("")
+
+    def stream(self, subscription: Subscription, initial: Iterator[str] = ()) -> Iterator[str]:
+        """
+        Gera as mensagens SSE de um cliente, com heartbeat periódico
+
+        Args:
+            subscription: Assinatura retornada por subscribe()
+            initial: Mensagens já formatadas enviadas antes dos eventos (snapshot)
+        """
+        try:
+            # Reconexão automática do EventSource após 3s
+            yield "retry: 3000\n\n"
+            for message in initial:
+                yield message
+            last_sent = time.monotonic()
+            while not subscription.closed:
+                try:
+                    message = subscription.queue.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    message = None
+                if subscription.closed:
+                    break
+                if message:
+                    yield message
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= self.heartbeat_interval:
+                    yield ": heartbeat\n\n"
+                    last_sent = time.monotonic()
+        finally:
+            self.unsubscribe(subscription)
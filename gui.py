@@ -19,8 +19,7 @@ import threading
 import queue
 import os
 import sys
-from io import BytesIO
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import time
 import platform
 
@@ -36,9 +35,13 @@ if platform.system() == "Darwin":
         sys.exit(1)
 
 from agent import BrowserAgent
-from computers import BrowserbaseComputer, PlaywrightComputer, EnvState
+from computers import BrowserbaseComputer, PlaywrightComputer, EnvState, AgentCancelled, CancellationToken
+from gui_frames import FrameDecoder
 
 PLAYWRIGHT_SCREEN_SIZE = (1440, 900)
+# Área de exibição da screenshot e intervalo de atualização da tela
+SCREENSHOT_DISPLAY_SIZE = (600, 400)
+SCREENSHOT_POLL_MS = 50
 
 
 class BrowserAgentGUI:
@@ -63,8 +66,10 @@ class BrowserAgentGUI:
         # Variáveis de controle
         self.is_running = False
         self.agent_thread = None
+        self.cancellation = CancellationToken()
         self.log_queue = queue.Queue()
-        self.screenshot_queue = queue.Queue()
+        # Decodificação/redimensionamento fora da thread do Tk, só o frame mais recente
+        self.frames = FrameDecoder(max_size=SCREENSHOT_DISPLAY_SIZE)
         
         # Variáveis de configuração
         self.env_var = tk.StringVar(value="playwright")
@@ -75,7 +80,7 @@ class BrowserAgentGUI:
         
         self.setup_ui()
         self.check_log_queue()
-        self.check_screenshot_queue()
+        self.check_screenshot_frames()
         
     def setup_ui(self):
         # Frame principal
@@ -217,8 +222,8 @@ class BrowserAgentGUI:
         self.log_queue.put(log_entry)
         
     def update_screenshot(self, screenshot_bytes):
-        """Atualiza a screenshot na interface"""
-        self.screenshot_queue.put(screenshot_bytes)
+        """Atualiza a screenshot na interface (decodificada e reduzida fora da thread do Tk)"""
+        self.frames.submit(screenshot_bytes)
         
     def check_log_queue(self):
         """Verifica e processa mensagens da fila de logs"""
@@ -234,28 +239,22 @@ class BrowserAgentGUI:
         finally:
             self.root.after(100, self.check_log_queue)
             
-    def check_screenshot_queue(self):
-        """Verifica e processa screenshots da fila"""
+    def check_screenshot_frames(self):
+        """Exibe o frame mais recente já decodificado (consulta barata - só troca a imagem)"""
         try:
-            while True:
-                screenshot_bytes = self.screenshot_queue.get_nowait()
-                self.display_screenshot(screenshot_bytes)
-        except queue.Empty:
-            pass
+            frame = self.frames.poll()
+            if frame is not None:
+                self.display_screenshot(frame)
         finally:
-            self.root.after(500, self.check_screenshot_queue)
+            self.root.after(SCREENSHOT_POLL_MS, self.check_screenshot_frames)
             
-    def display_screenshot(self, screenshot_bytes):
+    def display_screenshot(self, frame):
         """Exibe a screenshot na interface"""
         try:
-            image = Image.open(BytesIO(screenshot_bytes))
-            # Redimensionar para caber no frame (max 600x400)
-            max_width, max_height = 600, 400
-            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-            
-            photo = ImageTk.PhotoImage(image)
+            photo = ImageTk.PhotoImage(frame.image)
             self.screenshot_label.config(image=photo, text="")
             self.screenshot_label.image = photo  # Manter referência
+            self.frames.mark_displayed(frame)
         except Exception as e:
             self.log(f"Erro ao exibir screenshot: {e}", "ERROR")
             
@@ -278,6 +277,7 @@ class BrowserAgentGUI:
             return
             
         self.is_running = True
+        self.cancellation = CancellationToken()
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.status_var.set("Executando...")
@@ -299,10 +299,9 @@ class BrowserAgentGUI:
         if not self.is_running:
             return
             
-        self.is_running = False
+        self.cancellation.cancel("Parado pelo usuário")
         self.status_var.set("Parando...")
         self.log("Solicitação de parada recebida")
-        # Nota: A parada real depende da implementação do agente
         
     def run_agent(self):
         """Executa o agente (chamado em thread separada)"""
@@ -319,11 +318,13 @@ class BrowserAgentGUI:
                     screen_size=PLAYWRIGHT_SCREEN_SIZE,
                     initial_url=initial_url,
                     highlight_mouse=highlight_mouse,
+                    cancellation_token=self.cancellation,
                 )
             elif env_name == "browserbase":
                 env = BrowserbaseComputer(
                     screen_size=PLAYWRIGHT_SCREEN_SIZE,
-                    initial_url=initial_url
+                    initial_url=initial_url,
+                    cancellation_token=self.cancellation,
                 )
             else:
                 raise ValueError(f"Ambiente desconhecido: {env_name}")
@@ -334,13 +335,20 @@ class BrowserAgentGUI:
                     browser_computer=browser_computer,
                     query=query,
                     model_name=model_name,
-                    gui=self
+                    gui=self,
+                    cancellation_token=self.cancellation,
                 )
                 agent.agent_loop()
                 
-            self.log("Agente concluído com sucesso!")
-            self.status_var.set("Concluído")
+            if self.cancellation.cancelled:
+                self.log_cancelled()
+            else:
+                self.log("Agente concluído com sucesso!")
+                self.status_var.set("Concluído")
+            self.log_frame_stats()
             
+        except AgentCancelled:
+            self.log_cancelled()
         except Exception as e:
             error_msg = f"Erro ao executar agente: {str(e)}"
             self.log(error_msg, "ERROR")
@@ -352,6 +360,25 @@ class BrowserAgentGUI:
             self.is_running = False
             self.root.after(0, self.reset_ui)
             
+    def log_frame_stats(self):
+        """Latência das screenshots (captura -> exibição) e frames descartados"""
+        stats = self.frames.stats()
+        latency = stats['latency_ms']
+        if stats['displayed']:
+            self.log(
+                f"Screenshots: {stats['displayed']} exibidas, {stats['dropped']} descartadas - "
+                f"latência p50 {latency['p50']}ms, p95 {latency['p95']}ms, "
+                f"decodificação média {stats['decode_ms_avg']}ms"
+            )
+
+    def log_cancelled(self):
+        latency = self.cancellation.release_latency
+        if latency is not None:
+            self.log(f"Agente cancelado - navegador liberado em {latency:.2f}s", "WARNING")
+        else:
+            self.log("Agente cancelado", "WARNING")
+        self.status_var.set("Cancelado")
+
     def reset_ui(self):
         """Reseta a UI após o agente terminar"""
         self.start_button.config(state=tk.NORMAL)
@@ -363,9 +390,18 @@ class BrowserAgentGUI:
 class BrowserAgentGUIWrapper(BrowserAgent):
     """Wrapper do BrowserAgent para capturar logs e screenshots para a GUI"""
     
-    def __init__(self, browser_computer, query, model_name, gui, verbose=False):
-        super().__init__(browser_computer, query, model_name, verbose=verbose)
+    def __init__(self, browser_computer, query, model_name, gui, verbose=False, cancellation_token=None):
+        super().__init__(
+            browser_computer,
+            query,
+            model_name,
+            verbose=verbose,
+            cancellation_token=cancellation_token,
+        )
         self.gui = gui
+        if self.memory_monitor:
+            self.memory_monitor.add_source("viewer_queues", gui.frames.pending_bytes)
+            self.memory_monitor.add_source("logs", lambda: sum(len(entry) for entry in list(gui.log_queue.queue)))
         
     def handle_action(self, action):
         """Override para capturar screenshots"""
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pipeline de screenshots da GUI Tk
+
+A decodificação do PNG e o redimensionamento acontecem em uma thread de
+trabalho; a thread do Tk só converte a imagem já reduzida em PhotoImage.
+Entrada e saída usam um slot "o mais recente vence": em rajadas de ações,
+frames intermediários são descartados em vez de enfileirados, então a tela
+mostra sempre o estado atual sem travar a interface.
+
+A latência de cada frame (captura -> exibição) é registrada para medir a
+responsividade da interface.
+"""
+
+import collections
+import threading
+import time
+from io import BytesIO
+from typing import Any, Deque, Dict, Generic, NamedTuple, Optional, Tuple, TypeVar
+
+from PIL import Image
+
+T = TypeVar("T")
+
+DEFAULT_MAX_SIZE = (600, 400)
+LATENCY_SAMPLES = 500
+
+
+class LatestFrameSlot(Generic[T]):
+    """Slot de um único item: put substitui o item ainda não consumido"""
+
+    def __init__(self):
+        self._item: Optional[T] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.dropped = 0
+
+    def put(self, item: T):
+        with self._lock:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._ready.set()
+
+    def peek(self) -> Optional[T]:
+        with self._lock:
+            return self._item
+
+    def take(self) -> Optional[T]:
+        """Retira o item mais recente (None se vazio) sem bloquear"""
+        with self._lock:
+            item, self._item = self._item, None
+            self._ready.clear()
+            return item
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+
+class DecodedFrame(NamedTuple):
+    image: Image.Image
+    captured_at: float
+    decode_seconds: float
+
+
+def resize_for_display(image: Image.Image, max_size: Tuple[int, int]) -> Image.Image:
+    """
+    Reduz a imagem para caber em max_size com o filtro adequado à escala
+
+    Reduções grandes (>= 2x, o caso das screenshots 1440x900 na área de
+    600x400) fazem primeiro uma redução inteira (reduce) e depois BILINEAR na
+    imagem já pequena - visualmente equivalente ao LANCZOS nesse tamanho e
+    bem mais rápido. Reduções pequenas usam BICUBIC; imagens que já cabem
+    não são alteradas.
+    """
+    scale = min(max_size[0] / image.width, max_size[1] / image.height)
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    if scale <= 0.5:
+        return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    return image.resize(size, Image.Resampling.BICUBIC)
+
+
+class FrameDecoder:
+    """Decodifica e reduz screenshots em uma thread de trabalho"""
+
+    def __init__(self, max_size: Tuple[int, int] = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._incoming: LatestFrameSlot[Tuple[bytes, float]] = LatestFrameSlot()
+        self._decoded: LatestFrameSlot[DecodedFrame] = LatestFrameSlot()
+        self._latencies: Deque[float] = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._decode_times: Deque[float] = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.frames_received = 0
+        self.frames_displayed = 0
+        self.decode_errors = 0
+        self._thread = threading.Thread(target=self._run, name="gui-frame-decoder", daemon=True)
+        self._thread.start()
+
+    def submit(self, png: bytes):
+        """Chamado pela thread do agente - nunca bloqueia"""
+        self.frames_received += 1
+        self._incoming.put((png, time.perf_counter()))
+
+    def pending_bytes(self) -> int:
+        """Frames aguardando decodificação ou exibição (PNG + RGB decodificado)"""
+        incoming = self._incoming.peek()
+        decoded = self._decoded.peek()
+        return (len(incoming[0]) if incoming else 0) + (
+            decoded.image.width * decoded.image.height * 3 if decoded else 0
+        )
+
+    def poll(self) -> Optional[DecodedFrame]:
+        """Chamado pela thread do Tk: frame mais recente pronto para exibir, se houver"""
+        return self._decoded.take()
+
+    def mark_displayed(self, frame: DecodedFrame):
+        self.frames_displayed += 1
+        self._latencies.append(time.perf_counter() - frame.captured_at)
+
+    def _run(self):
+        while True:
+            self._incoming.wait()
+            item = self._incoming.take()
+            if item is None:
+                continue
+            png, captured_at = item
+            start = time.perf_counter()
+            try:
+                with Image.open(BytesIO(png)) as image:
+                    image.load()
+                    frame = resize_for_display(image.convert("RGB"), self.max_size)
+            except Exception:
+                self.decode_errors += 1
+                continue
+            decode_seconds = time.perf_counter() - start
+            self._decode_times.append(decode_seconds)
+            self._decoded.put(DecodedFrame(frame, captured_at, decode_seconds))
+
+    def stats(self) -> Dict[str, Any]:
+        """Latência captura -> exibição e frames descartados"""
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 1)
+
+        decode_times = list(self._decode_times)
+        return {
+            'received': self.frames_received,
+            'displayed': self.frames_displayed,
+            'dropped': self._incoming.dropped + self._decoded.dropped,
+            'decode_errors': self.decode_errors,
+            'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95), 'max': percentile(1.0)},
+            'decode_ms_avg': round(sum(decode_times) / len(decode_times) * 1000, 1) if decode_times else None,
+        }
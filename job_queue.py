@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fila de execuções do agente com pool de workers limitado
+
+Cada execução é um Job na fila (persistida em SQLite). Um número fixo de
+workers, dimensionado pela CPU e memória disponíveis, retira jobs da fila:
+primeiro a maior prioridade e, dentro dela, um rodízio entre usuários para
+que um usuário com muitos jobs não bloqueie os demais. Submissões acima da
+capacidade da fila são rejeitadas.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_WORKER_MEMORY_MB = 700
+DEFAULT_MAX_QUEUED = 20
+DEFAULT_DB_PATH = ".job_queue.sqlite3"
+MAX_PRIORITY = 9
+WAIT_SAMPLES = 500
+
+
+class QueueFullError(RuntimeError):
+    """A fila atingiu o número máximo de jobs aguardando"""
+
+
+class SchedulerClosedError(RuntimeError):
+    """O agendador está desligando e não aceita novos jobs"""
+
+
+@dataclass
+class Job:
+    """Execução do agente aguardando ou em andamento"""
+
+    id: str
+    config: Dict
+    user: str = "anonymous"
+    priority: int = 0
+    seq: int = 0
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        """Segundos entre a submissão e o início da execução"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+
+def _available_memory_bytes() -> Optional[int]:
+    """Memória disponível para o processo (limite do cgroup, se menor)"""
+    available = None
+    try:
+        available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        pass
+    # Em containers o limite do cgroup costuma ser menor que a memória do host
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            limit = int(value)
+            available = limit if available is None else min(available, limit)
+        break
+    return available
+
+
+def default_worker_count(worker_memory_mb: Optional[int] = None) -> int:
+    """
+    Número de workers adequado à máquina
+
+    Cada worker executa um navegador Chromium, então o limite é o menor entre
+    o número de CPUs e quantos navegadores cabem na memória disponível.
+
+    Args:
+        worker_memory_mb: Memória estimada por worker (padrão: WEB_WORKER_MEMORY_MB ou 700)
+    """
+    override = os.environ.get('WEB_WORKERS')
+    if override:
+        return max(1, int(override))
+    if worker_memory_mb is None:
+        worker_memory_mb = int(os.environ.get('WEB_WORKER_MEMORY_MB', DEFAULT_WORKER_MEMORY_MB))
+    workers = os.cpu_count() or 1
+    memory = _available_memory_bytes()
+    if memory:
+        workers = min(workers, memory // (worker_memory_mb * 1024 * 1024))
+    return max(1, workers)
+
+
+class JobStore:
+    """Persistência da fila em SQLite (jobs aguardando e em execução)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, user TEXT, priority INTEGER, seq INTEGER,"
+            " config TEXT, submitted_at REAL, state TEXT)"
+        )
+        self._conn.commit()
+
+    def add(self, job: Job):
+        self._conn.execute(
+            "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, 'queued')",
+            (job.id, job.user, job.priority, job.seq, json.dumps(job.config), job.submitted_at),
+        )
+        self._conn.commit()
+
+    def mark_running(self, job_id: str):
+        self._conn.execute("UPDATE jobs SET state = 'running' WHERE id = ?", (job_id,))
+        self._conn.commit()
+
+    def remove(self, job_id: str):
+        self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._conn.commit()
+
+    def recover(self) -> List[Job]:
+        """
+        Carrega os jobs que aguardavam na fila quando o processo terminou
+
+        Jobs que estavam em execução não são repetidos (o agente pode ter
+        tido efeitos parciais) - apenas registrados e descartados.
+        """
+        interrupted = self._conn.execute(
+            "SELECT id FROM jobs WHERE state = 'running'"
+        ).fetchall()
+        for (job_id,) in interrupted:
+            logger.warning(f"Job {job_id} foi interrompido durante a execução e não será repetido")
+        self._conn.execute("DELETE FROM jobs WHERE state = 'running'")
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT id, user, priority, seq, config, submitted_at FROM jobs"
+            " WHERE state = 'queued' ORDER BY seq"
+        ).fetchall()
+        return [
+            Job(id=row[0], user=row[1], priority=row[2], seq=row[3],
+                config=json.loads(row[4]), submitted_at=row[5])
+            for row in rows
+        ]
+
+    def close(self):
+        self._conn.close()
+
+
+class JobScheduler:
+    """Fila com prioridade e rodízio por usuário, executada por um pool de workers"""
+
+    def __init__(
+        self,
+        runner: Callable[[Job], None],
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        db_path: Optional[str] = None,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Inicializa o agendador (os workers só iniciam em start())
+
+        Args:
+            runner: Função que executa um job (chamada em uma thread worker)
+            workers: Tamanho do pool (padrão: default_worker_count())
+            max_queued: Jobs aguardando antes de rejeitar (padrão: WEB_MAX_QUEUED ou 20)
+            db_path: Arquivo SQLite da fila (padrão: JOB_QUEUE_DB ou .job_queue.sqlite3;
+                ':memory:' desativa a persistência)
+            on_change: Chamado sempre que a fila muda (posições devem ser atualizadas)
+        """
+        self.runner = runner
+        self.workers = workers or default_worker_count()
+        self.max_queued = max_queued or int(os.environ.get('WEB_MAX_QUEUED', DEFAULT_MAX_QUEUED))
+        self.db_path = db_path or os.environ.get('JOB_QUEUE_DB', DEFAULT_DB_PATH)
+        self.on_change = on_change
+        self._queued: List[Job] = []
+        self._running: Dict[str, Job] = {}
+        # Último instante em que cada usuário foi atendido (rodízio)
+        self._last_served: Dict[str, float] = {}
+        self._next_seq = 1
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._store: Optional[JobStore] = None
+        self._stopping = False
+        self._started_at: Optional[float] = None
+        self._busy_seconds = 0.0
+        self._completed = 0
+        self._failed = 0
+        self._waits: deque = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def started(self) -> bool:
+        return self._started_at is not None
+
+    def start(self, on_recovered: Optional[Callable[[Job], None]] = None) -> List[Job]:
+        """
+        Abre a fila persistida e inicia os workers
+
+        Args:
+            on_recovered: Chamado para cada job recuperado antes de os workers
+                iniciarem; se levantar exceção, o job é descartado
+
+        Returns:
+            Jobs recuperados da execução anterior (já enfileirados)
+        """
+        with self._cond:
+            if self.started:
+                return []
+            self._store = JobStore(self.db_path)
+            recovered = []
+            for job in self._store.recover():
+                self._next_seq = max(self._next_seq, job.seq + 1)
+                if on_recovered is not None:
+                    try:
+                        on_recovered(job)
+                    except Exception as e:
+                        logger.warning(f"Job recuperado {job.id} descartado: {e}")
+                        self._store.remove(job.id)
+                        continue
+                self._queued.append(job)
+                recovered.append(job)
+            self._started_at = time.time()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"agent-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        if recovered:
+            logger.info(f"{len(recovered)} jobs recuperados da fila persistida")
+        logger.info(f"Pool de execução iniciado com {self.workers} workers (fila máx: {self.max_queued})")
+        self._notify_change()
+        return recovered
+
+    def submit(self, job_id: str, config: Dict, user: str = "anonymous", priority: int = 0) -> Job:
+        """
+        Enfileira um job
+
+        Raises:
+            QueueFullError: Se a fila já tem max_queued jobs aguardando
+            SchedulerClosedError: Se o agendador está desligando
+        """
+        priority = max(0, min(MAX_PRIORITY, int(priority)))
+        with self._cond:
+            if self._stopping:
+                raise SchedulerClosedError("Servidor em desligamento - novas execuções não são aceitas")
+            if len(self._queued) >= self.max_queued:
+                raise QueueFullError(
+                    f"Fila cheia: {len(self._queued)} execuções aguardando "
+                    f"({self.workers} workers ocupados)"
+                )
+            job = Job(id=job_id, config=config, user=user, priority=priority, seq=self._next_seq)
+            self._next_seq += 1
+            if self._store is not None:
+                self._store.add(job)
+            self._queued.append(job)
+            self._cond.notify()
+        self._notify_change()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove um job que ainda aguarda na fila"""
+        with self._cond:
+            job = next((j for j in self._queued if j.id == job_id), None)
+            if job is None:
+                return False
+            self._queued.remove(job)
+            if self._store is not None:
+                self._store.remove(job_id)
+        self._notify_change()
+        return True
+
+    def positions(self) -> Dict[str, int]:
+        """Posição (1 = próximo) de cada job aguardando, na ordem em que serão executados"""
+        with self._cond:
+            pending = list(self._queued)
+            last_served = dict(self._last_served)
+        # Simula os próximos despachos: cada job escolhido marca seu usuário
+        # como o atendido mais recentemente
+        clock = max(last_served.values(), default=0.0)
+        order = {}
+        while pending:
+            job = self._select(pending, last_served)
+            pending.remove(job)
+            clock += 1
+            last_served[job.user] = clock
+            order[job.id] = len(order) + 1
+        return order
+
+    def position(self, job_id: str) -> Optional[int]:
+        return self.positions().get(job_id)
+
+    @staticmethod
+    def _select(pending: List[Job], last_served: Dict[str, float]) -> Job:
+        """Maior prioridade; entre iguais, o usuário atendido há mais tempo; depois FIFO"""
+        return min(
+            pending,
+            key=lambda j: (-j.priority, last_served.get(j.user, 0.0), j.seq),
+        )
+
+    def stats(self) -> Dict:
+        """Métricas da fila: espera, ocupação dos workers e contadores"""
+        with self._cond:
+            now = time.time()
+            busy = self._busy_seconds + sum(
+                now - j.started_at for j in self._running.values()
+            )
+            elapsed = (now - self._started_at) if self._started_at else 0.0
+            waits = sorted(self._waits)
+            return {
+                'workers': self.workers,
+                'busy_workers': len(self._running),
+                'queued': len(self._queued),
+                'max_queued': self.max_queued,
+                'completed': self._completed,
+                'failed': self._failed,
+                'utilization': busy / (self.workers * elapsed) if elapsed > 0 else 0.0,
+                'queue_wait_seconds': {
+                    'avg': sum(waits) / len(waits) if waits else 0.0,
+                    'p50': waits[len(waits) // 2] if waits else 0.0,
+                    'p95': waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                    'max': waits[-1] if waits else 0.0,
+                },
+            }
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        Para de aceitar jobs e aguarda os workers terminarem os jobs em execução
+
+        Jobs ainda na fila permanecem persistidos para a próxima inicialização.
+
+        Returns:
+            True se todos os workers terminaram dentro do timeout
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        drained = not any(t.is_alive() for t in self._threads)
+        if drained:
+            with self._cond:
+                if self._store is not None:
+                    self._store.close()
+                    self._store = None
+        return drained
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queued and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job = self._select(self._queued, self._last_served)
+                self._queued.remove(job)
+                job.started_at = time.time()
+                self._last_served[job.user] = job.started_at
+                self._running[job.id] = job
+                self._waits.append(job.queue_wait)
+                if self._store is not None:
+                    self._store.mark_running(job.id)
+            logger.info(
+                f"Job {job.id} iniciado (usuário {job.user}, prioridade {job.priority}, "
+                f"espera {job.queue_wait:.1f}s)"
+            )
+            self._notify_change()
+
+            failed = False
+            try:
+                self.runner(job)
+            except Exception:
+                failed = True
+                logger.error(f"Erro não tratado no job {job.id}", exc_info=True)
+            finally:
+                job.finished_at = time.time()
+                with self._cond:
+                    self._running.pop(job.id, None)
+                    self._busy_seconds += job.finished_at - job.started_at
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    if self._store is not None:
+                        self._store.remove(job.id)
+                self._notify_change()
+
+    def _notify_change(self):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change()
+        except Exception:
+            logger.error("Erro ao notificar mudança na fila", exc_info=True)
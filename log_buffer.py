@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Buffer circular de logs com números de sequência monotônicos
+
+Cada entrada recebe um `seq` crescente (nunca reutilizado, mesmo após limpar),
+o que permite aos clientes pedir apenas o que é novo com `since(seq)`.
+A memória é fixa: ao atingir a capacidade, as entradas mais antigas são
+sobrescritas.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_CAPACITY = 1000
+DEFAULT_MAX_MESSAGE_CHARS = 4000
+
+
+class LogRingBuffer:
+    """Buffer circular de tamanho fixo indexado por número de sequência"""
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        max_message_chars: int = DEFAULT_MAX_MESSAGE_CHARS,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positivo")
+        self.capacity = capacity
+        self.max_message_chars = max_message_chars
+        self._items: List[Optional[Dict]] = [None] * capacity
+        self._next_seq = 1
+        # Menor seq ainda válido (avança ao limpar)
+        self._floor_seq = 1
+        self._lock = threading.Lock()
+
+    @property
+    def last_seq(self) -> int:
+        """Sequência da entrada mais recente (0 se nenhuma foi adicionada)"""
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self) -> int:
+        """Sequência da entrada mais antiga ainda disponível"""
+        return max(self._floor_seq, self._next_seq - self.capacity)
+
+    def __len__(self) -> int:
+        return self._next_seq - self.first_seq
+
+    def append(self, entry: Dict) -> Dict:
+        """
+        Adiciona uma entrada, atribuindo o próximo número de sequência
+
+        Returns:
+            A entrada armazenada (com 'seq')
+        """
+        message = entry.get('message')
+        if isinstance(message, str) and len(message) > self.max_message_chars:
+            entry = {**entry, 'message': message[:self.max_message_chars] + '… (truncado)'}
+        with self._lock:
+            stored = {**entry, 'seq': self._next_seq}
+            self._items[(self._next_seq - 1) % self.capacity] = stored
+            self._next_seq += 1
+        return stored
+
+    def since(self, seq: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Retorna as entradas com sequência maior que `seq`, em ordem
+
+        Args:
+            seq: Última sequência já recebida pelo cliente
+            limit: Número máximo de entradas retornadas (as mais antigas primeiro)
+        """
+        with self._lock:
+            start = max(seq + 1, self.first_seq)
+            end = self._next_seq
+            if limit is not None:
+                end = min(end, start + limit)
+            return [self._items[(s - 1) % self.capacity] for s in range(start, end)]
+
+    def clear(self):
+        """Descarta todas as entradas mantendo a sequência monotônica"""
+        with self._lock:
+            self._items = [None] * self.capacity
+            self._floor_seq = self._next_seq
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Rotação de arquivos de log por tamanho e por tempo, com compressão
+
+O arquivo ativo (ex: logs/app.log) é renomeado para um segmento com data e
+hora (app.log.20251207-010523) ao passar de LOG_MAX_BYTES ou ao virar o
+intervalo LOG_ROTATE_INTERVAL (alinhado ao relógio, igual em todos os
+processos). Uma thread de fundo comprime o segmento (.gz) e aplica a
+retenção: no máximo LOG_BACKUP_COUNT segmentos, LOG_RETENTION_DAYS dias e
+LOG_RETENTION_MB no total.
+
+Vários processos podem escrever no mesmo arquivo: as escritas usam
+O_APPEND, a rotação acontece sob um flock no arquivo .lock vizinho e cada
+processo reabre o arquivo ativo quando percebe que outro já o rotacionou.
+Sem fcntl (Windows), a rotação só é protegida dentro do processo.
+"""
+
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - sem lock entre processos
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_ROTATE_INTERVAL = 24 * 3600
+DEFAULT_BACKUP_COUNT = 10
+DEFAULT_RETENTION_DAYS = 14
+DEFAULT_RETENTION_MB = 500
+# Frequência com que os processos conferem se outro rotacionou o arquivo
+REOPEN_CHECK_INTERVAL = 1.0
+# Espera antes de comprimir: outros processos ainda podem escrever no segmento
+# até perceberem a rotação
+SEGMENT_SETTLE_SECONDS = 2 * REOPEN_CHECK_INTERVAL
+# Um .gz.tmp mais antigo que isso foi abandonado por um processo interrompido
+STALE_TEMP_SECONDS = 600
+
+
+class RotatingCompressedFileHandler(logging.FileHandler):
+    """FileHandler com rotação por tamanho/tempo, gzip em segundo plano e retenção"""
+
+    settle_seconds = SEGMENT_SETTLE_SECONDS
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: Optional[int] = None,
+        rotate_interval: Optional[float] = None,
+        backup_count: Optional[int] = None,
+        retention_days: Optional[float] = None,
+        retention_mb: Optional[float] = None,
+        compress: bool = True,
+        encoding: str = 'utf-8',
+    ):
+        """
+        Args:
+            filename: Arquivo de log ativo
+            max_bytes: Tamanho que dispara a rotação (0 = sem limite)
+            rotate_interval: Segundos por segmento (0 = sem rotação por tempo)
+            backup_count: Segmentos mantidos (0 = sem limite)
+            retention_days: Idade máxima dos segmentos (0 = sem limite)
+            retention_mb: Tamanho total máximo dos segmentos (0 = sem limite)
+            compress: Comprimir os segmentos com gzip
+        """
+        self.max_bytes = _setting(max_bytes, 'LOG_MAX_BYTES', DEFAULT_MAX_BYTES, int)
+        self.rotate_interval = _setting(rotate_interval, 'LOG_ROTATE_INTERVAL', DEFAULT_ROTATE_INTERVAL, float)
+        self.backup_count = _setting(backup_count, 'LOG_BACKUP_COUNT', DEFAULT_BACKUP_COUNT, int)
+        self.retention_days = _setting(retention_days, 'LOG_RETENTION_DAYS', DEFAULT_RETENTION_DAYS, float)
+        self.retention_mb = _setting(retention_mb, 'LOG_RETENTION_MB', DEFAULT_RETENTION_MB, float)
+        self.compress = compress
+        super().__init__(filename, mode='a', encoding=encoding)
+        self._lock_path = self.baseFilename + '.lock'
+        self._next_reopen_check = 0.0
+        self._interval_start = self._current_interval_start()
+        self._maintenance: "queue.Queue[None]" = queue.Queue()
+        self._maintenance_thread: Optional[threading.Thread] = None
+        # Segmentos deixados sem compressão por uma execução anterior
+        self._schedule_maintenance()
+
+    def emit(self, record):
+        # Chamado com o lock do handler: rotação serializada dentro do processo
+        try:
+            if self._should_rollover():
+                self._rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    # ------------------------------------------------------------------
+    # Rotação
+
+    def _current_interval_start(self) -> float:
+        if not self.rotate_interval:
+            return 0.0
+        now = time.time()
+        return now - now % self.rotate_interval
+
+    def _should_rollover(self) -> bool:
+        if self.stream is None:
+            return False
+        now = time.monotonic()
+        if now >= self._next_reopen_check:
+            self._next_reopen_check = now + REOPEN_CHECK_INTERVAL
+            if self._rotated_elsewhere():
+                self._reopen()
+                self._interval_start = self._current_interval_start()
+        if self.max_bytes and self.stream.tell() >= self.max_bytes:
+            return True
+        if self.rotate_interval and self._current_interval_start() > self._interval_start:
+            # Arquivo vazio não gera segmento - só avança o intervalo
+            if self.stream.tell() == 0:
+                self._interval_start = self._current_interval_start()
+                return False
+            return True
+        return False
+
+    def _rotated_elsewhere(self) -> bool:
+        """True se o caminho não aponta mais para o arquivo que este processo tem aberto"""
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        mine = os.fstat(self.stream.fileno())
+        return (current.st_dev, current.st_ino) != (mine.st_dev, mine.st_ino)
+
+    def _reopen(self):
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+
+    def _rollover(self):
+        with self._interprocess_lock():
+            # Outro processo pode ter rotacionado enquanto aguardávamos o lock
+            if self._rotated_elsewhere():
+                self._reopen()
+            elif self.stream.tell() > 0 or os.path.getsize(self.baseFilename) > 0:
+                self.stream.flush()
+                os.rename(self.baseFilename, self._segment_name())
+                self._reopen()
+            self._interval_start = self._current_interval_start()
+        self._schedule_maintenance()
+
+    def _segment_name(self) -> str:
+        base = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}"
+        name, counter = base, 1
+        while os.path.exists(name) or os.path.exists(name + '.gz'):
+            counter += 1
+            name = f"{base}.{counter}"
+        return name
+
+    @contextmanager
+    def _interprocess_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Compressão e retenção (thread de fundo)
+
+    def segments(self) -> List[str]:
+        """Segmentos rotacionados (comprimidos ou não), do mais antigo ao mais novo"""
+        directory, base = os.path.split(self.baseFilename)
+        prefix = base + '.'
+        names = []
+        for entry in os.listdir(directory or '.'):
+            if not entry.startswith(prefix) or entry.endswith(('.lock', '.tmp')):
+                continue
+            names.append(os.path.join(directory, entry))
+        return sorted(names, key=_mtime)
+
+    def _schedule_maintenance(self):
+        self._maintenance.put(None)
+        if self._maintenance_thread is None:
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name="log-rotation", daemon=True
+            )
+            self._maintenance_thread.start()
+
+    def _maintenance_loop(self):
+        while True:
+            self._maintenance.get()
+            time.sleep(self.settle_seconds)
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                # Não usar logging aqui: o handler poderia logar sobre si mesmo
+                print(f"Falha na manutenção dos logs rotacionados: {e}")
+            finally:
+                self._maintenance.task_done()
+
+    def run_maintenance(self):
+        """Comprime segmentos pendentes e remove os que excedem a retenção"""
+        if self.compress:
+            for segment in self.segments():
+                if not segment.endswith('.gz'):
+                    _compress(segment)
+        with self._interprocess_lock():
+            self._apply_retention()
+
+    def wait_for_maintenance(self):
+        """Aguarda a compressão/retenção pendente (testes e desligamento)"""
+        self._maintenance.join()
+
+    def _apply_retention(self):
+        segments = self.segments()
+        keep = list(segments)
+        if self.retention_days:
+            cutoff = time.time() - self.retention_days * 86400
+            keep = [s for s in keep if _mtime(s) >= cutoff]
+        if self.backup_count:
+            keep = keep[-self.backup_count:]
+        if self.retention_mb:
+            budget = self.retention_mb * 1024 * 1024
+            kept = []
+            for segment in reversed(keep):
+                budget -= _size(segment)
+                if budget < 0:
+                    break
+                kept.append(segment)
+            keep = kept
+        for segment in set(segments) - set(keep):
+            try:
+                os.remove(segment)
+            except FileNotFoundError:
+                pass  # Removido por outro processo
+
+
+def _compress(segment: str):
+    """Comprime um segmento; se outro processo já está comprimindo, não faz nada"""
+    target = segment + '.gz'
+    temp = target + '.tmp'
+    try:
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        if time.time() - _mtime(temp) < STALE_TEMP_SECONDS:
+            return
+        _remove_quietly(temp)
+        return _compress(segment)
+    try:
+        with open(segment, 'rb') as source, os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            shutil.copyfileobj(source, gz, 1024 * 1024)
+        stat = os.stat(segment)
+        os.utime(temp, (stat.st_atime, stat.st_mtime))
+        os.rename(temp, target)
+        os.remove(segment)
+    except FileNotFoundError:
+        # O segmento foi comprimido/removido por outro processo
+        _remove_quietly(temp)
+    except Exception:
+        _remove_quietly(temp)
+        raise
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _setting(value, env_name, default, cast):
+    if value is not None:
+        return value
+    return cast(os.environ.get(env_name, default))
@@ -15,14 +15,42 @@
 
 """
 Configuração de logging detalhado para Gemini Computer Use
+
+Com LOG_ASYNC=1 (ou setup_logger(async_mode=True)) os registros não são
+escritos na thread que loga: um QueueHandler os coloca em uma fila limitada
+e uma única thread de fundo (QueueListener) é dona dos handlers reais de
+console e arquivo. Se a fila encher, LOG_QUEUE_OVERFLOW decide entre
+descartar ("drop", padrão - WARNING ou acima ainda aguardam espaço) ou
+bloquear quem loga ("block"). A fila é esvaziada ao sair do processo.
+
+Com LOG_FORMAT=json cada registro vira uma linha JSON com os campos do
+contexto atual (log_context: run_id, iteration, action) e os campos tipados
+passados em extra= (duration_ms, screenshot_bytes...), prontos para agregar
+sem interpretar o texto das mensagens. Usa orjson quando instalado.
 """
 
+import atexit
+import contextvars
+import copy
+import json
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from log_rotation import RotatingCompressedFileHandler
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Níveis de log customizados
 LOG_LEVELS = {
@@ -52,19 +80,256 @@ class ColoredFormatter(logging.Formatter):
         return super().format(record)
 
 
+DEFAULT_LOG_QUEUE_SIZE = 10000
+OVERFLOW_POLICIES = ('drop', 'block')
+# Tempo máximo que um WARNING+ aguarda espaço na fila no modo "drop"
+OVERFLOW_BLOCK_TIMEOUT = 1.0
+
+
+class AsyncLogDispatcher:
+    """
+    Fila limitada + thread única que escreve nos handlers reais
+
+    Cada item da fila leva os handlers do logger de origem, então uma única
+    thread atende todos os loggers configurados em modo assíncrono.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_LOG_QUEUE_SIZE, overflow: str = 'drop'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de overflow desconhecida: {overflow} (use {', '.join(OVERFLOW_POLICIES)})")
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.overflow = overflow
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._listener = _RoutingQueueListener(self)
+        self._listener.start()
+
+    def enqueue(self, targets: Tuple[logging.Handler, ...], record: logging.LogRecord):
+        item = (targets, record)
+        if self._stopped:
+            # Depois do flush de saída: escreve direto
+            _dispatch(targets, record)
+            return
+        if self.overflow == 'block':
+            self.queue.put(item)
+            return
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(item, timeout=OVERFLOW_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def handle(self, item):
+        targets, record = item
+        dropped = self.dropped
+        if dropped != self._reported_dropped:
+            # Avisa nos mesmos destinos quantos registros foram perdidos
+            notice = logging.makeLogRecord({
+                'name': 'logger_config',
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f"Fila de log cheia - {dropped - self._reported_dropped} registros descartados",
+            })
+            self._reported_dropped = dropped
+            _dispatch(targets, notice)
+        _dispatch(targets, record)
+
+    def stop(self):
+        """Esvazia a fila (escrevendo tudo o que está pendente) e para a thread"""
+        if self._stopped:
+            return
+        self._listener.stop()
+        self._stopped = True
+
+
+class _RoutingQueueListener(QueueListener):
+    def __init__(self, dispatcher: AsyncLogDispatcher):
+        super().__init__(dispatcher.queue)
+        self._dispatcher = dispatcher
+
+    def enqueue_sentinel(self):
+        # Com a fila cheia, aguarda espaço em vez de falhar (put_nowait)
+        self.queue.put(self._sentinel)
+
+    def handle(self, record):
+        self._dispatcher.handle(record)
+
+
+class _RoutedQueueHandler(QueueHandler):
+    """QueueHandler que leva junto os handlers reais do logger"""
+
+    def __init__(self, dispatcher: AsyncLogDispatcher, targets: List[logging.Handler]):
+        super().__init__(dispatcher.queue)
+        self.dispatcher = dispatcher
+        self.targets = tuple(targets)
+
+    def prepare(self, record):
+        # Versão enxuta do QueueHandler.prepare: resolve a mensagem (os args
+        # podem mudar depois) sem passar por um Formatter completo; o texto
+        # da exceção fica em exc_text e é reaproveitado pelos handlers reais
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        return record
+
+    def enqueue(self, record):
+        self.dispatcher.enqueue(self.targets, record)
+
+
+_exception_formatter = logging.Formatter()
+
+
+def _dispatch(targets, record):
+    for handler in targets:
+        if record.levelno >= handler.level:
+            handler.handle(record)
+
+
+_dispatcher: Optional[AsyncLogDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_async_dispatcher() -> AsyncLogDispatcher:
+    """Dispatcher compartilhado do processo (criado no primeiro uso)"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AsyncLogDispatcher(
+                maxsize=int(os.environ.get('LOG_QUEUE_SIZE', DEFAULT_LOG_QUEUE_SIZE)),
+                overflow=os.environ.get('LOG_QUEUE_OVERFLOW', 'drop').lower(),
+            )
+            atexit.register(flush_async_logging)
+        return _dispatcher
+
+
+def flush_async_logging():
+    """Escreve todos os registros pendentes; logs posteriores passam a ser síncronos"""
+    with _dispatcher_lock:
+        dispatcher = _dispatcher
+    if dispatcher is not None:
+        dispatcher.stop()
+
+
 class DetailedFormatter(logging.Formatter):
     """Formatter detalhado com informações completas"""
     
+    # Formato: [TIMESTAMP] [LEVEL] [MODULE:FUNCTION:LINE] MESSAGE
+    FORMAT = (
+        "[%(asctime)s] "
+        "[%(levelname)-8s] "
+        "[%(name)s:%(funcName)s:%(lineno)d] "
+        "%(message)s"
+    )
+    
+    def __init__(self):
+        # Montado uma vez, não a cada registro
+        super().__init__(self.FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
+
+
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar('log_context', default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Adiciona campos a todos os registros logados dentro do bloco
+
+    Os campos se acumulam em blocos aninhados e valem só para a thread (ou
+    tarefa) atual. Ex: with log_context(run_id=..., iteration=3): ...
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def current_log_context() -> Dict[str, Any]:
+    """Campos de contexto ativos na thread atual"""
+    return _log_context.get()
+
+
+class LogContextFilter(logging.Filter):
+    """Anexa o log_context da thread que loga ao registro (antes de ir para a fila)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'log_context'):
+            record.log_context = _log_context.get()
+        return True
+
+
+# Atributos do próprio LogRecord; o resto veio de extra= e vira campo do JSON
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'log_context'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: campos fixos + log_context + extra="""
+
     def format(self, record):
-        # Formato: [TIMESTAMP] [LEVEL] [MODULE:FUNCTION:LINE] MESSAGE
-        format_str = (
-            "[%(asctime)s] "
-            "[%(levelname)-8s] "
-            "[%(name)s:%(funcName)s:%(lineno)d] "
-            "%(message)s"
-        )
-        formatter = logging.Formatter(format_str, datefmt='%Y-%m-%d %H:%M:%S')
-        return formatter.format(record)
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': logging.getLevelName(record.levelno),
+            'logger': record.name,
+            'function': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        context = getattr(record, 'log_context', None)
+        entry.update(_log_context.get() if context is None else context)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return _dumps(entry)
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(entry, default=str).decode()
+        except TypeError:
+            pass  # Ex: inteiros acima de 64 bits - cai para o json padrão
+    return json.dumps(entry, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+def _json_format() -> bool:
+    return os.environ.get('LOG_FORMAT', 'text').lower() == 'json'
+
+
+def _build_formatter(detailed: bool) -> logging.Formatter:
+    if _json_format():
+        return JsonFormatter()
+    if detailed:
+        return DetailedFormatter()
+    return logging.Formatter(
+        '[%(asctime)s] [%(levelname)s] %(message)s',
+        datefmt='%H:%M:%S'
+    )
+
+
+def _attach(logger: logging.Logger, handlers: List[logging.Handler], async_mode: Optional[bool]):
+    """Adiciona os handlers ao logger, atrás da fila assíncrona se habilitada"""
+    if async_mode is None:
+        async_mode = os.environ.get('LOG_ASYNC', '0').lower() in ('1', 'true', 'yes')
+    if async_mode and handlers:
+        # A thread que loga só enfileira; a escrita acontece na thread de fundo
+        handlers = [_RoutedQueueHandler(get_async_dispatcher(), handlers)]
+    for handler in handlers:
+        # Na thread que loga: o contexto da thread de fundo não é o do agente
+        handler.addFilter(LogContextFilter())
+        logger.addHandler(handler)
 
 
 def setup_logger(
@@ -72,7 +337,8 @@ def setup_logger(
     level: Optional[str] = None,
     log_file: Optional[str] = None,
     console: bool = True,
-    detailed: bool = True
+    detailed: bool = True,
+    async_mode: Optional[bool] = None,
 ) -> logging.Logger:
     """
     Configura um logger detalhado
@@ -83,6 +349,7 @@ def setup_logger(
         log_file: Caminho do arquivo de log (opcional)
         console: Se deve logar no console
         detailed: Se deve usar formato detalhado
+        async_mode: Escrever em uma thread de fundo (None = variável LOG_ASYNC)
     
     Returns:
         Logger configurado
@@ -97,27 +364,23 @@ def setup_logger(
     if logger.handlers:
         return logger
     
-    # Formato detalhado
-    if detailed:
-        formatter = DetailedFormatter()
-    else:
-        formatter = logging.Formatter(
-            '[%(asctime)s] [%(levelname)s] %(message)s',
-            datefmt='%H:%M:%S'
-        )
+    # Formato detalhado (ou JSON com LOG_FORMAT=json)
+    formatter = _build_formatter(detailed)
     
+    handlers = []
+
     # Handler para console
     if console:
         console_handler = logging.StreamHandler(sys.stdout)
         # Usar formatter colorido se suportado
-        if sys.stdout.isatty():
+        if sys.stdout.isatty() and not _json_format():
             console_handler.setFormatter(ColoredFormatter(
                 '[%(asctime)s] [%(levelname)-8s] [%(name)s] %(message)s',
                 datefmt='%H:%M:%S'
             ))
         else:
             console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # Handler para arquivo
     if log_file:
@@ -125,13 +388,137 @@ def setup_logger(
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = _file_handler(log_file)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
+    _attach(logger, handlers, async_mode)
+    
+    return logger
+
+
+def _file_handler(log_file: str) -> logging.Handler:
+    """Arquivo com rotação/compressão (LOG_ROTATE=0 usa um FileHandler simples)"""
+    if os.environ.get('LOG_ROTATE', '1').lower() in ('0', 'false', 'no'):
+        return logging.FileHandler(log_file, encoding='utf-8')
+    return RotatingCompressedFileHandler(log_file)
+
+
+def add_log_file(
+    name: str,
+    log_file: str,
+    detailed: bool = True,
+    async_mode: Optional[bool] = None,
+) -> logging.Logger:
+    """
+    Adiciona um arquivo de log a um logger já configurado
+
+    Use o logger raiz (name="") para gravar os registros de todos os loggers
+    do projeto, que propagam até ele.
+
+    Args:
+        name: Nome do logger
+        log_file: Caminho do arquivo de log
+        detailed: Se deve usar formato detalhado
+        async_mode: Escrever em uma thread de fundo (None = variável LOG_ASYNC)
+
+    Returns:
+        Logger configurado
+    """
+    logger = logging.getLogger(name)
+    path = os.path.abspath(log_file)
+    for handler in logger.handlers:
+        targets = getattr(handler, 'targets', (handler,))
+        if any(getattr(target, 'baseFilename', None) == path for target in targets):
+            return logger
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    file_handler = _file_handler(log_file)
+    file_handler.setFormatter(_build_formatter(detailed))
+    file_handler.setLevel(LOG_LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), logging.INFO))
+    _attach(logger, [file_handler], async_mode)
     return logger
 
 
+class lazy:
+    """
+    Argumento de log calculado só se o registro for emitido
+
+    Ex: logger.debug("Estado: %s", lazy(describe, page)) - describe(page) não
+    roda com DEBUG desligado. Para valores simples, basta o estilo %
+    (logger.debug("x=%s", x)): a mensagem só é montada na emissão.
+    """
+
+    __slots__ = ('_func', '_args')
+
+    def __init__(self, func: Callable[..., Any], *args: Any):
+        self._func = func
+        self._args = args
+
+    def __str__(self):
+        return str(self._func(*self._args))
+
+    __repr__ = __str__
+
+
+def truncate(text: Any, limit: int) -> str:
+    """Texto cortado em limit caracteres (com '...'); use com lazy()"""
+    text = str(text)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class _CallSiteRateLimiter:
+    """Intervalo mínimo entre registros de um mesmo ponto de chamada"""
+
+    def __init__(self):
+        self._sites: Dict[Tuple[Any, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, site: Tuple[Any, int], interval: float) -> Optional[int]:
+        """None se deve suprimir; senão, quantos registros foram suprimidos desde o último"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                self._sites[site] = [now + interval, 0]
+                return 0
+            if now < state[0]:
+                state[1] += 1
+                return None
+            suppressed = state[1]
+            state[0], state[1] = now + interval, 0
+            return suppressed
+
+
+_rate_limiter = _CallSiteRateLimiter()
+
+
+def log_every(logger: logging.Logger, interval: float, level: int, msg: str, *args: Any, **kwargs: Any):
+    """
+    Loga no máximo uma vez a cada interval segundos por ponto de chamada
+
+    Para mensagens de alto volume (dumps por passo, esperas repetidas). O
+    próximo registro emitido informa quantos foram suprimidos (campo
+    "suppressed" nos logs JSON).
+
+    Args:
+        logger: Logger de destino
+        interval: Segundos mínimos entre registros desta linha
+        level: Nível do registro (logging.DEBUG, ...)
+        msg: Mensagem no estilo % (formatada só se emitida)
+    """
+    if not logger.isEnabledFor(level):
+        return
+    caller = sys._getframe(1)
+    suppressed = _rate_limiter.acquire((caller.f_code, caller.f_lineno), interval)
+    if suppressed is None:
+        return
+    if suppressed:
+        msg = f"{msg} (+%d suprimidas)"
+        args = (*args, suppressed)
+        kwargs['extra'] = {**kwargs.get('extra', {}), 'suppressed': suppressed}
+    logger.log(level, msg, *args, stacklevel=2, **kwargs)
+
+
 def get_logger(name: str = None) -> logging.Logger:
     """
     Obtém um logger configurado
@@ -12,10 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import argparse
+import contextlib
 import os
 
 from agent import BrowserAgent
+from metrics import REGISTRY as METRICS
+from run_trace import RunTraceWriter
+from memory_monitor import monitor_from_env
+from profiling import MODES as PROFILE_MODES, Profiler
+from tracing import configure_tracing, shutdown_tracing
+from session_store import get_store
 from computers import BrowserbaseComputer, PlaywrightComputer
+from computers.playwright.resource_blocking import RESOURCE_PROFILES
+from logger_config import get_logger
+
+logger = get_logger(__name__)
 
 
 PLAYWRIGHT_SCREEN_SIZE = (1440, 900)
@@ -49,34 +60,153 @@ def main() -> int:
         default=False,
         help="If possible, highlight the location of the mouse.",
     )
+    parser.add_argument(
+        "--resource_profile",
+        type=str,
+        choices=tuple(RESOURCE_PROFILES),
+        default="none",
+        help="Resource-blocking profile applied to the browser context.",
+    )
+    parser.add_argument(
+        "--block_domains",
+        type=str,
+        default="",
+        help="Comma-separated list of extra domains to block (subdomains included).",
+    )
+    parser.add_argument(
+        "--browser_profile",
+        type=str,
+        default=None,
+        help="Name of a persistent browser profile (cookies and HTTP cache) reused across runs.",
+    )
+    parser.add_argument(
+        "--session_service",
+        type=str,
+        default=None,
+        help="Restore the saved authenticated session of this service and save it after a successful run.",
+    )
+    parser.add_argument(
+        "--run_trace",
+        type=str,
+        default=None,
+        help="Write a binary trace (actions, timings, URLs and screenshots) of the run to this file.",
+    )
+    parser.add_argument(
+        "--trace_spans",
+        type=str,
+        default=None,
+        help="Write timing spans (agent loop, model calls, browser waits) to this file in Chrome trace-event format.",
+    )
+    parser.add_argument(
+        "--token_budget",
+        type=int,
+        default=None,
+        help="Stop the run gracefully once it has used more than this many tokens (default: AGENT_TOKEN_BUDGET).",
+    )
+    parser.add_argument(
+        "--cost_budget",
+        type=float,
+        default=None,
+        help="Stop the run gracefully once its estimated cost exceeds this many USD (default: AGENT_COST_BUDGET_USD).",
+    )
+    parser.add_argument(
+        "--memory_profile",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Sample memory with tracemalloc every N steps and report what the history, screenshots and logs retain (default: MEMORY_PROFILE_STEPS).",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="PREFIX",
+        help="Profile the agent loop and write PREFIX.collapsed (flame graph stacks, split into CPU and wait time) and PREFIX.json; PREFIX.prof too in cprofile mode.",
+    )
+    parser.add_argument(
+        "--profile_mode",
+        choices=PROFILE_MODES,
+        default="sampling",
+        help="Profiler for --profile: low-overhead stack sampling, or deterministic cProfile on top of it.",
+    )
     parser.add_argument(
         "--model",
         default='gemini-2.5-computer-use-preview-10-2025',
         help="Set which main model to use.",
     )
     args = parser.parse_args()
+    configure_tracing(chrome_trace=args.trace_spans)
+    try:
+        blocked_domains = [d for d in args.block_domains.split(",") if d.strip()]
+        restored_session = None
+        if args.session_service and args.env == "playwright":
+            restored_session = get_store().load(args.session_service)
+
+        if args.env == "playwright":
+            env = PlaywrightComputer(
+                screen_size=PLAYWRIGHT_SCREEN_SIZE,
+                initial_url=args.initial_url,
+                highlight_mouse=args.highlight_mouse,
+                resource_profile=args.resource_profile,
+                blocked_domains=blocked_domains,
+                profile_name=args.browser_profile,
+                storage_state=restored_session.storage_state if restored_session else None,
+            )
+        elif args.env == "browserbase":
+            env = BrowserbaseComputer(
+                screen_size=PLAYWRIGHT_SCREEN_SIZE,
+                initial_url=args.initial_url,
+                resource_profile=args.resource_profile,
+                blocked_domains=blocked_domains,
+            )
+        else:
+            raise ValueError("Unknown environment: ", args.env)
 
-    if args.env == "playwright":
-        env = PlaywrightComputer(
-            screen_size=PLAYWRIGHT_SCREEN_SIZE,
-            initial_url=args.initial_url,
-            highlight_mouse=args.highlight_mouse,
-        )
-    elif args.env == "browserbase":
-        env = BrowserbaseComputer(
-            screen_size=PLAYWRIGHT_SCREEN_SIZE,
-            initial_url=args.initial_url
-        )
-    else:
-        raise ValueError("Unknown environment: ", args.env)
+        run_trace = None
+        if args.run_trace:
+            run_trace = RunTraceWriter(
+                args.run_trace,
+                {"query": args.query, "model": args.model, "env": args.env, "initial_url": args.initial_url},
+            )
 
-    with env as browser_computer:
-        agent = BrowserAgent(
-            browser_computer=browser_computer,
-            query=args.query,
-            model_name=args.model,
-        )
-        agent.agent_loop()
+        with (run_trace or contextlib.nullcontext()), env as browser_computer:
+            agent = BrowserAgent(
+                browser_computer=browser_computer,
+                query=args.query,
+                model_name=args.model,
+                run_trace=run_trace,
+                token_budget=args.token_budget,
+                cost_budget=args.cost_budget,
+                memory_monitor=monitor_from_env(args.memory_profile),
+            )
+            with (Profiler(args.profile, args.profile_mode) if args.profile else contextlib.nullcontext()) as profiler:
+                agent.agent_loop()
+            if args.session_service and args.env == "playwright" and agent.final_reasoning:
+                try:
+                    savings = get_store().record_run(
+                        args.session_service,
+                        browser_computer.storage_state(),
+                        steps=agent.iteration_count,
+                        tokens=agent.total_token_count,
+                        restored=restored_session,
+                    )
+                except (RuntimeError, OSError, ValueError) as e:
+                    logger.warning("Não foi possível salvar a sessão de %s: %s", args.session_service, e)
+                    savings = None
+                if savings:
+                    print(
+                        f"Restored {args.session_service} session: saved "
+                        f"{savings['steps_saved']} steps and {savings['tokens_saved']} tokens."
+                    )
+        print(f"\nToken usage: {agent.usage.format_summary()}")
+        if agent.budget_exceeded:
+            print(f"Run stopped early: budget exceeded ({agent.budget_exceeded}).")
+        if agent.memory_monitor:
+            print(f"\nMemory profile:\n{agent.memory_monitor.format_report()}")
+        if profiler:
+            print(f"\nCPU profile:\n{profiler.format_summary()}")
+        print(f"\nPer-step latency breakdown:\n{METRICS.format_summary()}")
+    finally:
+        shutdown_tracing()
     return 0
 
 
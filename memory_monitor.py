@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Perfil de memória de uma execução do agente (opcional)
+
+Com MEMORY_PROFILE_STEPS=N (ou --memory_profile N em main.py) o tracemalloc
+é ligado e, a cada N passos, uma amostra registra:
+
+- RSS do processo e memória Python rastreada (atual e pico);
+- bytes atribuídos a cada fonte registrada: texto e imagens do histórico
+  (self._contents), screenshots retidas, filas dos visualizadores (SSE na
+  interface web, frames da GUI) e logs em memória;
+- memória rastreada por pacote (agent, playwright, google...) e os locais
+  que mais cresceram desde a amostra anterior.
+
+Se a memória rastreada cresce mais que MEMORY_GROWTH_WARN_KB por passo entre
+duas amostras, um aviso aponta as fontes e os locais que mais cresceram. O
+relatório vai para o log ao fim da execução e, com MEMORY_PROFILE_FILE,
+para um arquivo JSON.
+
+O tracemalloc deixa as alocações Python mais lentas: use só para investigar.
+"""
+
+import json
+import os
+import sysconfig
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_GROWTH_WARN_KB = 1024
+# Quadros guardados por alocação: 1 basta para atribuir por arquivo/linha
+TRACE_FRAMES = 1
+TOP_SITES = 5
+
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+
+def history_bytes(contents) -> Tuple[int, int]:
+    """Bytes de texto e de imagens (inline ou em FunctionResponse) no histórico
+
+    Args:
+        contents: Lista de types.Content enviada ao modelo
+
+    Returns:
+        (bytes de texto, bytes de imagem)
+    """
+    text = images = 0
+    for content in contents:
+        for part in content.parts or ():
+            if part.text:
+                text += len(part.text)
+            if part.inline_data and part.inline_data.data:
+                images += len(part.inline_data.data)
+            response = part.function_response
+            if response:
+                if response.response:
+                    text += len(str(response.response))
+                for fr_part in response.parts or ():
+                    if fr_part.inline_data and fr_part.inline_data.data:
+                        images += len(fr_part.inline_data.data)
+    return text, images
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def package_of(filename: str) -> str:
+    """Pacote de um arquivo: o diretório sob site-packages ou o módulo do projeto"""
+    parts = filename.replace("\\", "/").split("/")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            index = parts.index(marker)
+            if index + 1 < len(parts):
+                return parts[index + 1].split(".")[0]
+    if filename.startswith(_STDLIB):
+        return "stdlib"
+    return os.path.splitext(parts[-1])[0] or filename
+
+
+class MemoryMonitor:
+    """Amostras de memória a cada N passos, com atribuição por fonte"""
+
+    def __init__(self, every_steps: int, growth_warn_bytes: int = DEFAULT_GROWTH_WARN_KB * 1024,
+                 report_path: Optional[str] = None):
+        if every_steps <= 0:
+            raise ValueError("every_steps deve ser positivo")
+        self.every_steps = every_steps
+        self.growth_warn_bytes = growth_warn_bytes
+        self.report_path = report_path
+        self.samples: List[Dict[str, Any]] = []
+        self.warnings: List[str] = []
+        self._sources: Dict[str, Callable[[], int]] = {}
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+
+    def add_source(self, name: str, measure: Callable[[], int]):
+        """Registra uma fonte de memória (função que devolve os bytes retidos)"""
+        self._sources[name] = measure
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started_tracing = True
+        self.sample(0)
+
+    def step(self, step: int):
+        """Chamado ao fim de cada passo do agente"""
+        if step % self.every_steps == 0:
+            self.sample(step)
+
+    def sample(self, step: int) -> Dict[str, Any]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        traced, peak = tracemalloc.get_traced_memory()
+        sources = {}
+        for name, measure in self._sources.items():
+            try:
+                sources[name] = int(measure())
+            except Exception as e:
+                logger.debug("Fonte de memória %s indisponível: %s", name, e)
+        packages: Dict[str, int] = {}
+        for stat in snapshot.statistics("filename"):
+            package = package_of(stat.traceback[0].filename)
+            packages[package] = packages.get(package, 0) + stat.size
+        top_growth = []
+        if self._snapshot is not None:
+            for diff in snapshot.compare_to(self._snapshot, "lineno")[:TOP_SITES]:
+                if diff.size_diff <= 0:
+                    break
+                frame = diff.traceback[0]
+                top_growth.append({
+                    "site": f"{frame.filename}:{frame.lineno}",
+                    "size_diff": diff.size_diff,
+                    "count_diff": diff.count_diff,
+                })
+        sample = {
+            "step": step,
+            "time": time.time(),
+            "rss_bytes": _rss_bytes(),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "sources": sources,
+            "packages": dict(sorted(packages.items(), key=lambda item: -item[1])[:TOP_SITES * 2]),
+            "top_growth": top_growth,
+        }
+        if self.samples:
+            self._check_growth(self.samples[-1], sample)
+        self.samples.append(sample)
+        self._snapshot = snapshot
+        logger.debug(
+            "Memória no passo %s: RSS %.1f MB, rastreada %.1f MB",
+            step, sample["rss_bytes"] / 2**20, traced / 2**20,
+            extra={"rss_bytes": sample["rss_bytes"], "traced_bytes": traced},
+        )
+        return sample
+
+    def _check_growth(self, previous: Dict[str, Any], sample: Dict[str, Any]):
+        steps = sample["step"] - previous["step"]
+        if steps <= 0:
+            return
+        per_step = (sample["traced_bytes"] - previous["traced_bytes"]) / steps
+        sample["growth_per_step_bytes"] = per_step
+        if per_step <= self.growth_warn_bytes:
+            return
+        source_growth = sorted(
+            ((name, (value - previous["sources"].get(name, 0)) / steps) for name, value in sample["sources"].items()),
+            key=lambda item: -item[1],
+        )
+        sources = ", ".join(f"{name} {growth / 1024:+.0f} KB" for name, growth in source_growth if growth)
+        sites = ", ".join(f"{site['site']} {site['size_diff'] / 1024:+.0f} KB" for site in sample["top_growth"][:3])
+        message = (
+            f"Memória rastreada cresceu {per_step / 1024:.0f} KB/passo entre os passos {previous['step']} e "
+            f"{sample['step']} (limite {self.growth_warn_bytes / 1024:.0f} KB; RSS {sample['rss_bytes'] / 2**20:.0f} MB). "
+            f"Por passo: {sources or 'fontes estáveis'}. Locais: {sites or 'n/d'}"
+        )
+        self.warnings.append(message)
+        logger.warning(message, extra={"growth_per_step_bytes": per_step})
+
+    def stop(self, step: Optional[int] = None) -> Dict[str, Any]:
+        """Última amostra, relatório no log (e no arquivo) e tracemalloc desligado"""
+        if step is not None and (not self.samples or self.samples[-1]["step"] != step):
+            self.sample(step)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._snapshot = None
+        report = self.report()
+        logger.info("Perfil de memória:\n%s", self.format_report())
+        if self.report_path:
+            # Chamado no finally do loop: uma falha aqui não pode esconder o resultado da execução
+            try:
+                directory = os.path.dirname(self.report_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.report_path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+            except OSError as e:
+                logger.error("Falha ao gravar o perfil de memória em %s: %s", self.report_path, e)
+        return report
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "every_steps": self.every_steps,
+            "growth_warn_bytes": self.growth_warn_bytes,
+            "samples": self.samples,
+            "warnings": self.warnings,
+        }
+
+    def format_report(self) -> str:
+        """Tabela por amostra: RSS, memória rastreada e cada fonte"""
+        if not self.samples:
+            return "Nenhuma amostra de memória"
+        names = sorted({name for sample in self.samples for name in sample["sources"]})
+        lines = [f"{'passo':>5} {'RSS':>9} {'rastreada':>10} " + " ".join(f"{name:>16}" for name in names)]
+        for sample in self.samples:
+            lines.append(
+                f"{sample['step']:>5} {sample['rss_bytes'] / 2**20:>7.1f}MB {sample['traced_bytes'] / 2**20:>8.1f}MB "
+                + " ".join(f"{sample['sources'].get(name, 0) / 1024:>14.0f}KB" for name in names)
+            )
+        last = self.samples[-1]
+        lines.append("Memória rastreada por pacote: " + ", ".join(
+            f"{package} {size / 2**20:.1f}MB" for package, size in list(last["packages"].items())[:TOP_SITES]
+        ))
+        if self.warnings:
+            lines.append(f"{len(self.warnings)} aviso(s) de crescimento acima de "
+                         f"{self.growth_warn_bytes / 1024:.0f} KB/passo")
+        return "\n".join(lines)
+
+
+def monitor_from_env(every_steps: Optional[int] = None) -> Optional[MemoryMonitor]:
+    """MemoryMonitor configurado pelo ambiente
+
+    Args:
+        every_steps: Passos entre amostras (padrão: MEMORY_PROFILE_STEPS)
+
+    Returns:
+        O monitor, ou None se desligado (0 ou não definido)
+    """
+    if every_steps is None:
+        every_steps = int(os.environ.get("MEMORY_PROFILE_STEPS") or 0)
+    if every_steps <= 0:
+        return None
+    return MemoryMonitor(
+        every_steps,
+        growth_warn_bytes=int(float(os.environ.get("MEMORY_GROWTH_WARN_KB", DEFAULT_GROWTH_WARN_KB)) * 1024),
+        report_path=os.environ.get("MEMORY_PROFILE_FILE") or None,
+    )
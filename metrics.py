@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Métricas de desempenho por passo do agente
+
+Histogramas (latência do modelo, execução das ações, espera de carregamento,
+captura de screenshot, codificação da resposta, montagem e tamanho da
+requisição) e contadores (passos, retentativas, tokens) em um registro do
+processo. O registro é exposto no formato texto do Prometheus (/metrics na
+interface web) e como resumo no fim de uma execução (main.py).
+
+Sem dependências: cada observação custa um bisect e uma soma sob um lock.
+"""
+
+import bisect
+import collections
+import threading
+import time
+from typing import Deque, Dict, List, Sequence, Tuple
+
+# Segundos: de 5ms (captura/codificação) a 60s (modelo com retentativas)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bytes: de 64 KB a 32 MB
+SIZE_BUCKETS = tuple(64 * 1024 * 2 ** i for i in range(10))
+# Amostras recentes mantidas por série para os percentis do resumo
+SUMMARY_SAMPLES = 1000
+
+
+class _HistogramSeries:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.samples: Deque[float] = collections.deque(maxlen=SUMMARY_SAMPLES)
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self.samples.append(value)
+
+
+class _Timer:
+    __slots__ = ('_series', '_start')
+
+    def __init__(self, series: _HistogramSeries):
+        self._series = series
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._series.observe(time.perf_counter() - self._start)
+
+
+class _CounterSeries:
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str):
+        """Série com os valores de label informados (criada no primeiro uso)"""
+        key = tuple([str(labels[name]) for name in self.labelnames])
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def _series_for(self, labels: Dict[str, str]):
+        if labels:
+            return self.labels(**labels)
+        if self.labelnames:
+            raise ValueError(f"{self.name} exige labels: {', '.join(self.labelnames)}")
+        series = self._series.get(())
+        return series if series is not None else self.labels()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def series(self) -> List[Tuple[Dict[str, str], object]]:
+        with self._lock:
+            items = list(self._series.items())
+        return [(dict(zip(self.labelnames, key)), series) for key, series in sorted(items)]
+
+
+class Histogram(_Metric):
+    """Distribuição de valores (latências em segundos, tamanhos em bytes)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value: float, **labels: str):
+        self._series_for(labels).observe(value)
+
+    def time(self, **labels: str) -> "_Timer":
+        """Observa a duração do bloco with (também quando ele levanta exceção)"""
+        return _Timer(self._series_for(labels))
+
+
+class Counter(_Metric):
+    """Contador monotônico (passos, retentativas, tokens)"""
+
+    kind = 'counter'
+
+    def _new_series(self):
+        return _CounterSeries()
+
+    def inc(self, amount: float = 1, **labels: str):
+        self._series_for(labels).inc(amount)
+
+
+class MetricsRegistry:
+    """Conjunto de métricas do processo"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self._register(Histogram(name, help, buckets, labelnames))
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+        if not metric.labelnames:
+            metric.labels()  # Exposta com zero desde o início
+        return metric
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Formato texto de exposição do Prometheus (version=0.0.4)"""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, series in metric.series():
+                if isinstance(metric, Histogram):
+                    with series.lock:
+                        counts, total, count = list(series.counts), series.sum, series.count
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(metric.buckets) + ['+Inf'], counts):
+                        cumulative += bucket_count
+                        le = bound if bound == '+Inf' else _format_value(bound)
+                        lines.append(f"{metric.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{metric.name}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(series.value)}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Dict]:
+        """Resumo por série: contagem, média, p50, p95 e máximo (histogramas) ou total (contadores)"""
+        result = {}
+        for metric in self.metrics():
+            for labels, series in metric.series():
+                key = metric.name + _format_labels(labels)
+                if isinstance(metric, Histogram):
+                    with series.lock:
+                        samples, total, count = sorted(series.samples), series.sum, series.count
+                    if not count:
+                        continue
+                    result[key] = {
+                        'count': count,
+                        'mean': total / count,
+                        'p50': _percentile(samples, 0.50),
+                        'p95': _percentile(samples, 0.95),
+                        'max': samples[-1],
+                    }
+                elif series.value:
+                    result[key] = {'total': series.value}
+        return result
+
+    def format_summary(self) -> str:
+        """Tabela do resumo para o fim da execução"""
+        summary = self.summary()
+        if not summary:
+            return "Nenhuma métrica registrada"
+        width = max(len(key) for key in summary)
+        lines = [f"{'métrica':<{width}} {'n':>6} {'média':>10} {'p50':>10} {'p95':>10} {'máx':>10}"]
+        for key, values in summary.items():
+            if 'total' in values:
+                lines.append(f"{key:<{width}} {_format_value(values['total']):>6}")
+                continue
+            unit = _unit(key)
+            lines.append(
+                f"{key:<{width}} {values['count']:>6} "
+                + " ".join(f"{unit(values[field]):>10}" for field in ('mean', 'p50', 'p95', 'max'))
+            )
+        return '\n'.join(lines)
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def _unit(key: str):
+    if '_bytes' in key:
+        return lambda value: f"{value / 1024:.0f}KB"
+    return lambda value: f"{value * 1000:.1f}ms"
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return '{' + pairs + '}'
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+REGISTRY = MetricsRegistry()
+
+# Agente (agent.py)
+MODEL_LATENCY_SECONDS = REGISTRY.histogram(
+    'agent_model_latency_seconds', 'Latência de cada chamada generate_content (por tentativa)')
+ACTION_SECONDS = REGISTRY.histogram(
+    'agent_action_seconds', 'Execução de uma ação no navegador, incluindo espera e screenshot',
+    labelnames=('action',))
+RESPONSE_ENCODING_SECONDS = REGISTRY.histogram(
+    'agent_response_encoding_seconds', 'Montagem das FunctionResponse (screenshots) de um passo')
+REQUEST_BUILD_SECONDS = REGISTRY.histogram(
+    'agent_request_build_seconds', 'Atualização do histórico (poda de screenshots antigas) para a próxima requisição')
+REQUEST_BYTES = REGISTRY.histogram(
+    'agent_request_bytes', 'Tamanho estimado da requisição ao modelo (imagens em base64 + texto)',
+    buckets=SIZE_BUCKETS)
+STEPS = REGISTRY.counter('agent_steps_total', 'Iterações do agente executadas')
+MODEL_RETRIES = REGISTRY.counter('agent_model_retries_total', 'Retentativas de generate_content após erro')
+TOKENS = REGISTRY.counter('agent_tokens_total', 'Tokens reportados pelo modelo', labelnames=('kind',))
+ACTION_ERRORS = REGISTRY.counter('agent_action_errors_total', 'Ações que falharam', labelnames=('action',))
+
+# Navegador (computers/playwright)
+SETTLE_WAIT_SECONDS = REGISTRY.histogram(
+    'browser_settle_wait_seconds', 'Espera pelo estado load da página após uma ação ou navegação')
+SCREENSHOT_CAPTURE_SECONDS = REGISTRY.histogram(
+    'browser_screenshot_capture_seconds', 'Captura da screenshot (page.screenshot)')
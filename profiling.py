@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Perfil de CPU de uma execução do agente (--profile em main.py)
+
+O tempo da thread do agente é dividido em CPU Python e espera (modelo,
+navegador, sleeps: a thread bloqueada em socket, select ou lock):
+
+- CPU: um timer ITIMER_PROF dispara SIGPROF a cada intervalo de CPU; o
+  handler roda na própria thread principal, com o quadro interrompido, e
+  soma o tempo de CPU da thread desde a última amostra a essa pilha. Assim
+  rajadas curtas (validar a resposta, varrer o histórico, logar) entre duas
+  esperas ficam na pilha certa;
+- espera: uma thread de fundo lê a pilha (sys._current_frames) a cada
+  intervalo e atribui a ela o tempo de parede que não foi CPU.
+
+Saídas, a partir de um prefixo:
+
+- <prefixo>.collapsed: pilhas colapsadas em microssegundos, com as raízes
+  "cpu" e "wait", para flamegraph.pl, inferno ou speedscope;
+- <prefixo>.json: totais de parede, CPU e espera, funções com mais CPU
+  (própria e acumulada), CPU por pacote e espera por local do projeto;
+- <prefixo>.prof (modo cprofile): perfil determinístico do cProfile com o
+  relógio de CPU da thread, para pstats ou snakeviz. Conta as chamadas
+  exatamente, mas deixa o Python bem mais lento (e infla a CPU amostrada).
+
+Fora da thread principal, ou sem setitimer (Windows), a CPU também vem da
+thread de fundo, que só consegue amostrar quando a thread do agente solta a
+GIL: rajadas curtas acabam contadas na pilha da espera seguinte.
+"""
+
+import cProfile
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from logger_config import get_logger
+from memory_monitor import package_of
+
+logger = get_logger(__name__)
+
+MODES = ("sampling", "cprofile")
+DEFAULT_INTERVAL = 0.005
+TOP_FUNCTIONS = 15
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _thread_cpu_clock(thread_id: int) -> Optional[Callable[[], float]]:
+    """Relógio de CPU de outra thread, ou None se a plataforma não tiver"""
+    try:
+        clock = time.pthread_getcpuclockid(thread_id)
+        time.clock_gettime(clock)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock)
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_ROOT + os.sep):
+        return os.path.relpath(filename, _ROOT)
+    parts = filename.replace("\\", "/").split("/")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            return "/".join(parts[parts.index(marker) + 1:])
+    return parts[-1]
+
+
+def _stack(frame) -> Tuple[Any, ...]:
+    """Code objects da pilha, da raiz até o quadro"""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return tuple(reversed(codes))
+
+
+def _is_project_code(filename: str) -> bool:
+    return filename.startswith(_ROOT + os.sep) and filename != __file__
+
+
+class SamplingProfiler:
+    """Amostra a pilha de uma thread e divide o tempo entre CPU e espera"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        # pilha (tupla de code objects, da raiz à folha) -> segundos
+        self.cpu: Counter = Counter()
+        self.wait: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[Any, str] = {}
+        self._thread_id: Optional[int] = None
+        self._cpu_clock: Callable[[], float] = time.process_time
+        self._cpu_signal = False
+        self._last_signal_cpu = 0.0
+        self._previous_handler = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        """Passa a amostrar a thread que chamou start()"""
+        self._thread_id = threading.get_ident()
+        self._cpu_clock = _thread_cpu_clock(self._thread_id) or time.process_time
+        self._cpu_signal = threading.current_thread() is threading.main_thread() and hasattr(signal, "setitimer")
+        if self._cpu_signal:
+            self._last_signal_cpu = time.thread_time()
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_cpu_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name="cpu-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        if self._cpu_signal:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+            self._cpu_signal = False
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _run(self):
+        last_wall, last_cpu = time.perf_counter(), self._cpu_clock()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            wall, cpu = time.perf_counter(), self._cpu_clock()
+            wall_delta = wall - last_wall
+            cpu_delta = min(max(0.0, cpu - last_cpu), wall_delta)
+            last_wall, last_cpu = wall, cpu
+            if frame is None:
+                return
+            stack = _stack(frame)
+            if not self._cpu_signal:
+                self.cpu[stack] += cpu_delta
+            self.wait[stack] += wall_delta - cpu_delta
+            self.samples += 1
+
+    def _on_cpu_signal(self, signum, frame):
+        cpu = time.thread_time()
+        if frame is not None:
+            self.cpu[_stack(frame)] += cpu - self._last_signal_cpu
+        self._last_signal_cpu = cpu
+
+    def label(self, code) -> str:
+        """Nome do quadro nas pilhas: função (arquivo:linha)"""
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def collapsed_lines(self) -> List[str]:
+        lines = []
+        for root, counter in (("cpu", self.cpu), ("wait", self.wait)):
+            for stack, seconds in counter.items():
+                micros = round(seconds * 1_000_000)
+                if micros > 0:
+                    lines.append(f"{root};" + ";".join(self.label(code) for code in stack) + f" {micros}")
+        return lines
+
+    def summary(self) -> Dict[str, Any]:
+        cpu_self: Counter = Counter()
+        cpu_total: Counter = Counter()
+        packages: Counter = Counter()
+        for stack, seconds in self.cpu.items():
+            if not stack:
+                continue
+            cpu_self[stack[-1]] += seconds
+            packages[package_of(stack[-1].co_filename)] += seconds
+            for code in set(stack):
+                cpu_total[code] += seconds
+        wait_sites: Counter = Counter()
+        for stack, seconds in self.wait.items():
+            site = next((code for code in reversed(stack) if _is_project_code(code.co_filename)), None)
+            wait_sites[self.label(site) if site else "(fora do projeto)"] += seconds
+        cpu_s, wait_s = sum(self.cpu.values()), sum(self.wait.values())
+
+        def top(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"function": self.label(code), "seconds": round(seconds, 4)}
+                for code, seconds in counter.most_common(TOP_FUNCTIONS)
+            ]
+
+        return {
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "wall_s": round(cpu_s + wait_s, 4),
+            "cpu_s": round(cpu_s, 4),
+            "wait_s": round(wait_s, 4),
+            "cpu_self": top(cpu_self),
+            "cpu_total": top(cpu_total),
+            "cpu_by_package": {name: round(s, 4) for name, s in packages.most_common(TOP_FUNCTIONS)},
+            "wait_by_site": {name: round(s, 4) for name, s in wait_sites.most_common(TOP_FUNCTIONS)},
+        }
+
+
+class Profiler:
+    """Context manager que perfila o bloco e grava os arquivos ao sair
+
+    Args:
+        prefix: Prefixo dos arquivos (.collapsed, .json e, no modo cprofile, .prof)
+        mode: "sampling" (padrão, baixo custo) ou "cprofile" (determinístico)
+        interval: Segundos entre amostras
+    """
+
+    def __init__(self, prefix: str, mode: str = "sampling", interval: float = DEFAULT_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Modo de perfil desconhecido: {mode} (use {', '.join(MODES)})")
+        self.prefix = prefix
+        self.mode = mode
+        self.sampler = SamplingProfiler(interval)
+        self.paths: List[str] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._summary: Optional[Dict[str, Any]] = None
+
+    def __enter__(self):
+        self.sampler.start()
+        if self.mode == "cprofile":
+            self._cprofile = cProfile.Profile(time.thread_time)
+            self._cprofile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.sampler.stop()
+        try:
+            self.write()
+        except OSError as e:
+            logger.error("Falha ao gravar o perfil de CPU em %s: %s", self.prefix, e)
+
+    def write(self) -> Tuple[str, ...]:
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._summary = {"mode": self.mode, **self.sampler.summary()}
+        collapsed = f"{self.prefix}.collapsed"
+        with open(collapsed, "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in self.sampler.collapsed_lines())
+        summary = f"{self.prefix}.json"
+        with open(summary, "w", encoding="utf-8") as f:
+            json.dump(self._summary, f, indent=2, ensure_ascii=False)
+        self.paths = [collapsed, summary]
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(f"{self.prefix}.prof")
+            self.paths.append(f"{self.prefix}.prof")
+        logger.info("Perfil de CPU gravado em %s", ", ".join(self.paths))
+        return tuple(self.paths)
+
+    def format_summary(self) -> str:
+        if self._summary is None:
+            return "Nenhum perfil gravado"
+        s = self._summary
+        wall = s["wall_s"] or 1.0
+        lines = [
+            f"parede {s['wall_s']:.2f} s: CPU Python {s['cpu_s']:.2f} s ({s['cpu_s'] / wall:.1%}), "
+            f"espera {s['wait_s']:.2f} s ({s['wait_s'] / wall:.1%}) - {s['samples']} amostras a cada "
+            f"{s['interval_s'] * 1000:g} ms",
+            "CPU por pacote: " + ", ".join(f"{name} {sec:.2f} s" for name, sec in s["cpu_by_package"].items()),
+            "Funções com mais CPU própria:",
+        ]
+        lines += [f"  {item['seconds']:>8.3f} s  {item['function']}" for item in s["cpu_self"][:10]]
+        lines.append("Espera por local:")
+        lines += [f"  {sec:>8.3f} s  {site}" for site, sec in list(s["wait_by_site"].items())[:5]]
+        lines.append("Arquivos: " + ", ".join(self.paths))
+        return "\n".join(lines)
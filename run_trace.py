@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Trace binário de uma execução do agente
+
+Cada passo (uma ação executada) guarda os metadados da chamada ao modelo, a
+função chamada com seus argumentos, tempos, URL e a screenshot resultante. O
+arquivo é escrito de forma incremental (append-only) durante a execução e
+recebe um índice de offsets no rodapé ao ser fechado. O leitor mapeia o
+arquivo em memória (mmap) e acessa qualquer passo em O(1), sem carregar as
+screenshots dos demais.
+
+Formato (inteiros little-endian):
+    cabeçalho: MAGIC | versão u16 | tamanho u32 | metadados JSON
+    passo:     b"STEP" | tamanho do JSON u32 | tamanho da screenshot u32 | JSON | PNG
+    rodapé:    offsets dos passos u64 x N | offset do índice u64 | N u32 | FOOTER_MAGIC
+
+Se a execução for interrompida antes do rodapé, o leitor reconstrói o índice
+percorrendo os passos completos.
+
+O trace contém o texto digitado pelo agente (inclusive credenciais), por isso
+o arquivo é criado com permissão 0600.
+
+Uso:
+    python run_trace.py logs/run.trace
+    python run_trace.py logs/run.trace --step 3
+    python run_trace.py logs/run.trace --extract_screenshots /tmp/frames
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+MAGIC = b"GCUTRACE"
+FORMAT_VERSION = 1
+STEP_MAGIC = b"STEP"
+FOOTER_MAGIC = b"GCUTIDX1"
+
+_HEADER = struct.Struct("<8sHI")
+_STEP = struct.Struct("<4sII")
+_OFFSET = struct.Struct("<Q")
+_TRAILER = struct.Struct("<QI8s")
+
+
+class TraceFormatError(ValueError):
+    """Arquivo não é um trace válido"""
+
+
+class TraceStep(NamedTuple):
+    index: int
+    meta: Dict[str, Any]
+    screenshot: Optional[bytes]
+
+
+class RunTraceWriter:
+    """Escreve os passos de uma execução à medida que acontecem"""
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self.path = path
+        self._file = os.fdopen(fd, "wb")
+        self._offsets: List[int] = []
+        header = json.dumps({"started_at": time.time(), **(metadata or {})}, default=str).encode("utf-8")
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+        self._file.write(header)
+        self._file.flush()
+
+    @property
+    def step_count(self) -> int:
+        return len(self._offsets)
+
+    def append_step(self, meta: Dict[str, Any], screenshot: Optional[bytes] = None):
+        """Grava um passo e descarrega no disco (sobrevive a uma interrupção)"""
+        if self._file is None:
+            raise ValueError("Trace já fechado")
+        payload = json.dumps(meta, default=str).encode("utf-8")
+        blob = screenshot or b""
+        self._offsets.append(self._file.tell())
+        self._file.write(_STEP.pack(STEP_MAGIC, len(payload), len(blob)))
+        self._file.write(payload)
+        self._file.write(blob)
+        self._file.flush()
+
+    def close(self):
+        """Grava o índice no rodapé e fecha o arquivo"""
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        for offset in self._offsets:
+            self._file.write(_OFFSET.pack(offset))
+        self._file.write(_TRAILER.pack(index_offset, len(self._offsets), FOOTER_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RunTraceReader:
+    """Acesso aleatório aos passos de um trace via mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Arquivo vazio
+                raise TraceFormatError(f"Trace vazio: {path}")
+        try:
+            self.metadata, self._data_start = self._read_header()
+            self._offsets = self._read_index()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _read_header(self):
+        if len(self._mm) < _HEADER.size:
+            raise TraceFormatError(f"Trace truncado: {self.path}")
+        magic, version, size = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise TraceFormatError(f"Não é um trace de execução: {self.path}")
+        if version != FORMAT_VERSION:
+            raise TraceFormatError(f"Versão de trace não suportada: {version}")
+        start = _HEADER.size + size
+        return json.loads(self._mm[_HEADER.size:start]), start
+
+    def _read_index(self) -> List[int]:
+        """Índice do rodapé ou, se ausente (execução interrompida), reconstruído"""
+        size = len(self._mm)
+        if size - self._data_start >= _TRAILER.size:
+            index_offset, count, magic = _TRAILER.unpack_from(self._mm, size - _TRAILER.size)
+            if magic == FOOTER_MAGIC and index_offset + count * _OFFSET.size == size - _TRAILER.size:
+                return [
+                    _OFFSET.unpack_from(self._mm, index_offset + i * _OFFSET.size)[0]
+                    for i in range(count)
+                ]
+        return self._scan_steps(size)
+
+    def _scan_steps(self, end: int) -> List[int]:
+        offsets = []
+        position = self._data_start
+        while position + _STEP.size <= end:
+            magic, meta_size, blob_size = _STEP.unpack_from(self._mm, position)
+            next_position = position + _STEP.size + meta_size + blob_size
+            if magic != STEP_MAGIC or next_position > end:
+                break  # Passo incompleto no fim do arquivo
+            offsets.append(position)
+            position = next_position
+        return offsets
+
+    @property
+    def complete(self) -> bool:
+        """True se o trace foi fechado normalmente (rodapé presente)"""
+        return self._mm[-len(FOOTER_MAGIC):] == FOOTER_MAGIC
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def meta(self, index: int) -> Dict[str, Any]:
+        """Metadados de um passo, sem ler a screenshot"""
+        offset = self._offsets[index]
+        _, meta_size, _ = _STEP.unpack_from(self._mm, offset)
+        start = offset + _STEP.size
+        return json.loads(self._mm[start:start + meta_size])
+
+    def __getitem__(self, index: int) -> TraceStep:
+        if index < 0:
+            index += len(self._offsets)
+        offset = self._offsets[index]
+        _, meta_size, blob_size = _STEP.unpack_from(self._mm, offset)
+        start = offset + _STEP.size
+        meta = json.loads(self._mm[start:start + meta_size])
+        blob_start = start + meta_size
+        screenshot = self._mm[blob_start:blob_start + blob_size] if blob_size else None
+        return TraceStep(index, meta, screenshot)
+
+    def __iter__(self) -> Iterator[TraceStep]:
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspeciona um trace de execução do agente.")
+    parser.add_argument("path", help="Arquivo de trace.")
+    parser.add_argument("--step", type=int, default=None, help="Mostra todos os dados de um passo.")
+    parser.add_argument(
+        "--extract_screenshots",
+        metavar="DIR",
+        default=None,
+        help="Grava as screenshots dos passos como PNG neste diretório.",
+    )
+    args = parser.parse_args(argv)
+
+    with RunTraceReader(args.path) as trace:
+        if args.step is not None:
+            step = trace[args.step]
+            print(json.dumps(step.meta, indent=2, ensure_ascii=False))
+            print(f"screenshot: {len(step.screenshot) if step.screenshot else 0} bytes")
+            return 0
+
+        if args.extract_screenshots:
+            os.makedirs(args.extract_screenshots, exist_ok=True)
+            written = 0
+            for step in trace:
+                if step.screenshot:
+                    name = os.path.join(args.extract_screenshots, f"step_{step.index:04d}.png")
+                    with open(name, "wb") as f:
+                        f.write(step.screenshot)
+                    written += 1
+            print(f"{written} screenshots gravadas em {args.extract_screenshots}")
+            return 0
+
+        print(json.dumps(trace.metadata, indent=2, ensure_ascii=False))
+        status = "completo" if trace.complete else "interrompido (índice reconstruído)"
+        print(f"{len(trace)} passos - trace {status}")
+        for index in range(len(trace)):
+            meta = trace.meta(index)
+            print(
+                f"#{index:<4} iter {meta.get('iteration', '-'):<3} "
+                f"{meta.get('function') or '(final)':<24} "
+                f"{meta.get('action_seconds', 0.0):6.2f}s  {meta.get('url') or ''}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Variantes reduzidas das screenshots para visualizadores
+
+O modelo recebe o PNG em tamanho real; os visualizadores só precisam do que
+cabe na tela. Cada screenshot ganha um cache de variantes (JPEG reduzido)
+guardado junto do frame original. As variantes são geradas uma única vez por
+uma thread de fundo, fora da thread do agente; se um visualizador pedir uma
+variante antes dela ficar pronta, ela é gerada na hora (também uma única vez).
+
+Pillow é opcional: sem ele, `VariantRenderer.available` é False e os
+visualizadores recebem o PNG original.
+"""
+
+import hashlib
+import threading
+from io import BytesIO
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Dependência opcional - sem variantes, apenas o PNG original
+    Image = None
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class VariantSpec(NamedTuple):
+    """Tamanho máximo (largura, altura) e qualidade JPEG de uma variante"""
+    max_size: Tuple[int, int]
+    quality: int
+
+
+VARIANTS: Dict[str, VariantSpec] = {
+    # Área de screenshot da GUI Tk (600x400)
+    'thumb': VariantSpec((600, 400), 75),
+    # Área de screenshot da interface web (altura máxima de 600px)
+    'preview': VariantSpec((960, 600), 80),
+}
+
+
+class ScreenshotVariant(NamedTuple):
+    name: str
+    data: bytes
+    etag: str
+    size: Tuple[int, int]
+    mimetype: str = 'image/jpeg'
+
+
+def render_variant(png: bytes, name: str) -> ScreenshotVariant:
+    """
+    Reduz uma screenshot PNG para a variante pedida
+
+    Raises:
+        KeyError: Variante desconhecida
+        RuntimeError: Pillow não está instalado
+    """
+    spec = VARIANTS[name]
+    if Image is None:
+        raise RuntimeError("Pillow não instalado - variantes de screenshot indisponíveis")
+    with Image.open(BytesIO(png)) as image:
+        image = image.convert('RGB')
+        # reducing_gap reduz primeiro por um fator inteiro (rápido) e só então
+        # aplica o filtro de alta qualidade na imagem já menor
+        image.thumbnail(spec.max_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        output = BytesIO()
+        image.save(output, format='JPEG', quality=spec.quality, optimize=True)
+    data = output.getvalue()
+    etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return ScreenshotVariant(name, data, etag, image.size)
+
+
+class VariantCache:
+    """Variantes de uma screenshot, geradas no máximo uma vez cada"""
+
+    def __init__(self, png: bytes):
+        self._png = png
+        self._variants: Dict[str, ScreenshotVariant] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> ScreenshotVariant:
+        """Variante pronta ou gerada agora (chamadas concorrentes esperam a mesma geração)"""
+        variant = self._variants.get(name)
+        if variant is not None:
+            return variant
+        with self._lock:
+            variant = self._variants.get(name)
+            if variant is None:
+                variant = render_variant(self._png, name)
+                self._variants[name] = variant
+            return variant
+
+    def memory_bytes(self) -> int:
+        return sum(len(v.data) for v in list(self._variants.values()))
+
+
+class VariantRenderer:
+    """
+    Thread de fundo que gera as variantes das screenshots publicadas
+
+    Cada chave (ex: id da sessão) tem um único slot pendente: se screenshots
+    chegam mais rápido do que são reduzidas, as intermediárias são puladas.
+    Quem precisar delas ainda pode gerá-las sob demanda via VariantCache.get.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Tuple[VariantCache, Tuple[str, ...], Optional[Callable]]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def submit(
+        self,
+        key: str,
+        cache: VariantCache,
+        names: Tuple[str, ...] = tuple(VARIANTS),
+        on_ready: Optional[Callable[[VariantCache], None]] = None,
+    ):
+        """
+        Agenda a geração das variantes de `cache`
+
+        Args:
+            key: Origem das screenshots - um pedido pendente da mesma chave é substituído
+            cache: Cache de variantes da screenshot
+            names: Variantes a gerar
+            on_ready: Chamado na thread de fundo quando as variantes ficam prontas
+        """
+        if not self.available:
+            return
+        with self._cond:
+            # Reinsere no fim para manter a ordem de chegada entre as chaves
+            self._pending.pop(key, None)
+            self._pending[key] = (cache, names, on_ready)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="screenshot-variants", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key = next(iter(self._pending))
+                cache, names, on_ready = self._pending.pop(key)
+            try:
+                for name in names:
+                    cache.get(name)
+                if on_ready is not None:
+                    on_ready(cache)
+            except Exception as e:
+                logger.warning(f"Falha ao gerar variantes da screenshot ({key}): {e}")
+
+
+_default_renderer: Optional[VariantRenderer] = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> VariantRenderer:
+    """Renderizador compartilhado do processo"""
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = VariantRenderer()
+        return _default_renderer
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Servidor de produção da interface web
+
+Serve as mesmas rotas de web_gui.py com o waitress (servidor WSGI com pool de
+threads). Os agentes executam no pool de workers da fila, separado das
+threads que atendem as requisições. Ao receber SIGTERM/SIGINT, o servidor
+para de aceitar novas execuções, aguarda os agentes em andamento terminarem
+(até WEB_DRAIN_TIMEOUT segundos) e encerra os streams SSE antes de sair.
+
+Todo o estado das sessões fica em memória, então o servidor roda em um único
+processo; a concorrência vem das threads.
+
+Uso:
+    python serve.py --port 8080
+"""
+
+import argparse
+import os
+import signal
+import threading
+
+try:
+    import waitress
+except ImportError:  # Dependência opcional - usa o servidor com threads do werkzeug
+    waitress = None
+
+import web_gui
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_THREADS = 192
+# Threads reservadas para rotas comuns; as demais podem ficar presas em streams SSE
+RESERVED_THREADS = 32
+DEFAULT_DRAIN_TIMEOUT = 120
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de produção da interface web")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)))
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.environ.get("WEB_THREADS", DEFAULT_THREADS)),
+        help="Threads que atendem requisições (cada stream SSE ocupa uma)",
+    )
+    parser.add_argument(
+        "--drain_timeout",
+        type=float,
+        default=float(os.environ.get("WEB_DRAIN_TIMEOUT", DEFAULT_DRAIN_TIMEOUT)),
+        help="Segundos aguardando os agentes em execução no desligamento",
+    )
+    return parser.parse_args(argv)
+
+
+def create_server(host, port, threads):
+    """
+    Cria o servidor HTTP (waitress, ou werkzeug com threads se indisponível)
+
+    Returns:
+        Tupla (servidor, função que bloqueia servindo requisições)
+    """
+    web_gui.configure_stream_limit(max(1, threads - RESERVED_THREADS))
+    if waitress is not None:
+        server = waitress.create_server(
+            web_gui.app,
+            host=host,
+            port=port,
+            threads=threads,
+            # Conexões além das threads ficam na fila do waitress em vez de recusadas
+            connection_limit=threads * 2,
+            ident="gemini-computer-use",
+        )
+        return server, server.run
+
+    from werkzeug.serving import make_server
+    logger.warning("waitress não instalado - usando servidor com threads do werkzeug")
+    server = make_server(host, port, web_gui.app, threaded=True)
+    return server, server.serve_forever
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs("logs", exist_ok=True)
+
+    web_gui.start_scheduler()
+    server, serve_forever = create_server(args.host, args.port, args.threads)
+
+    stop_requested = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info(f"Sinal {signal.Signals(signum).name} recebido - iniciando desligamento gracioso")
+        stop_requested.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    # O servidor continua atendendo durante o desligamento, para que os
+    # visualizadores acompanhem os agentes até o fim
+    server_thread = threading.Thread(target=serve_forever, name="http-server", daemon=True)
+    server_thread.start()
+    logger.info(f"Servidor de produção em http://{args.host}:{args.port} ({args.threads} threads)")
+    print(f"Acesse em: http://localhost:{args.port}")
+
+    while not stop_requested.wait(1.0):
+        if not server_thread.is_alive():
+            logger.error("Servidor HTTP encerrou inesperadamente")
+            break
+
+    drained = web_gui.shutdown(timeout=args.drain_timeout)
+    if waitress is None:
+        server.shutdown()
+    logger.info("Servidor encerrado" + ("" if drained else " (agentes interrompidos)"))
+    return 0 if drained else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
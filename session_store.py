@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Snapshots criptografados do `storage_state` do Playwright por serviço.
+
+Depois de um login bem-sucedido, os cookies e o localStorage do contexto são
+salvos para o serviço (ex: 'github') e restaurados na próxima execução, para
+que o modelo não precise repetir o fluxo de login a cada tarefa.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from logger_config import get_logger
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # Dependência opcional
+    Fernet = None
+    InvalidToken = Exception
+
+logger = get_logger(__name__)
+
+DEFAULT_STORE_DIR = ".storage_states"
+DEFAULT_MAX_AGE_HOURS = 72
+KEY_FILE_NAME = ".key"
+KEY_WRITE_TIMEOUT = 1.0
+
+
+@dataclass
+class StorageStateSnapshot:
+    """Snapshot restaurado de um serviço"""
+
+    service: str
+    storage_state: Dict
+    created_at: float
+    login_steps: int
+    login_tokens: int
+
+
+def _validate_storage_state(storage_state: Dict) -> bool:
+    """Verifica a estrutura retornada por `context.storage_state()`"""
+    if not isinstance(storage_state, dict):
+        return False
+    cookies = storage_state.get('cookies')
+    origins = storage_state.get('origins', [])
+    if not isinstance(cookies, list) or not isinstance(origins, list):
+        return False
+    return all(isinstance(c, dict) and 'name' in c and 'value' in c for c in cookies)
+
+
+def _drop_expired_cookies(storage_state: Dict, now: float) -> Dict:
+    """Remove cookies expirados (expires == -1 indica cookie de sessão)"""
+    cookies = [
+        c for c in storage_state.get('cookies', [])
+        if c.get('expires', -1) == -1 or c.get('expires', -1) > now
+    ]
+    return {**storage_state, 'cookies': cookies}
+
+
+class StorageStateStore:
+    """Armazena snapshots de `storage_state` criptografados em disco"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        key: Optional[bytes] = None,
+        max_age_hours: Optional[float] = None,
+    ):
+        """
+        Inicializa o armazenamento
+
+        Args:
+            directory: Diretório dos snapshots (padrão: STORAGE_STATE_DIR ou .storage_states)
+            key: Chave Fernet (padrão: STORAGE_STATE_KEY ou chave gerada em <directory>/.key)
+            max_age_hours: Validade dos snapshots (padrão: STORAGE_STATE_MAX_AGE_HOURS ou 72)
+        """
+        self.directory = Path(
+            directory or os.environ.get('STORAGE_STATE_DIR', DEFAULT_STORE_DIR)
+        )
+        if max_age_hours is None:
+            max_age_hours = float(
+                os.environ.get('STORAGE_STATE_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS)
+            )
+        self.max_age_seconds = int(max_age_hours * 3600)
+        self._key = key or os.environ.get('STORAGE_STATE_KEY', '').encode() or None
+        self._fernet = None
+
+    @property
+    def available(self) -> bool:
+        """Indica se a criptografia está disponível (pacote cryptography)"""
+        return Fernet is not None
+
+    def _get_fernet(self):
+        if self._fernet is not None:
+            return self._fernet
+        if Fernet is None:
+            raise RuntimeError(
+                "Pacote 'cryptography' não instalado - snapshots de sessão desativados"
+            )
+        self._fernet = Fernet(self._key or self._load_or_create_key())
+        return self._fernet
+
+    def _load_or_create_key(self) -> bytes:
+        """Lê a chave do diretório ou cria uma (O_EXCL: só um processo a cria)"""
+        key_file = self.directory / KEY_FILE_NAME
+        self.directory.mkdir(parents=True, exist_ok=True)
+        key = Fernet.generate_key()
+        try:
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return self._read_key(key_file)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        logger.info(f"Chave de criptografia de sessões criada em {key_file}")
+        return key
+
+    @staticmethod
+    def _read_key(key_file: Path) -> bytes:
+        # Outro processo pode ter acabado de criar o arquivo sem ainda ter escrito a chave
+        deadline = time.monotonic() + KEY_WRITE_TIMEOUT
+        while True:
+            key = key_file.read_bytes().strip()
+            if key or time.monotonic() >= deadline:
+                return key
+            time.sleep(0.01)
+
+    def _path(self, service: str) -> Path:
+        safe_name = "".join(c for c in service.lower() if c.isalnum() or c in '-_')
+        if not safe_name:
+            raise ValueError(f"Nome de serviço inválido: {service!r}")
+        return self.directory / f"{safe_name}.state"
+
+    def load(self, service: str) -> Optional[StorageStateSnapshot]:
+        """
+        Carrega e valida o snapshot de um serviço
+
+        Args:
+            service: Nome do serviço
+
+        Returns:
+            Snapshot válido ou None (inexistente, expirado, corrompido ou sem cookies válidos)
+        """
+        path = self._path(service)
+        if not self.available or not path.exists():
+            return None
+
+        try:
+            payload = self._get_fernet().decrypt_at_time(
+                path.read_bytes(), ttl=self.max_age_seconds, current_time=int(time.time())
+            )
+            data = json.loads(payload)
+        except InvalidToken:
+            logger.info(f"Snapshot de sessão de {service} expirado ou inválido - descartando")
+            self.delete(service)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Erro ao ler snapshot de sessão de {service}: {e}")
+            return None
+
+        storage_state = data.get('storage_state')
+        if data.get('service') != service.lower() or not _validate_storage_state(storage_state):
+            logger.warning(f"Snapshot de sessão de {service} com formato inválido - descartando")
+            self.delete(service)
+            return None
+
+        storage_state = _drop_expired_cookies(storage_state, time.time())
+        if not storage_state['cookies']:
+            logger.info(f"Todos os cookies da sessão de {service} expiraram - descartando")
+            self.delete(service)
+            return None
+
+        logger.info(f"Snapshot de sessão de {service} carregado ({len(storage_state['cookies'])} cookies)")
+        return StorageStateSnapshot(
+            service=service.lower(),
+            storage_state=storage_state,
+            created_at=data.get('created_at', 0),
+            login_steps=data.get('login_steps', 0),
+            login_tokens=data.get('login_tokens', 0),
+        )
+
+    def save(
+        self,
+        service: str,
+        storage_state: Dict,
+        login_steps: int = 0,
+        login_tokens: int = 0,
+    ):
+        """
+        Salva o snapshot criptografado de um serviço
+
+        Args:
+            service: Nome do serviço
+            storage_state: Resultado de `context.storage_state()`
+            login_steps: Passos gastos pela execução que fez o login
+            login_tokens: Tokens gastos pela execução que fez o login
+        """
+        if not _validate_storage_state(storage_state):
+            raise ValueError("storage_state inválido")
+        data = {
+            'service': service.lower(),
+            'created_at': time.time(),
+            'login_steps': login_steps,
+            'login_tokens': login_tokens,
+            'storage_state': storage_state,
+        }
+        token = self._get_fernet().encrypt(json.dumps(data).encode('utf-8'))
+
+        path = self._path(service)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(token)
+        os.replace(tmp_path, path)
+        logger.info(f"Snapshot de sessão de {service} salvo ({len(storage_state['cookies'])} cookies)")
+
+    def delete(self, service: str):
+        """Remove o snapshot de um serviço"""
+        try:
+            self._path(service).unlink()
+        except FileNotFoundError:
+            pass
+
+    def record_run(
+        self,
+        service: str,
+        storage_state: Dict,
+        steps: int,
+        tokens: int,
+        restored: Optional[StorageStateSnapshot] = None,
+    ) -> Optional[Dict[str, int]]:
+        """
+        Atualiza o snapshot após uma execução bem-sucedida
+
+        Se a execução fez o login (nenhum snapshot restaurado), seus passos e
+        tokens viram a referência. Se o snapshot foi restaurado, a referência é
+        mantida e a economia em relação a ela é retornada.
+
+        Returns:
+            Dicionário com steps_saved e tokens_saved, ou None se não havia snapshot
+        """
+        if restored is None:
+            self.save(service, storage_state, login_steps=steps, login_tokens=tokens)
+            return None
+
+        self.save(
+            service,
+            storage_state,
+            login_steps=restored.login_steps,
+            login_tokens=restored.login_tokens,
+        )
+        savings = {
+            'steps_saved': restored.login_steps - steps,
+            'tokens_saved': restored.login_tokens - tokens,
+        }
+        logger.info(
+            f"Sessão restaurada de {service}: {savings['steps_saved']} passos e "
+            f"{savings['tokens_saved']} tokens economizados em relação à execução com login"
+        )
+        return savings
+
+
+# Instância global para uso fácil
+_store = None
+
+def get_store() -> StorageStateStore:
+    """Obtém a instância global do armazenamento de sessões"""
+    global _store
+    if _store is None:
+        _store = StorageStateStore()
+    return _store
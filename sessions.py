@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sessões da interface web
+
+Cada sessão tem seu próprio estado (status, logs, screenshot e canal SSE),
+permitindo que vários operadores executem agentes ao mesmo tempo no mesmo
+servidor. O registro limita quantas sessões ficam retidas em
+memória; quantas executam ao mesmo tempo é controlado pela fila (job_queue).
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Optional
+
+from computers.cancellation import CancellationToken
+from event_broker import EventBroker
+from log_buffer import LogRingBuffer
+from screenshot_variants import VariantCache, get_renderer
+
+DEFAULT_MAX_SESSIONS = 32
+DEFAULT_SESSION_LOG_CAPACITY = 1000
+DEFAULT_SESSION_TTL_SECONDS = 3600
+
+
+class SessionLimitError(RuntimeError):
+    """Limite de sessões retidas atingido"""
+
+
+class ScreenshotFrame(NamedTuple):
+    """Screenshot mais recente com versão e ETag forte (substituída atomicamente)"""
+    version: int
+    data: bytes
+    etag: str
+    # Versões reduzidas para visualizadores (geradas em segundo plano)
+    variants: VariantCache
+
+
+class AgentSession:
+    """Estado de uma execução do agente na interface web"""
+
+    def __init__(self, session_id: str, config: Optional[Dict] = None, log_capacity: int = DEFAULT_SESSION_LOG_CAPACITY):
+        self.id = session_id
+        self.config = config or {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.is_running = False
+        self.status = 'Pronto'
+        self.current_url: Optional[str] = None
+        self.resource_stats: Optional[Dict] = None
+        # Tokens e custo estimado acumulados (TokenUsage.as_dict), atualizados a cada passo
+        self.token_usage: Optional[Dict] = None
+        # Posição na fila de execução (None quando não está aguardando)
+        self.queue_position: Optional[int] = None
+        # Logs armazenados uma única vez, com seq monotônico e memória fixa
+        self.log_buffer = LogRingBuffer(capacity=log_capacity)
+        # Canal SSE: status, logs e notificações de nova screenshot
+        self.events = EventBroker()
+        # Versão monotônica (nunca reiniciada) - usada nas URLs imutáveis das imagens
+        self.screenshot_version = 0
+        self.screenshot_frame: Optional[ScreenshotFrame] = None
+        # Compartilhado com o agente e o navegador - /stop interrompe a execução
+        self.cancellation = CancellationToken()
+
+    @property
+    def latest_screenshot(self) -> Optional[bytes]:
+        frame = self.screenshot_frame
+        return frame.data if frame else None
+
+    def status_payload(self) -> Dict:
+        """Estado resumido enviado em /status e nos eventos 'status'"""
+        return {
+            'session_id': self.id,
+            'is_running': self.is_running,
+            'status': self.status,
+            'current_url': self.current_url,
+            'screenshot_version': self.screenshot_version,
+            'resource_stats': self.resource_stats,
+            'token_usage': self.token_usage,
+            'queue_position': self.queue_position,
+        }
+
+    def summary(self) -> Dict:
+        """Resumo usado na listagem de sessões"""
+        return {
+            **self.status_payload(),
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'query': (self.config.get('query') or '')[:200],
+            'memory_bytes': self.memory_bytes(),
+            'viewers': self.events.client_count,
+        }
+
+    def memory_bytes(self) -> int:
+        """Estimativa da memória retida pela sessão (logs + screenshot)"""
+        return self.log_bytes() + self.screenshot_bytes()
+
+    def log_bytes(self) -> int:
+        return sum(len(e.get('message', '')) for e in self.log_buffer.since(0))
+
+    def screenshot_bytes(self) -> int:
+        """Screenshot atual e suas variantes reduzidas"""
+        frame = self.screenshot_frame
+        return len(frame.data) + frame.variants.memory_bytes() if frame else 0
+
+    def log(self, message: str, level: str = "info") -> Dict:
+        """Armazena uma entrada de log e a envia aos clientes conectados"""
+        log_entry = self.log_buffer.append({
+            'timestamp': time.strftime("%H:%M:%S"),
+            'message': message,
+            'level': level
+        })
+        self.events.publish('log', log_entry, event_id=log_entry['seq'])
+        return log_entry
+
+    def set_status(self, status: str, is_running: Optional[bool] = None):
+        """Atualiza o status e notifica os clientes conectados"""
+        self.status = status
+        if is_running is not None:
+            if self.is_running and not is_running:
+                self.finished_at = time.time()
+            self.is_running = is_running
+        self.events.publish('status', self.status_payload())
+
+    def store_screenshot(self, data: bytes, url: str):
+        """Publica uma nova screenshot com versão e ETag calculados uma única vez"""
+        version = self.screenshot_version + 1
+        etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+        variants = VariantCache(data)
+        self.screenshot_frame = ScreenshotFrame(version, data, etag, variants)
+        get_renderer().submit(self.id, variants)
+        self.screenshot_version = version
+        self.current_url = url
+        self.events.publish('screenshot', {'version': version, 'url': url})
+        self.events.publish('status', self.status_payload())
+
+    def release_memory(self):
+        """Libera os dados grandes de uma sessão finalizada e antiga"""
+        self.screenshot_frame = None
+        self.log_buffer.clear()
+
+
+class SessionRegistry:
+    """Registro das sessões ativas e finalizadas"""
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        log_capacity: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Inicializa o registro
+
+        Args:
+            max_sessions: Sessões retidas em memória, incluindo finalizadas (WEB_MAX_SESSIONS)
+            log_capacity: Entradas de log por sessão (WEB_SESSION_LOG_CAPACITY)
+            ttl_seconds: Tempo que uma sessão finalizada fica disponível (WEB_SESSION_TTL_SECONDS)
+        """
+        self.max_sessions = max_sessions or int(
+            os.environ.get('WEB_MAX_SESSIONS', DEFAULT_MAX_SESSIONS)
+        )
+        self.log_capacity = log_capacity or int(
+            os.environ.get('WEB_SESSION_LOG_CAPACITY', DEFAULT_SESSION_LOG_CAPACITY)
+        )
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get('WEB_SESSION_TTL_SECONDS', DEFAULT_SESSION_TTL_SECONDS)
+        )
+        self._sessions: Dict[str, AgentSession] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def running_count(self) -> int:
+        with self._lock:
+            return sum(1 for s in self._sessions.values() if s.is_running)
+
+    def get(self, session_id: str) -> Optional[AgentSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def latest(self) -> Optional[AgentSession]:
+        """Sessão criada mais recentemente (usada pelas rotas legadas /api/*)"""
+        with self._lock:
+            if not self._sessions:
+                return None
+            return max(self._sessions.values(), key=lambda s: s.created_at)
+
+    def list(self) -> List[AgentSession]:
+        with self._lock:
+            return sorted(self._sessions.values(), key=lambda s: s.created_at, reverse=True)
+
+    def create(self, config: Dict, session_id: Optional[str] = None) -> AgentSession:
+        """
+        Cria uma sessão ativa (aguardando na fila ou em execução)
+
+        Args:
+            config: Configuração da execução
+            session_id: Id a reutilizar (ex: job recuperado da fila persistida)
+
+        Raises:
+            SessionLimitError: Se o limite de sessões retidas foi atingido
+        """
+        with self._lock:
+            self._evict_locked()
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(
+                    f"Limite de {self.max_sessions} sessões retidas atingido"
+                )
+            session = AgentSession(session_id or uuid.uuid4().hex[:12], config, self.log_capacity)
+            # Ativa desde a criação: a sessão ocupa lugar no registro (e pode
+            # ser cancelada) enquanto aguarda um worker
+            session.is_running = True
+            session.status = 'Na fila'
+            self._sessions[session.id] = session
+            return session
+
+    def remove(self, session_id: str) -> bool:
+        """Remove uma sessão finalizada"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.is_running:
+                return False
+            session.events.close_all()
+            del self._sessions[session_id]
+            return True
+
+    def _evict_locked(self):
+        """Remove sessões finalizadas expiradas e, se cheio, as mais antigas"""
+        now = time.time()
+        finished = sorted(
+            (s for s in self._sessions.values() if not s.is_running and s.finished_at),
+            key=lambda s: s.finished_at,
+        )
+        for session in finished:
+            expired = now - session.finished_at > self.ttl_seconds
+            if expired or len(self._sessions) >= self.max_sessions:
+                session.release_memory()
+                session.events.close_all()
+                del self._sessions[session.id]
@@ -13,11 +13,13 @@
 # limitations under the License.
 
 import os
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 from google.genai import types
 from agent import BrowserAgent, multiply_numbers
-from computers import EnvState
+from computers import CancellationToken, EnvState
 
 class TestBrowserAgent(unittest.TestCase):
     def setUp(self):
@@ -45,6 +47,15 @@ class TestBrowserAgent(unittest.TestCase):
         self.agent.handle_action(action)
         self.mock_browser_computer.click_at.assert_called_once_with(x=100, y=200)
 
+    def test_handle_action_logs_typed_fields(self):
+        self.mock_browser_computer.click_at.return_value = EnvState(screenshot=b"png", url="https://example.com")
+        action = types.FunctionCall(name="click_at", args={"x": 100, "y": 200})
+        with self.assertLogs("agent", level="INFO") as logs:
+            self.agent.handle_action(action)
+        (done,) = [r for r in logs.records if hasattr(r, "duration_ms")]
+        self.assertEqual(done.screenshot_bytes, 3)
+        self.assertEqual(done.url, "https://example.com")
+
     def test_handle_action_type_text_at(self):
         action = types.FunctionCall(name="type_text_at", args={"x": 100, "y": 200, "text": "hello"})
         self.agent.handle_action(action)
@@ -107,5 +118,77 @@ class TestBrowserAgent(unittest.TestCase):
         self.assertEqual(len(self.agent._contents), 3)
 
 
+    def test_cancel_abandons_blocked_model_call(self):
+        token = CancellationToken()
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            cancellation_token=token,
+        )
+        agent._client = MagicMock()
+        release = threading.Event()
+        agent._client.models.generate_content.side_effect = lambda **kwargs: release.wait(10)
+
+        threading.Timer(0.2, token.cancel).start()
+        start = time.monotonic()
+        agent.agent_loop()
+        release.set()
+
+        self.assertTrue(agent.cancelled)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(agent.iteration_count, 1)
+
+    def test_cancel_interrupts_retry_backoff(self):
+        token = CancellationToken()
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            cancellation_token=token,
+        )
+        agent._client = MagicMock()
+        agent._client.models.generate_content.side_effect = RuntimeError("unavailable")
+
+        threading.Timer(0.2, token.cancel).start()
+        start = time.monotonic()
+        agent.agent_loop()
+
+        self.assertTrue(agent.cancelled)
+        # Without cancellation the retries back off for 1 + 2 + 4 + 8 seconds.
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_token_budget_stops_loop_after_step(self):
+        self.mock_browser_computer.navigate.return_value = EnvState(screenshot=b"png", url="https://example.com")
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            token_budget=2500,
+        )
+        agent._client = MagicMock()
+        agent._client.models.generate_content.return_value = types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(
+                        role="model",
+                        parts=[types.Part(function_call=types.FunctionCall(name="navigate", args={"url": "https://example.com"}))],
+                    )
+                )
+            ],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=1200, candidates_token_count=30, total_token_count=1230
+            ),
+        )
+        agent.agent_loop()
+
+        self.assertEqual(agent.iteration_count, 3)
+        self.assertEqual(agent.total_token_count, 3690)
+        self.assertEqual(agent.budget_exceeded, "3690 tokens > orçamento de 2500")
+        self.assertIsNone(agent.final_reasoning)
+
 if __name__ == "__main__":
     unittest.main()
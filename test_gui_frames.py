@@ -0,0 +1,66 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import unittest
+from io import BytesIO
+from PIL import Image
+from gui_frames import FrameDecoder, LatestFrameSlot, resize_for_display
+
+
+def make_png(color, size=(1440, 900)):
+    output = BytesIO()
+    Image.new("RGB", size, color).save(output, format="PNG")
+    return output.getvalue()
+
+
+class TestGuiFrames(unittest.TestCase):
+    def test_slot_keeps_only_latest(self):
+        slot = LatestFrameSlot()
+        for i in range(5):
+            slot.put(i)
+        self.assertEqual(slot.take(), 4)
+        self.assertIsNone(slot.take())
+        self.assertEqual(slot.dropped, 4)
+
+    def test_resize_fits_display_area(self):
+        image = Image.new("RGB", (1440, 900))
+        self.assertEqual(resize_for_display(image, (600, 400)).size, (600, 375))
+        small = Image.new("RGB", (300, 200))
+        self.assertIs(resize_for_display(small, (600, 400)), small)
+
+    def test_burst_shows_newest_frame_and_records_latency(self):
+        decoder = FrameDecoder(max_size=(600, 400))
+        for color in ("red", "green", "blue"):
+            decoder.submit(make_png(color))
+
+        frame = None
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            frame = decoder.poll() or frame
+            if frame is not None and frame.image.getpixel((0, 0)) == (0, 0, 255):
+                break
+            time.sleep(0.01)
+        self.assertEqual(frame.image.getpixel((0, 0)), (0, 0, 255))
+        self.assertEqual(frame.image.size, (600, 375))
+
+        decoder.mark_displayed(frame)
+        stats = decoder.stats()
+        self.assertEqual(stats["received"], 3)
+        self.assertEqual(stats["displayed"], 1)
+        self.assertIsNotNone(stats["latency_ms"]["p50"])
+
+
+if __name__ == "__main__":
+    unittest.main()
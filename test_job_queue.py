@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import threading
+import unittest
+from job_queue import Job, JobScheduler, JobStore, QueueFullError, SchedulerClosedError
+
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "queue.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_priority_then_round_robin_between_users(self):
+        scheduler = JobScheduler(lambda job: None, workers=1, max_queued=10, db_path=":memory:")
+        scheduler.submit("a1", {}, user="alice")
+        scheduler.submit("a2", {}, user="alice")
+        scheduler.submit("a3", {}, user="alice")
+        scheduler.submit("b1", {}, user="bob")
+        scheduler.submit("urgent", {}, user="carol", priority=5)
+
+        positions = scheduler.positions()
+        order = sorted(positions, key=positions.get)
+        self.assertEqual(order, ["urgent", "a1", "b1", "a2", "a3"])
+
+    def test_rejects_when_queue_is_full(self):
+        scheduler = JobScheduler(lambda job: None, workers=1, max_queued=1, db_path=":memory:")
+        scheduler.submit("first", {})
+        with self.assertRaises(QueueFullError):
+            scheduler.submit("second", {})
+        self.assertTrue(scheduler.cancel("first"))
+        scheduler.submit("second", {})
+
+    def test_queued_jobs_survive_restart_but_interrupted_ones_are_dropped(self):
+        store = JobStore(self.db_path)
+        store.add(Job(id="running", config={"query": "x"}, seq=1))
+        store.add(Job(id="waiting", config={"query": "y"}, seq=2))
+        store.mark_running("running")
+        store.close()
+
+        recovered = []
+        scheduler = JobScheduler(lambda job: None, workers=1, db_path=self.db_path)
+        scheduler.start(on_recovered=recovered.append)
+        self.assertTrue(scheduler.shutdown(timeout=5))
+        self.assertEqual([job.id for job in recovered], ["waiting"])
+        self.assertEqual(recovered[0].config, {"query": "y"})
+
+    def test_shutdown_closes_queue_for_new_jobs(self):
+        scheduler = JobScheduler(lambda job: None, workers=1, db_path=":memory:")
+        scheduler.start()
+        self.assertTrue(scheduler.shutdown(timeout=5))
+        with self.assertRaises(SchedulerClosedError):
+            scheduler.submit("late", {})
+
+    def test_runs_jobs_and_reports_wait_and_utilization(self):
+        done = threading.Event()
+        ran = []
+
+        def runner(job):
+            ran.append(job.id)
+            if len(ran) == 2:
+                done.set()
+
+        scheduler = JobScheduler(runner, workers=2, db_path=":memory:")
+        scheduler.start()
+        scheduler.submit("one", {})
+        scheduler.submit("two", {})
+        self.assertTrue(done.wait(5))
+        self.assertTrue(scheduler.shutdown(timeout=5))
+
+        stats = scheduler.stats()
+        self.assertEqual(sorted(ran), ["one", "two"])
+        self.assertEqual(stats["completed"], 2)
+        self.assertEqual(stats["queued"], 0)
+        self.assertGreaterEqual(stats["queue_wait_seconds"]["max"], 0.0)
+        self.assertGreaterEqual(stats["utilization"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
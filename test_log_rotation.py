@@ -0,0 +1,116 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import logging
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import log_rotation
+from log_rotation import RotatingCompressedFileHandler
+
+
+def read_all_lines(handler):
+    lines = []
+    for segment in handler.segments():
+        opener = gzip.open if segment.endswith(".gz") else open
+        with opener(segment, "rt", encoding="utf-8") as f:
+            lines.extend(f.read().splitlines())
+    with open(handler.baseFilename, encoding="utf-8") as f:
+        lines.extend(f.read().splitlines())
+    return lines
+
+
+def write_lines(path, worker, count):
+    # Cada escrita confere a rotação; a compressão espera os atrasados
+    log_rotation.REOPEN_CHECK_INTERVAL = 0
+    RotatingCompressedFileHandler.settle_seconds = 0.2
+    handler = RotatingCompressedFileHandler(path, max_bytes=4096, backup_count=0, retention_mb=0)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger(f"rotation_worker_{worker}")
+    logger.propagate = False
+    logger.addHandler(handler)
+    for i in range(count):
+        logger.warning(f"processo {worker} linha {i}")
+    handler.wait_for_maintenance()
+    handler.close()
+
+
+class TestLogRotation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "app.log")
+        patcher = patch.object(RotatingCompressedFileHandler, "settle_seconds", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_logger(self, handler):
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger(f"rotation_test_{id(handler)}")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        return logger
+
+    def test_size_rotation_compresses_and_keeps_backup_count(self):
+        handler = RotatingCompressedFileHandler(self.path, max_bytes=1024, backup_count=3)
+        logger = self.make_logger(handler)
+        for i in range(400):
+            logger.warning(f"linha {i:04d} " + "x" * 40)
+        handler.wait_for_maintenance()
+
+        segments = handler.segments()
+        self.assertEqual(len(segments), 3)
+        self.assertTrue(all(s.endswith(".gz") for s in segments))
+        self.assertLessEqual(os.path.getsize(self.path), 1024 + 100)
+        # Os segmentos mantidos são os mais novos
+        self.assertEqual(read_all_lines(handler)[-1], "linha 0399 " + "x" * 40)
+
+    def test_time_rotation_at_interval_boundary(self):
+        handler = RotatingCompressedFileHandler(self.path, max_bytes=0, rotate_interval=3600, compress=False)
+        logger = self.make_logger(handler)
+        logger.warning("antes")
+        with patch.object(log_rotation.time, "time", return_value=log_rotation.time.time() + 3600):
+            logger.warning("depois")
+        handler.wait_for_maintenance()
+
+        self.assertEqual(len(handler.segments()), 1)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "depois\n")
+
+    def test_processes_sharing_a_file_lose_no_lines(self):
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=write_lines, args=(self.path, w, 500)) for w in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+
+        handler = RotatingCompressedFileHandler(self.path, max_bytes=0, backup_count=0, retention_mb=0)
+        self.addCleanup(handler.close)
+        handler.wait_for_maintenance()
+        lines = read_all_lines(handler)
+        self.assertEqual(len(lines), 1500)
+        self.assertEqual(len(set(lines)), 1500)
+        self.assertGreater(len(handler.segments()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
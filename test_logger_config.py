@@ -0,0 +1,176 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+import logger_config
+from logger_config import AsyncLogDispatcher, lazy, log_context, log_every
+
+
+class BlockingHandler(logging.Handler):
+    """Handler que só escreve depois de liberado (simula disco/console lento)"""
+
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.unblocked.wait(5)
+        self.messages.append(record.getMessage())
+
+
+class TestAsyncLogging(unittest.TestCase):
+    def test_async_logger_writes_file_after_flush(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            logger = logger_config.setup_logger(
+                "test_async_file", level="INFO", log_file=path, console=False, async_mode=True
+            )
+            logger.propagate = False
+            args = ["mutável"]
+            logger.info("valor: %s", args)
+            args.append("depois")  # A mensagem é resolvida no momento da chamada
+            try:
+                raise ValueError("falhou")
+            except ValueError:
+                logger.exception("erro tratado")
+            logger_config.get_async_dispatcher().queue.join()
+
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+        self.assertIn("valor: ['mutável']", content)
+        self.assertIn("ValueError: falhou", content)
+        self.assertIn("[test_async_file:test_async_logger_writes_file_after_flush:", content)
+
+    def test_drop_policy_never_blocks_caller_and_reports_losses(self):
+        dispatcher = AsyncLogDispatcher(maxsize=1, overflow="drop")
+        handler = BlockingHandler()
+        logger = logging.getLogger("test_async_drop")
+        for i in range(20):
+            dispatcher.enqueue((handler,), logger.makeRecord(logger.name, logging.INFO, "", 0, f"linha {i}", None, None))
+        self.assertGreater(dispatcher.dropped, 0)
+
+        handler.unblocked.set()
+        dispatcher.queue.join()
+        dispatcher.enqueue((handler,), logger.makeRecord(logger.name, logging.INFO, "", 0, "última", None, None))
+        dispatcher.stop()
+        self.assertEqual(handler.messages[-1], "última")
+        self.assertTrue(any("registros descartados" in m for m in handler.messages))
+
+    def test_unknown_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            AsyncLogDispatcher(overflow="ignore")
+
+
+class TestJsonLogging(unittest.TestCase):
+    def log_lines(self, name, async_mode, emit):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with patch.dict(os.environ, {"LOG_FORMAT": "json"}):
+                logger = logger_config.setup_logger(
+                    name, level="INFO", log_file=path, console=False, async_mode=async_mode
+                )
+            logger.propagate = False
+            emit(logger)
+            logger_config.get_async_dispatcher().queue.join()
+            with open(path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f]
+
+    def test_context_and_extra_fields_are_typed(self):
+        def emit(logger):
+            with log_context(run_id="abc123", iteration=3):
+                with log_context(action="click_at"):
+                    logger.info("Ação click_at concluída em 0.25s", extra={"duration_ms": 250.4, "screenshot_bytes": 1024})
+                try:
+                    raise ValueError("falhou")
+                except ValueError:
+                    logger.exception("erro")
+            logger.info("fora do contexto")
+
+        done, error, outside = self.log_lines("test_json_sync", False, emit)
+        self.assertEqual(done["run_id"], "abc123")
+        self.assertEqual(done["iteration"], 3)
+        self.assertEqual(done["action"], "click_at")
+        self.assertEqual(done["duration_ms"], 250.4)
+        self.assertEqual(done["screenshot_bytes"], 1024)
+        self.assertEqual(done["level"], "INFO")
+        self.assertNotIn("action", error)
+        self.assertIn("ValueError: falhou", error["exception"])
+        self.assertNotIn("run_id", outside)
+
+    def test_async_mode_keeps_context_of_logging_thread(self):
+        def emit(logger):
+            with log_context(run_id="sessao1"):
+                logger.info("linha")
+
+        (entry,) = self.log_lines("test_json_async", True, emit)
+        self.assertEqual(entry["run_id"], "sessao1")
+        self.assertEqual(entry["message"], "linha")
+
+
+class TestHotPathLogging(unittest.TestCase):
+    def test_lazy_argument_only_evaluated_when_emitted(self):
+        calls = []
+
+        def describe():
+            calls.append(1)
+            return "caro"
+
+        logger = logging.getLogger("test_lazy")
+        logger.setLevel(logging.INFO)
+        with self.assertLogs(logger, level="INFO") as logs:
+            logger.debug("estado: %s", lazy(describe))
+            self.assertEqual(calls, [])
+            logger.info("estado: %s", lazy(describe))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(logs.output, ["INFO:test_lazy:estado: caro"])
+
+    def test_log_every_limits_each_call_site(self):
+        logger = logging.getLogger("test_log_every")
+        logger.setLevel(logging.INFO)
+        with self.assertLogs(logger, level="INFO") as logs:
+            for i in range(5):
+                log_every(logger, 60, logging.INFO, "dump %d", i)
+                log_every(logger, 60, logging.INFO, "outro ponto %d", i)
+            with patch.object(logger_config.time, "monotonic", return_value=logger_config.time.monotonic() + 61):
+                log_every(logger, 60, logging.INFO, "depois")
+        messages = [r.getMessage() for r in logs.records]
+        self.assertEqual(messages, ["dump 0", "outro ponto 0", "depois"])
+        self.assertEqual(logs.records[0].funcName, "test_log_every_limits_each_call_site")
+
+    def test_log_every_reports_suppressed_count(self):
+        logger = logging.getLogger("test_log_every_suppressed")
+        logger.setLevel(logging.INFO)
+        start = logger_config.time.monotonic()
+
+        def dump(i, now):
+            with patch.object(logger_config.time, "monotonic", return_value=now):
+                log_every(logger, 10, logging.INFO, "dump %d", i)
+
+        with self.assertLogs(logger, level="INFO") as logs:
+            dump(0, start)
+            dump(1, start + 1)
+            dump(2, start + 2)
+            dump(3, start + 11)
+        self.assertEqual([r.getMessage() for r in logs.records], ["dump 0", "dump 3 (+2 suprimidas)"])
+        self.assertEqual(logs.records[1].suppressed, 2)
+
+if __name__ == "__main__":
+    unittest.main()
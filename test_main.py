@@ -28,8 +28,19 @@ class TestMain(unittest.TestCase):
         mock_args.highlight_mouse = True
         mock_args.query = 'test_query'
         mock_args.model = 'test_model'
+        mock_args.resource_profile = 'none'
+        mock_args.block_domains = ''
+        mock_args.browser_profile = None
+        mock_args.session_service = None
+        mock_args.run_trace = None
         mock_args.api_server = None
         mock_args.api_server_key = None
+        mock_args.memory_profile = None
+        mock_args.profile = None
+        mock_args.profile_mode = 'sampling'
+        mock_args.trace_spans = None
+        mock_args.token_budget = None
+        mock_args.cost_budget = None
         mock_arg_parser.return_value.parse_args.return_value = mock_args
 
         main.main()
@@ -37,7 +48,11 @@ class TestMain(unittest.TestCase):
         mock_playwright_computer.assert_called_once_with(
             screen_size=main.PLAYWRIGHT_SCREEN_SIZE,
             initial_url='test_url',
-            highlight_mouse=True
+            highlight_mouse=True,
+            resource_profile='none',
+            blocked_domains=[],
+            profile_name=None,
+            storage_state=None,
         )
         mock_browser_agent.assert_called_once()
         mock_browser_agent.return_value.agent_loop.assert_called_once()
@@ -50,8 +65,19 @@ class TestMain(unittest.TestCase):
         mock_args.env = 'browserbase'
         mock_args.query = 'test_query'
         mock_args.model = 'test_model'
+        mock_args.resource_profile = 'none'
+        mock_args.block_domains = ''
+        mock_args.browser_profile = None
+        mock_args.session_service = None
+        mock_args.run_trace = None
         mock_args.api_server = None
         mock_args.api_server_key = None
+        mock_args.memory_profile = None
+        mock_args.profile = None
+        mock_args.profile_mode = 'sampling'
+        mock_args.trace_spans = None
+        mock_args.token_budget = None
+        mock_args.cost_budget = None
         mock_args.initial_url = 'test_url'
         mock_args.highlight_mouse = False
         mock_arg_parser.return_value.parse_args.return_value = mock_args
@@ -60,10 +86,36 @@ class TestMain(unittest.TestCase):
 
         mock_browserbase_computer.assert_called_once_with(
             screen_size=main.PLAYWRIGHT_SCREEN_SIZE,
-            initial_url='test_url'
+            initial_url='test_url',
+            resource_profile='none',
+            blocked_domains=[],
         )
         mock_browser_agent.assert_called_once()
         mock_browser_agent.return_value.agent_loop.assert_called_once()
 
+    @patch('main.shutdown_tracing')
+    @patch('main.argparse.ArgumentParser')
+    @patch('main.PlaywrightComputer')
+    @patch('main.BrowserAgent')
+    def test_main_shuts_tracing_down_when_the_run_fails(
+        self, mock_browser_agent, mock_playwright_computer, mock_arg_parser, mock_shutdown_tracing
+    ):
+        mock_args = MagicMock()
+        mock_args.env = 'playwright'
+        mock_args.block_domains = ''
+        mock_args.session_service = None
+        mock_args.run_trace = None
+        mock_args.memory_profile = None
+        mock_args.profile = None
+        mock_args.trace_spans = None
+        mock_arg_parser.return_value.parse_args.return_value = mock_args
+        mock_browser_agent.return_value.agent_loop.side_effect = RuntimeError("browser crashed")
+
+        with self.assertRaises(RuntimeError):
+            main.main()
+
+        mock_shutdown_tracing.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from google.genai import types
+from memory_monitor import MemoryMonitor, history_bytes
+
+
+class TestMemoryMonitor(unittest.TestCase):
+    def test_history_bytes_splits_text_and_screenshots(self):
+        contents = [
+            types.Content(role="user", parts=[types.Part(text="abc"), types.Part.from_bytes(data=b"x" * 10, mime_type="image/png")]),
+            types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+                name="click_at",
+                response={"url": "u"},
+                parts=[types.FunctionResponsePart(inline_data=types.FunctionResponseBlob(mime_type="image/png", data=b"y" * 20))],
+            ))]),
+        ]
+        self.assertEqual(history_bytes(contents), (3 + len(str({"url": "u"})), 30))
+
+    def test_growth_warning_names_source_and_report_is_written(self):
+        retained = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "memoria.json")
+            monitor = MemoryMonitor(every_steps=2, growth_warn_bytes=64 * 1024, report_path=path)
+            monitor.add_source("screenshots", lambda: sum(len(b) for b in retained))
+            monitor.start()
+            for step in range(1, 5):
+                retained.append(bytearray(200 * 1024))
+                monitor.step(step)
+            report = monitor.stop(5)
+            self.assertFalse(tracemalloc.is_tracing())
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["warnings"], report["warnings"])
+
+        self.assertEqual([s["step"] for s in report["samples"]], [0, 2, 4, 5])
+        self.assertEqual(report["samples"][2]["sources"]["screenshots"], 4 * 200 * 1024)
+        self.assertTrue(report["warnings"])
+        self.assertIn("screenshots +200 KB", report["warnings"][0])
+        self.assertIn("test_memory_monitor.py", report["warnings"][0])
+        self.assertIn("screenshots", monitor.format_report())
+
+    def test_unwritable_report_path_is_logged_not_raised(self):
+        with tempfile.NamedTemporaryFile() as blocker:
+            # Um arquivo no lugar do diretório do relatório
+            monitor = MemoryMonitor(every_steps=1, report_path=os.path.join(blocker.name, "memoria.json"))
+            monitor.start()
+            with self.assertLogs("memory_monitor", "ERROR"):
+                report = monitor.stop(1)
+        self.assertEqual([s["step"] for s in report["samples"]], [0, 1])
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == "__main__":
+    unittest.main()
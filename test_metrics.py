@@ -0,0 +1,59 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.latency = self.registry.histogram("model_latency_seconds", "Latência", buckets=(0.1, 1.0))
+        self.actions = self.registry.histogram("action_seconds", "Ações", buckets=(0.1,), labelnames=("action",))
+        self.tokens = self.registry.counter("tokens_total", "Tokens", labelnames=("kind",))
+
+    def test_prometheus_histogram_buckets_are_cumulative(self):
+        for value in (0.05, 0.1, 0.5, 3.0):
+            self.latency.observe(value)
+        self.actions.observe(0.2, action='click "at"')
+        self.tokens.inc(120, kind="prompt")
+
+        text = self.registry.render_prometheus()
+        self.assertIn("# TYPE model_latency_seconds histogram", text)
+        self.assertIn('model_latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('model_latency_seconds_bucket{le="1"} 3', text)
+        self.assertIn('model_latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("model_latency_seconds_sum 3.65", text)
+        self.assertIn("model_latency_seconds_count 4", text)
+        self.assertIn('action_seconds_bucket{action="click \\"at\\"",le="+Inf"} 1', text)
+        self.assertIn('tokens_total{kind="prompt"} 120', text)
+
+    def test_summary_percentiles_and_labels_required(self):
+        with self.latency.time():
+            pass
+        for value in range(1, 101):
+            self.latency.observe(value / 100)
+        summary = self.registry.summary()["model_latency_seconds"]
+        self.assertEqual(summary["count"], 101)
+        self.assertEqual(summary["max"], 1.0)
+        self.assertAlmostEqual(summary["p95"], 0.95)
+        self.assertNotIn("action_seconds", self.registry.summary())
+        with self.assertRaises(ValueError):
+            self.actions.observe(1.0)
+        with self.assertRaises(ValueError):
+            self.registry.counter("tokens_total", "duplicada")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import playwright.sync_api
+from computers import AgentCancelled, CancellationToken, PlaywrightComputer
+from computers.playwright.profiles import BrowserProfile, ProfileLockedError
+from computers.playwright.resource_blocking import ResourceBlocker
+
+
+def make_page(url="https://example.com", opener=None):
+    page = MagicMock()
+    page.url = url
+    page.opener.return_value = opener
+    page.is_closed.return_value = False
+    return page
+
+
+class TestPlaywrightComputerPopups(unittest.TestCase):
+    def setUp(self):
+        self.computer = PlaywrightComputer(screen_size=(1000, 1000))
+        self.main_page = make_page()
+        self.computer._page = self.main_page
+
+    def test_new_tab_without_opener_replaces_page_without_reload(self):
+        new_page = make_page("https://example.com/other")
+        self.computer._handle_new_page(new_page)
+
+        self.assertIs(self.computer._page, new_page)
+        self.main_page.close.assert_called_once()
+        self.main_page.goto.assert_not_called()
+        new_page.goto.assert_not_called()
+        self.assertEqual(self.computer._popup_count, 1)
+
+    def test_popup_with_opener_restores_opener_on_close(self):
+        popup = make_page("https://auth.example.com", opener=self.main_page)
+        self.computer._handle_new_page(popup)
+
+        self.assertIs(self.computer._page, popup)
+        self.main_page.close.assert_not_called()
+
+        popup.is_closed.return_value = True
+        self.computer._handle_page_close(popup)
+        self.assertIs(self.computer._page, self.main_page)
+        self.main_page.bring_to_front.assert_called_once()
+
+    def test_closed_popup_without_opener_falls_back_to_open_page(self):
+        other_page = make_page("https://example.com/other")
+        popup = make_page("https://auth.example.com", opener=self.main_page)
+        self.computer._context = MagicMock()
+        self.computer._context.pages = [other_page, popup]
+        self.computer._handle_new_page(popup)
+        self.main_page.is_closed.return_value = True
+        popup.is_closed.return_value = True
+
+        self.computer._handle_page_close(popup)
+        self.assertIs(self.computer._page, other_page)
+        other_page.bring_to_front.assert_called_once()
+
+        other_page.is_closed.return_value = True
+        self.computer._page = popup
+        self.computer._handle_page_close(popup)
+        self.assertIs(self.computer._page, self.computer._context.new_page.return_value)
+
+
+class TestResourceBlocker(unittest.TestCase):
+    def make_route(self, url, resource_type):
+        route = MagicMock()
+        route.request.url = url
+        route.request.resource_type = resource_type
+        return route
+
+    def test_none_profile_installs_no_route(self):
+        blocker = ResourceBlocker("none")
+        context = MagicMock()
+        blocker.install(context)
+        context.route.assert_not_called()
+
+    def test_trackers_profile_blocks_subdomains_and_counts(self):
+        blocker = ResourceBlocker("no-third-party-trackers", ["ads.example.org"])
+        tracker = self.make_route("https://www.google-analytics.com/collect", "script")
+        custom = self.make_route("https://x.ads.example.org/a.js", "script")
+        allowed = self.make_route("https://example.org/app.js", "script")
+
+        for route in (tracker, custom, allowed):
+            blocker._handle_route(route)
+
+        tracker.abort.assert_called_once()
+        custom.abort.assert_called_once()
+        allowed.fallback.assert_called_once()
+        self.assertEqual(blocker.stats.blocked_requests, 2)
+        self.assertGreater(blocker.stats.estimated_bytes_saved, 0)
+
+    def test_trackers_profile_blocks_ping_requests_from_any_host(self):
+        blocker = ResourceBlocker("no-third-party-trackers")
+        beacon = self.make_route("https://example.org/collect", "ping")
+
+        blocker._handle_route(beacon)
+
+        beacon.abort.assert_called_once_with("blockedbyclient")
+        self.assertEqual(blocker.stats.blocked_by_type, {"ping": 1})
+        self.assertEqual(blocker.stats.estimated_bytes_saved, 500)
+
+    def test_unknown_profile_raises(self):
+        with self.assertRaises(ValueError):
+            ResourceBlocker("everything")
+
+
+class TestBrowserProfile(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.profiles_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_concurrent_acquire_is_rejected(self):
+        first = BrowserProfile("shared", self.profiles_dir)
+        second = BrowserProfile("shared", self.profiles_dir)
+        first.acquire()
+        try:
+            with self.assertRaises(ProfileLockedError):
+                second.acquire()
+        finally:
+            first.release()
+        second.acquire()
+        second.release()
+
+    def test_size_cap_evicts_oldest_cache_files_only(self):
+        profile = BrowserProfile("capped", self.profiles_dir, max_size_mb=1)
+        cache_dir = profile.path / "Default" / "Cache"
+        cache_dir.mkdir(parents=True)
+        cookies = profile.path / "Default" / "Cookies"
+        cookies.write_bytes(b"c" * 100_000)
+        for i in range(3):
+            entry = cache_dir / f"entry_{i}"
+            entry.write_bytes(b"x" * 500_000)
+            os.utime(entry, (1000 + i, 1000 + i))
+
+        evicted = profile.enforce_size_cap()
+
+        self.assertEqual(evicted, 1_000_000)
+        self.assertFalse((cache_dir / "entry_0").exists())
+        self.assertFalse((cache_dir / "entry_1").exists())
+        self.assertTrue((cache_dir / "entry_2").exists())
+        self.assertTrue(cookies.exists())
+
+    def test_invalid_profile_name(self):
+        for name in ("../escape", ".", "..", "../x", ".hidden", "a/b", ""):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                BrowserProfile(name, self.profiles_dir)
+        self.assertEqual(BrowserProfile("work.v2", self.profiles_dir).name, "work.v2")
+
+    @patch("computers.playwright.playwright.sync_playwright")
+    def test_failed_start_releases_profile_and_driver(self, mock_sync_playwright):
+        driver = mock_sync_playwright.return_value.start.return_value
+        context = driver.chromium.launch_persistent_context.return_value
+        context.pages = [make_page()]
+        computer = PlaywrightComputer(
+            screen_size=(1000, 1000), profile_name="shared", profiles_dir=self.profiles_dir
+        )
+        computer._goto = MagicMock(side_effect=playwright.sync_api.TimeoutError("initial load"))
+
+        with self.assertRaises(playwright.sync_api.TimeoutError):
+            computer.__enter__()
+
+        context.close.assert_called_once()
+        driver.stop.assert_called_once()
+        profile = BrowserProfile("shared", self.profiles_dir)
+        profile.acquire()
+        profile.release()
+
+
+class TestPlaywrightCancellation(unittest.TestCase):
+    def setUp(self):
+        self.token = CancellationToken()
+        self.computer = PlaywrightComputer(screen_size=(1000, 1000), cancellation_token=self.token)
+        self.computer._page = make_page()
+
+    def test_load_wait_stops_within_one_slice_of_cancel(self):
+        calls = []
+
+        def slow_load(timeout):
+            calls.append(timeout)
+            if len(calls) == 3:
+                self.token.cancel()
+            raise playwright.sync_api.TimeoutError("still loading")
+
+        self.computer._page.wait_for_load_state.side_effect = slow_load
+        with self.assertRaises(AgentCancelled):
+            self.computer.navigate("https://example.com/slow")
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(all(timeout <= 250 for timeout in calls))
+        self.computer._page.goto.assert_called_once_with("https://example.com/slow", wait_until="commit")
+
+    def test_load_wait_raises_timeout_after_total_budget(self):
+        self.computer._page.wait_for_load_state.side_effect = playwright.sync_api.TimeoutError("slow")
+        with self.assertRaises(playwright.sync_api.TimeoutError):
+            self.computer._wait_for_load_state(timeout_ms=10)
+
+    def test_release_latency_is_recorded_on_exit(self):
+        self.computer._context = MagicMock()
+        self.computer._browser = MagicMock()
+        self.computer._playwright = MagicMock()
+        self.token.cancel()
+        self.computer.__exit__(None, None, None)
+        self.assertIsNotNone(self.token.release_latency)
+        self.assertLess(self.token.release_latency, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
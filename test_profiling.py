@@ -0,0 +1,84 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from profiling import Profiler
+
+
+def busy(seconds):
+    deadline = time.thread_time() + seconds
+    while time.thread_time() < deadline:
+        pass
+
+
+def blocked(seconds):
+    time.sleep(seconds)
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.prefix = os.path.join(self.tmp.name, "perfil", "run")
+
+    def profile(self, mode):
+        with Profiler(self.prefix, mode, interval=0.002) as profiler:
+            for _ in range(5):
+                busy(0.04)
+                blocked(0.04)
+        with open(self.prefix + ".json", encoding="utf-8") as f:
+            summary = json.load(f)
+        with open(self.prefix + ".collapsed", encoding="utf-8") as f:
+            stacks = {}
+            for line in f:
+                stack, micros = line.rsplit(" ", 1)
+                stacks[stack] = int(micros)
+        return profiler, summary, stacks
+
+    def seconds(self, stacks, root, function):
+        return sum(
+            micros for stack, micros in stacks.items()
+            if stack.startswith(root + ";") and f";{function} (test_profiling.py" in stack
+        ) / 1e6
+
+    def test_sampling_splits_cpu_and_wait_by_stack(self):
+        profiler, summary, stacks = self.profile("sampling")
+
+        self.assertAlmostEqual(self.seconds(stacks, "cpu", "busy"), 0.2, delta=0.06)
+        self.assertLess(self.seconds(stacks, "cpu", "blocked"), 0.02)
+        self.assertAlmostEqual(self.seconds(stacks, "wait", "blocked"), 0.2, delta=0.06)
+        self.assertTrue(summary["cpu_self"][0]["function"].startswith("busy (test_profiling.py"))
+        self.assertAlmostEqual(summary["wall_s"], summary["cpu_s"] + summary["wait_s"], places=3)
+        self.assertIn("espera", profiler.format_summary())
+
+    def test_cprofile_mode_also_writes_pstats(self):
+        profiler, _, stacks = self.profile("cprofile")
+
+        self.assertEqual(profiler.paths[-1], self.prefix + ".prof")
+        calls = {func[2]: stat[1] for func, stat in pstats.Stats(self.prefix + ".prof").stats.items()}
+        self.assertEqual(calls["busy"], 5)
+        self.assertGreater(self.seconds(stacks, "wait", "blocked"), 0.1)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            Profiler(self.prefix, "perf")
+
+
+if __name__ == "__main__":
+    unittest.main()
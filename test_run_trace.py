@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from google.genai import types
+from agent import BrowserAgent
+from computers import EnvState
+from run_trace import RunTraceReader, RunTraceWriter, TraceFormatError
+
+
+class TestRunTrace(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run.trace")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_with_footer_index(self):
+        with RunTraceWriter(self.path, {"query": "q"}) as trace:
+            for i in range(50):
+                trace.append_step({"function": "click_at", "iteration": i}, b"png-%d" % i)
+            trace.append_step({"function": None, "reasoning": "done"})
+
+        with RunTraceReader(self.path) as reader:
+            self.assertTrue(reader.complete)
+            self.assertEqual(reader.metadata["query"], "q")
+            self.assertEqual(len(reader), 51)
+            self.assertEqual(reader[37].meta["iteration"], 37)
+            self.assertEqual(reader[37].screenshot, b"png-37")
+            self.assertIsNone(reader[-1].screenshot)
+            self.assertEqual(reader.meta(-1)["reasoning"], "done")
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_interrupted_trace_rebuilds_index_and_skips_partial_step(self):
+        trace = RunTraceWriter(self.path)
+        trace.append_step({"iteration": 1}, b"a")
+        trace.append_step({"iteration": 2}, b"b")
+        trace._file.close()  # Simula uma interrupção antes do rodapé
+        with open(self.path, "ab") as f:
+            f.write(b"STEP\x10\x00\x00\x00")  # Passo incompleto
+
+        with RunTraceReader(self.path) as reader:
+            self.assertFalse(reader.complete)
+            self.assertEqual([step.screenshot for step in reader], [b"a", b"b"])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a trace at all")
+        with self.assertRaises(TraceFormatError):
+            RunTraceReader(self.path)
+
+    def test_agent_records_each_action(self):
+        os.environ["GEMINI_API_KEY"] = "test_api_key"
+        computer = MagicMock()
+        computer.screen_size.return_value = (1000, 1000)
+        computer.navigate.return_value = EnvState(screenshot=b"screenshot", url="https://example.com")
+        with RunTraceWriter(self.path) as trace:
+            agent = BrowserAgent(computer, "test query", "test_model", verbose=False, run_trace=trace)
+            agent._client = MagicMock()
+            response = MagicMock()
+            response.candidates[0].content.parts = [
+                types.Part(text="abrindo"),
+                types.Part(function_call=types.FunctionCall(name="navigate", args={"url": "https://example.com"})),
+            ]
+            agent._client.models.generate_content.return_value = response
+            agent.iteration_count = 1
+            self.assertEqual(agent.run_one_iteration(), "CONTINUE")
+
+        with RunTraceReader(self.path) as reader:
+            step = reader[0]
+            self.assertEqual(step.meta["function"], "navigate")
+            self.assertEqual(step.meta["args"], {"url": "https://example.com"})
+            self.assertEqual(step.meta["url"], "https://example.com")
+            self.assertEqual(step.meta["reasoning"], "abrindo")
+            self.assertEqual(step.meta["model_call"]["model"], "test_model")
+            self.assertEqual(step.screenshot, b"screenshot")
+
+
+if __name__ == "__main__":
+    unittest.main()
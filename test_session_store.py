@@ -0,0 +1,80 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import session_store
+from session_store import StorageStateStore
+
+STORAGE_STATE = {
+    "cookies": [
+        {"name": "session", "value": "abc", "domain": "github.com", "path": "/", "expires": -1},
+        {"name": "old", "value": "x", "domain": "github.com", "path": "/", "expires": 1},
+    ],
+    "origins": [],
+}
+
+
+class TestStorageStateStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = StorageStateStore(directory=self._tmp.name, max_age_hours=1)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_roundtrip_is_encrypted_and_drops_expired_cookies(self):
+        self.store.save("GitHub", STORAGE_STATE, login_steps=12, login_tokens=50000)
+
+        raw = self.store._path("github").read_bytes()
+        self.assertNotIn(b"abc", raw)
+
+        snapshot = self.store.load("github")
+        self.assertEqual(snapshot.login_steps, 12)
+        self.assertEqual([c["name"] for c in snapshot.storage_state["cookies"]], ["session"])
+
+    def test_key_created_by_another_process_is_reused(self):
+        other = StorageStateStore(directory=self._tmp.name)
+        other.save("github", STORAGE_STATE)
+        # O_EXCL falha para o segundo processo, que lê a chave criada pelo primeiro
+        snapshot = self.store.load("github")
+        self.assertEqual([c["name"] for c in snapshot.storage_state["cookies"]], ["session"])
+
+    def test_expired_snapshot_is_discarded(self):
+        self.store.save("github", STORAGE_STATE)
+        self.store.max_age_seconds = 1
+        with patch.object(session_store.time, "time", return_value=time.time() + 2.1):
+            self.assertIsNone(self.store.load("github"))
+        self.assertFalse(self.store._path("github").exists())
+
+    def test_tampered_snapshot_is_discarded(self):
+        self.store.save("github", STORAGE_STATE)
+        path = self.store._path("github")
+        path.write_bytes(path.read_bytes()[:-4] + b"AAAA")
+        self.assertIsNone(self.store.load("github"))
+
+    def test_record_run_reports_savings_against_login_run(self):
+        self.assertIsNone(self.store.record_run("github", STORAGE_STATE, steps=10, tokens=40000))
+        restored = self.store.load("github")
+        savings = self.store.record_run(
+            "github", STORAGE_STATE, steps=3, tokens=12000, restored=restored
+        )
+        self.assertEqual(savings, {"steps_saved": 7, "tokens_saved": 28000})
+        self.assertEqual(self.store.load("github").login_steps, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
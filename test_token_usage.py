@@ -0,0 +1,63 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from google.genai import types
+from token_usage import StepUsage, TokenPricing, TokenUsage
+
+
+def usage_metadata(prompt, cached=0, candidates=0, thoughts=0, image=0):
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt,
+        cached_content_token_count=cached or None,
+        candidates_token_count=candidates,
+        thoughts_token_count=thoughts or None,
+        total_token_count=prompt + candidates + thoughts,
+        prompt_tokens_details=[
+            types.ModalityTokenCount(modality=types.MediaModality.TEXT, token_count=prompt - image),
+            types.ModalityTokenCount(modality=types.MediaModality.IMAGE, token_count=image),
+        ],
+    )
+
+
+class TestTokenUsage(unittest.TestCase):
+    def setUp(self):
+        self.usage = TokenUsage(pricing=TokenPricing(input_per_m=1.0, output_per_m=10.0, cached_per_m=0.25))
+
+    def test_steps_split_modalities_and_price_cached_and_thought_tokens(self):
+        first = self.usage.add(usage_metadata(1_000_000, candidates=100_000, image=774_000))
+        second = self.usage.add(usage_metadata(2_000_000, cached=1_000_000, candidates=50_000, thoughts=50_000))
+
+        self.assertEqual(first.prompt_image, 774_000)
+        self.assertEqual(first.prompt_text, 226_000)
+        self.assertAlmostEqual(first.cost_usd, 1.0 + 1.0)
+        # 1M sem cache + 1M em cache + 100k de saída (resposta + raciocínio)
+        self.assertAlmostEqual(second.cost_usd, 1.0 + 0.25 + 1.0)
+        self.assertEqual(self.usage.totals.total, 3_200_000)
+        self.assertEqual(self.usage.totals.cached, 1_000_000)
+        self.assertEqual(self.usage.as_dict()["steps"], 2)
+
+    def test_budgets_and_missing_metadata(self):
+        self.assertEqual(self.usage.add(None), StepUsage())
+        self.usage.cost_budget = 1.5
+        self.usage.add(usage_metadata(1_000_000))
+        self.assertIsNone(self.usage.budget_exceeded())
+        self.usage.add(usage_metadata(1_000_000))
+        self.assertEqual(self.usage.budget_exceeded(), "US$ 2.0000 > orçamento de US$ 1.5000")
+        self.usage.token_budget = 10
+        self.assertEqual(self.usage.budget_exceeded(), "2000000 tokens > orçamento de 10")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import http.server
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from google.genai import types
+import tracing
+from agent import BrowserAgent
+
+
+class CollectorHandler(http.server.BaseHTTPRequestHandler):
+    payloads = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.payloads.append((self.path, json.loads(body)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "spans.json")
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(tracing.shutdown_tracing)
+
+    def read_events(self):
+        tracing.shutdown_tracing()
+        with open(self.path, encoding="utf-8") as f:
+            return [e for e in json.load(f) if e["ph"] == "X"]
+
+    def test_disabled_returns_shared_noop_span(self):
+        tracing.shutdown_tracing()
+        with tracing.span("agent.handle_action", action="click_at") as span:
+            span.set_attribute("bytes", 10)
+        self.assertIs(span, tracing.span("outro"))
+        self.assertIsNone(tracing.current_span())
+
+    def test_chrome_trace_nests_retry_attempts_under_model_call(self):
+        tracing.configure_tracing(chrome_trace=self.path)
+        os.environ["GEMINI_API_KEY"] = "test_api_key"
+        agent = BrowserAgent(MagicMock(), query="test query", model_name="test_model", verbose=False)
+        agent._client = MagicMock()
+        agent._client.models.generate_content.side_effect = [
+            RuntimeError("unavailable"),
+            types.GenerateContentResponse(candidates=[]),
+        ]
+        agent.get_model_response(max_retries=2, base_delay_s=0)
+
+        events = {(e["name"], e["args"].get("attempt")): e for e in self.read_events()}
+        parent = events[("agent.get_model_response", None)]
+        failed = events[("model.generate_content", 1)]
+        self.assertEqual(failed["args"]["error"], "RuntimeError: unavailable")
+        self.assertNotIn("error", events[("model.generate_content", 2)]["args"])
+        self.assertIn(("model.retry_backoff", 1), events)
+        for event in events.values():
+            self.assertEqual(event["tid"], parent["tid"])
+            self.assertGreaterEqual(event["ts"], parent["ts"])
+            self.assertLessEqual(event["ts"] + event["dur"], parent["ts"] + parent["dur"] + 1)
+
+    def test_otlp_export_links_children_to_parent(self):
+        server = http.server.HTTPServer(("127.0.0.1", 0), CollectorHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        tracing.configure_tracing(otlp_endpoint=f"http://127.0.0.1:{server.server_port}/v1/traces")
+
+        with tracing.span("agent.run_one_iteration", iteration=1):
+            with self.assertRaises(ValueError):
+                with tracing.span("browser.screenshot"):
+                    raise ValueError("falhou")
+        tracing.shutdown_tracing()
+
+        (path, payload), = CollectorHandler.payloads
+        self.assertEqual(path, "/v1/traces")
+        spans = {s["name"]: s for s in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+        parent, child = spans["agent.run_one_iteration"], spans["browser.screenshot"]
+        self.assertEqual(child["parentSpanId"], parent["spanId"])
+        self.assertEqual(child["traceId"], parent["traceId"])
+        self.assertNotIn("parentSpanId", parent)
+        self.assertEqual(child["status"], {"code": 2, "message": "ValueError: falhou"})
+        self.assertIn({"key": "iteration", "value": {"intValue": "1"}}, parent["attributes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
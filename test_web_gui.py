@@ -0,0 +1,253 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from io import BytesIO
+from unittest.mock import MagicMock
+from PIL import Image
+from google.genai import types
+from computers import EnvState
+from event_broker import EventBroker, TooManyClientsError
+from log_buffer import LogRingBuffer
+from metrics import MODEL_LATENCY_SECONDS, REQUEST_BUILD_SECONDS, RESPONSE_ENCODING_SECONDS, STEPS
+from sessions import SessionRegistry, SessionLimitError
+import web_gui
+
+
+class TestEventBroker(unittest.TestCase):
+    def test_fan_out_to_all_subscribers(self):
+        broker = EventBroker()
+        first, second = broker.subscribe(), broker.subscribe()
+        broker.publish("log", {"message": "oi"})
+        self.assertIn('"message":"oi"', first.queue.get_nowait())
+        self.assertIn("event: log", second.queue.get_nowait())
+
+    def test_slow_client_gets_resync_instead_of_blocking(self):
+        broker = EventBroker(client_queue_size=2)
+        slow = broker.subscribe()
+        for i in range(5):
+            broker.publish("log", {"i": i})
+        messages = []
+        while not slow.queue.empty():
+            messages.append(slow.queue.get_nowait())
+        self.assertTrue(any("event: resync" in m for m in messages))
+        self.assertLessEqual(len(messages), 2)
+
+    def test_client_limit(self):
+        broker = EventBroker(max_clients=1)
+        broker.subscribe()
+        with self.assertRaises(TooManyClientsError):
+            broker.subscribe()
+
+
+def create_session(query="tarefa"):
+    """Cria uma sessão no registro da interface web sem iniciar o agente"""
+    session = web_gui.sessions.create({"query": query})
+    return session, f"/api/sessions/{session.id}"
+
+
+class TestWebGuiEvents(unittest.TestCase):
+    def setUp(self):
+        self.client = web_gui.app.test_client()
+        self.session, self.base = create_session()
+
+    def tearDown(self):
+        self.session.set_status("Pronto", is_running=False)
+
+    def test_event_stream_sends_status_snapshot_and_published_events(self):
+        response = self.client.get(f"{self.base}/events", buffered=False)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        chunks = iter(response.response)
+        self.assertTrue(next(chunks).startswith(b"retry:"))
+        self.assertIn(b"event: status", next(chunks))
+
+        self.session.set_status("Executando...", is_running=True)
+        self.assertIn(b'"status":"Executando..."', next(chunks))
+        response.close()
+
+
+class TestWebGuiScreenshotImage(unittest.TestCase):
+    def setUp(self):
+        self.client = web_gui.app.test_client()
+        self.session, self.base = create_session()
+        self.session.store_screenshot(b"\x89PNG-fake", "https://example.com")
+        self.version = self.session.screenshot_version
+
+    def tearDown(self):
+        self.session.set_status("Pronto", is_running=False)
+
+    def test_versioned_image_is_binary_and_cacheable(self):
+        response = self.client.get(f"{self.base}/screenshot/{self.version}.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/png")
+        self.assertEqual(response.data, b"\x89PNG-fake")
+        self.assertIn("immutable", response.headers["Cache-Control"])
+
+        etag = response.headers["ETag"]
+        cached = self.client.get(
+            f"{self.base}/screenshot/{self.version}.png", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+
+    def test_stale_version_is_not_served(self):
+        response = self.client.get(f"{self.base}/screenshot/{self.version - 1}.png")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json["latest_version"], self.version)
+
+    def test_reduced_variants_for_viewers(self):
+        png = BytesIO()
+        Image.new("RGB", (1440, 900), "white").save(png, format="PNG")
+        self.session.store_screenshot(png.getvalue(), "https://example.com/full")
+        version = self.session.screenshot_version
+
+        for variant, size in (("thumb", (600, 375)), ("preview", (960, 600))):
+            response = self.client.get(f"{self.base}/screenshot/{version}/{variant}.jpg")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "image/jpeg")
+            self.assertEqual(Image.open(BytesIO(response.data)).size, size)
+            self.assertIn("immutable", response.headers["Cache-Control"])
+        # Gerada uma única vez e reaproveitada
+        frame = self.session.screenshot_frame
+        self.assertIs(frame.variants.get("thumb"), frame.variants.get("thumb"))
+        self.assertEqual(self.client.get(f"{self.base}/screenshot/{version}/huge.jpg").status_code, 404)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        MODEL_LATENCY_SECONDS.observe(1.5)
+        response = web_gui.app.test_client().get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        body = response.get_data(as_text=True)
+        self.assertIn("# TYPE agent_model_latency_seconds histogram", body)
+        self.assertIn('agent_model_latency_seconds_bucket{le="+Inf"}', body)
+        self.assertIn("# TYPE agent_steps_total counter", body)
+
+    def test_web_wrapper_step_records_step_metrics(self):
+        os.environ["GEMINI_API_KEY"] = "test_api_key"
+        computer = MagicMock()
+        computer.navigate.return_value = EnvState(screenshot=b"png", url="https://example.com")
+        session = SessionRegistry().create({"query": "q"})
+        agent = web_gui.BrowserAgentWebWrapper(computer, "q", "test_model", session)
+        agent._client = MagicMock()
+        agent._client.models.generate_content.return_value = types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[
+                types.Part(function_call=types.FunctionCall(name="navigate", args={"url": "https://example.com"})),
+            ]))]
+        )
+        steps = STEPS.labels().value
+        encodings = RESPONSE_ENCODING_SECONDS.labels().count
+        request_builds = REQUEST_BUILD_SECONDS.labels().count
+
+        self.assertEqual(agent.run_one_iteration(), "CONTINUE")
+
+        self.assertEqual(STEPS.labels().value, steps + 1)
+        self.assertEqual(RESPONSE_ENCODING_SECONDS.labels().count, encodings + 1)
+        self.assertEqual(REQUEST_BUILD_SECONDS.labels().count, request_builds + 1)
+        self.assertEqual(agent._contents[-1].parts[0].function_response.response["url"], "https://example.com")
+        self.assertEqual(session.screenshot_version, 1)
+
+
+class TestLogRingBuffer(unittest.TestCase):
+    def test_since_returns_only_new_entries(self):
+        buffer = LogRingBuffer(capacity=10)
+        for i in range(5):
+            buffer.append({"message": str(i)})
+        self.assertEqual([e["seq"] for e in buffer.since(3)], [4, 5])
+        self.assertEqual(buffer.since(5), [])
+
+    def test_memory_is_bounded_and_seq_stays_monotonic(self):
+        buffer = LogRingBuffer(capacity=3)
+        for i in range(10):
+            buffer.append({"message": str(i)})
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual([e["message"] for e in buffer.since(0)], ["7", "8", "9"])
+
+        buffer.clear()
+        self.assertEqual(buffer.since(0), [])
+        self.assertEqual(buffer.append({"message": "x"})["seq"], 11)
+
+
+class TestWebGuiLogs(unittest.TestCase):
+    def setUp(self):
+        self.client = web_gui.app.test_client()
+        self.session, self.base = create_session()
+
+    def tearDown(self):
+        self.session.set_status("Pronto", is_running=False)
+
+    def test_logs_since_cursor(self):
+        first = self.session.log("primeiro")
+        self.session.log("segundo")
+
+        data = self.client.get(f"{self.base}/logs?since={first['seq']}").json
+        self.assertEqual([e["message"] for e in data["logs"]], ["segundo"])
+
+        data = self.client.get(f"{self.base}/logs?since={data['last_seq']}").json
+        self.assertEqual(data["logs"], [])
+
+
+class TestSessions(unittest.TestCase):
+    def test_sessions_are_isolated(self):
+        client = web_gui.app.test_client()
+        first, first_base = create_session("primeira")
+        second, second_base = create_session("segunda")
+        first.log("só na primeira")
+        second.store_screenshot(b"png", "https://example.com")
+
+        self.assertEqual(len(client.get(f"{second_base}/logs").json["logs"]), 0)
+        self.assertEqual(client.get(f"{first_base}/screenshot.png").status_code, 404)
+        self.assertEqual(client.get("/api/sessions/inexistente/status").status_code, 404)
+        # Rotas legadas usam a sessão mais recente
+        self.assertEqual(client.get("/api/status").json["session_id"], second.id)
+
+        for session in (first, second):
+            session.set_status("Concluído", is_running=False)
+            self.assertEqual(client.delete(f"/api/sessions/{session.id}").status_code, 200)
+
+    def test_retention_limit_evicts_oldest_finished_session(self):
+        registry = SessionRegistry(max_sessions=2)
+        first = registry.create({"query": "a"})
+        second = registry.create({"query": "b"})
+        # Registro cheio de sessões ativas: nova sessão é rejeitada
+        with self.assertRaises(SessionLimitError):
+            registry.create({"query": "c"})
+
+        first.set_status("Concluído", is_running=False)
+        second.set_status("Concluído", is_running=False)
+        # A sessão finalizada mais antiga é descartada para abrir espaço
+        registry.create({"query": "c"})
+        self.assertIsNone(registry.get(first.id))
+        self.assertIsNotNone(registry.get(second.id))
+
+    def test_stop_cancels_running_session(self):
+        client = web_gui.app.test_client()
+        session, base = create_session()
+        session.set_status("Executando...", is_running=True)
+
+        self.assertEqual(client.post(f"{base}/stop").status_code, 200)
+        self.assertTrue(session.cancellation.cancelled)
+        self.assertEqual(session.status, "Parando...")
+
+        # O worker do agente conclui a sessão como cancelada
+        session.cancellation.mark_released()
+        web_gui.finish_cancelled(session)
+        self.assertFalse(session.is_running)
+        self.assertEqual(session.status, "Cancelado")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Contabilidade de tokens e custo de uma execução do agente
+
+Cada resposta do modelo traz usage_metadata: tokens do prompt (separados em
+texto e imagem por prompt_tokens_details), da resposta, de raciocínio
+(thoughts) e em cache. TokenUsage acumula esses números por passo e no total
+da execução, estima o custo e informa quando um orçamento de tokens ou de
+custo foi ultrapassado.
+
+Os preços (USD por milhão de tokens) vêm de TOKEN_PRICE_INPUT_PER_M,
+TOKEN_PRICE_OUTPUT_PER_M e TOKEN_PRICE_CACHED_PER_M; os padrões são os da
+faixa de prompt até 200k do Gemini 2.5 Pro e devem ser ajustados ao modelo
+e à tabela de preços vigente.
+"""
+
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+DEFAULT_INPUT_PRICE_PER_M = 1.25
+DEFAULT_OUTPUT_PRICE_PER_M = 10.0
+DEFAULT_CACHED_PRICE_PER_M = 0.125
+
+
+@dataclass
+class TokenPricing:
+    """Preço por milhão de tokens (USD)"""
+
+    input_per_m: float = DEFAULT_INPUT_PRICE_PER_M
+    output_per_m: float = DEFAULT_OUTPUT_PRICE_PER_M
+    cached_per_m: float = DEFAULT_CACHED_PRICE_PER_M
+
+    @classmethod
+    def from_env(cls) -> "TokenPricing":
+        return cls(
+            input_per_m=float(os.environ.get('TOKEN_PRICE_INPUT_PER_M', DEFAULT_INPUT_PRICE_PER_M)),
+            output_per_m=float(os.environ.get('TOKEN_PRICE_OUTPUT_PER_M', DEFAULT_OUTPUT_PRICE_PER_M)),
+            cached_per_m=float(os.environ.get('TOKEN_PRICE_CACHED_PER_M', DEFAULT_CACHED_PRICE_PER_M)),
+        )
+
+
+@dataclass
+class StepUsage:
+    """Tokens de uma chamada ao modelo (ou a soma de várias)"""
+
+    prompt: int = 0
+    prompt_text: int = 0
+    prompt_image: int = 0
+    cached: int = 0
+    candidates: int = 0
+    thoughts: int = 0
+    total: int = 0
+    cost_usd: float = 0.0
+
+    def __iadd__(self, other: "StepUsage") -> "StepUsage":
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+
+
+def _count(usage: Any, name: str) -> int:
+    value = getattr(usage, name, None)
+    return value if isinstance(value, int) else 0
+
+
+def _modality_count(details: Any, modality: str) -> int:
+    total = 0
+    for detail in details or ():
+        detail_modality = getattr(detail, 'modality', None)
+        if getattr(detail_modality, 'value', detail_modality) == modality:
+            total += _count(detail, 'token_count')
+    return total
+
+
+@dataclass
+class TokenUsage:
+    """Tokens e custo acumulados de uma execução, com orçamento opcional"""
+
+    pricing: TokenPricing = field(default_factory=TokenPricing.from_env)
+    token_budget: Optional[int] = None
+    cost_budget: Optional[float] = None
+    steps: List[StepUsage] = field(default_factory=list)
+    totals: StepUsage = field(default_factory=StepUsage)
+
+    def add(self, usage_metadata: Any) -> StepUsage:
+        """Registra o usage_metadata de uma resposta e devolve os tokens do passo
+
+        Args:
+            usage_metadata: GenerateContentResponseUsageMetadata (ou None)
+
+        Returns:
+            StepUsage do passo, com o custo estimado
+        """
+        prompt = _count(usage_metadata, 'prompt_token_count')
+        cached = _count(usage_metadata, 'cached_content_token_count')
+        # Raciocínio é cobrado como saída; tokens de ferramentas como entrada
+        tool_prompt = _count(usage_metadata, 'tool_use_prompt_token_count')
+        output = _count(usage_metadata, 'candidates_token_count') + _count(usage_metadata, 'thoughts_token_count')
+        details = getattr(usage_metadata, 'prompt_tokens_details', None)
+        step = StepUsage(
+            prompt=prompt,
+            prompt_text=_modality_count(details, 'TEXT'),
+            prompt_image=_modality_count(details, 'IMAGE'),
+            cached=cached,
+            candidates=_count(usage_metadata, 'candidates_token_count'),
+            thoughts=_count(usage_metadata, 'thoughts_token_count'),
+            total=_count(usage_metadata, 'total_token_count'),
+            cost_usd=(
+                (max(0, prompt - cached) + tool_prompt) * self.pricing.input_per_m
+                + cached * self.pricing.cached_per_m
+                + output * self.pricing.output_per_m
+            ) / 1_000_000,
+        )
+        self.steps.append(step)
+        self.totals += step
+        return step
+
+    def budget_exceeded(self) -> Optional[str]:
+        """Descrição do orçamento ultrapassado, ou None"""
+        if self.token_budget and self.totals.total > self.token_budget:
+            return f"{self.totals.total} tokens > orçamento de {self.token_budget}"
+        if self.cost_budget and self.totals.cost_usd > self.cost_budget:
+            return f"US$ {self.totals.cost_usd:.4f} > orçamento de US$ {self.cost_budget:.4f}"
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.totals),
+            'cost_usd': round(self.totals.cost_usd, 6),
+            'steps': len(self.steps),
+            'token_budget': self.token_budget,
+            'cost_budget': self.cost_budget,
+        }
+
+    def format_summary(self) -> str:
+        t = self.totals
+        return (
+            f"{t.total} tokens em {len(self.steps)} chamadas ao modelo "
+            f"(prompt {t.prompt}: texto {t.prompt_text}, imagem {t.prompt_image}, cache {t.cached}; "
+            f"resposta {t.candidates}, raciocínio {t.thoughts}) - custo estimado US$ {t.cost_usd:.4f}"
+        )
+
+
+def budget_from_env(name: str, cast):
+    """Orçamento padrão do ambiente; vazio ou 0 = sem limite"""
+    value = cast(os.environ.get(name) or 0)
+    return value or None
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Spans de rastreamento do agente (loop, passos, modelo, ações, navegador)
+
+Cada span tem nome, início, duração, atributos e pai (o span ativo na mesma
+thread/contexto), no modelo do OpenTelemetry. Os spans terminados vão para:
+
+- um arquivo no formato Chrome trace-event (chrome://tracing, Perfetto),
+  escrito incrementalmente: TRACE_SPANS_FILE ou --trace_spans em main.py;
+- um coletor OTLP/HTTP (JSON, sem dependências), em lotes por uma thread
+  de fundo, quando OTEL_EXPORTER_OTLP_ENDPOINT (ou
+  OTEL_EXPORTER_OTLP_TRACES_ENDPOINT) está definido.
+
+Desativado (padrão), span() devolve um objeto nulo compartilhado: o custo é
+uma chamada de função e um with vazio.
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+SERVICE_NAME = "gemini-computer-use"
+# Lote máximo e intervalo de envio ao coletor OTLP
+OTLP_BATCH_SIZE = 512
+OTLP_FLUSH_INTERVAL = 2.0
+OTLP_QUEUE_SIZE = 10000
+OTLP_TIMEOUT = 5.0
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_tracer: Optional["Tracer"] = None
+_configure_lock = threading.Lock()
+
+
+class Span:
+    """Intervalo cronometrado; usado como context manager"""
+
+    __slots__ = (
+        "name", "attributes", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+        "error", "thread_id", "thread_name", "_tracer", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            self.trace_id = random.getrandbits(128)
+            self.parent_id = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        self.span_id = random.getrandbits(64)
+        thread = threading.current_thread()
+        self.thread_id = thread.native_id
+        self.thread_name = thread.name
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_val}"
+        self._tracer.export(self)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes: Any):
+    """Span filho do span ativo (ou raiz de um novo trace); nulo se o tracing estiver desligado"""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return Span(tracer, name, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class ChromeTraceExporter:
+    """Eventos "X" (completos) em um array JSON; o arquivo abre mesmo se o processo morrer antes do fechamento"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._first = True
+        self._threads = set()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        args = dict(span.attributes)
+        if span.error:
+            args["error"] = span.error
+        event = {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": self._pid,
+            "tid": span.thread_id,
+            "args": args,
+        }
+        with self._lock:
+            if self._file.closed:
+                return
+            if span.thread_id not in self._threads:
+                self._threads.add(span.thread_id)
+                self._write({
+                    "name": "thread_name", "ph": "M", "pid": self._pid, "tid": span.thread_id,
+                    "args": {"name": span.thread_name},
+                })
+            self._write(event)
+            self._file.flush()
+
+    def _write(self, event: Dict[str, Any]):
+        if not self._first:
+            self._file.write(",\n")
+        self._first = False
+        self._file.write(json.dumps(event, ensure_ascii=False, default=str))
+
+    def shutdown(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write("\n]\n")
+                self._file.close()
+
+
+class OtlpExporter:
+    """Envia spans em lotes para um coletor OTLP/HTTP com codificação JSON"""
+
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None, service_name: str = SERVICE_NAME):
+        self.endpoint = endpoint
+        self._headers = {"Content-Type": "application/json", **(headers or {})}
+        self._resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=OTLP_QUEUE_SIZE)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join(OTLP_TIMEOUT * 2)
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + OTLP_FLUSH_INTERVAL
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = False
+            if item:
+                batch.append(item)
+            if item is None or len(batch) >= OTLP_BATCH_SIZE or time.monotonic() >= deadline:
+                if batch:
+                    self._send(batch)
+                    batch = []
+                deadline = time.monotonic() + OTLP_FLUSH_INTERVAL
+            if item is None:
+                return
+
+    def _send(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [_otlp_span(s) for s in spans]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload, default=str).encode(), headers=self._headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=OTLP_TIMEOUT) as response:
+                response.read()
+        except OSError as e:
+            logger.warning("Falha ao enviar %s spans para %s: %s", len(spans), self.endpoint, e)
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": f"{span.trace_id:032x}",
+        "spanId": f"{span.span_id:016x}",
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items() if value is not None]
+        + [_otlp_attribute("thread.name", span.thread_name)],
+        "status": {"code": 2, "message": span.error} if span.error else {},
+    }
+    if span.parent_id is not None:
+        encoded["parentSpanId"] = f"{span.parent_id:016x}"
+    return encoded
+
+
+class Tracer:
+    """Distribui os spans terminados entre os exportadores"""
+
+    def __init__(self, exporters: list):
+        self.exporters = exporters
+
+    def export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning("Falha ao exportar span %s: %s", span.name, e)
+
+    def shutdown(self):
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+def _otlp_endpoint_from_env() -> Optional[str]:
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+    if endpoint:
+        return endpoint
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if endpoint:
+        return endpoint.rstrip("/") + "/v1/traces"
+    return None
+
+
+def _otlp_headers_from_env() -> Dict[str, str]:
+    headers = {}
+    for pair in os.environ.get("OTEL_EXPORTER_OTLP_HEADERS", "").split(","):
+        key, sep, value = pair.partition("=")
+        if sep and key.strip():
+            headers[key.strip()] = urllib.parse.unquote(value.strip())
+    return headers
+
+
+def configure_tracing(chrome_trace: Optional[str] = None, otlp_endpoint: Optional[str] = None) -> Optional[Tracer]:
+    """Liga o tracing com os exportadores informados ou definidos no ambiente.
+
+    Args:
+        chrome_trace: Arquivo trace-event (padrão: TRACE_SPANS_FILE)
+        otlp_endpoint: URL completa do coletor, ex. http://localhost:4318/v1/traces
+            (padrão: variáveis OTEL_EXPORTER_OTLP_*)
+
+    Returns:
+        O tracer ativo, ou None se nenhum exportador foi configurado
+    """
+    global _tracer
+    chrome_trace = chrome_trace or os.environ.get("TRACE_SPANS_FILE")
+    otlp_endpoint = otlp_endpoint or _otlp_endpoint_from_env()
+    exporters = []
+    if chrome_trace:
+        exporters.append(ChromeTraceExporter(chrome_trace))
+    if otlp_endpoint:
+        exporters.append(OtlpExporter(
+            otlp_endpoint, _otlp_headers_from_env(), os.environ.get("OTEL_SERVICE_NAME", SERVICE_NAME)
+        ))
+    with _configure_lock:
+        previous, _tracer = _tracer, (Tracer(exporters) if exporters else None)
+    if previous is not None:
+        previous.shutdown()
+    if _tracer is not None:
+        logger.info("Tracing ativo: %s", ", ".join(type(e).__name__ for e in exporters))
+    return _tracer
+
+
+def shutdown_tracing():
+    """Desliga o tracing, fechando o arquivo e enviando os spans pendentes"""
+    global _tracer
+    with _configure_lock:
+        previous, _tracer = _tracer, None
+    if previous is not None:
+        previous.shutdown()
+
+
+atexit.register(shutdown_tracing)
@@ -18,9 +18,8 @@ Interface Web para Gemini Computer Use
 Acesse em: http://localhost:8080 (ou porta especificada)
 """
 
-from flask import Flask, render_template_string, request, jsonify, Response
+from flask import Flask, render_template_string, request, jsonify, Response, stream_with_context, abort, redirect
 import threading
-import queue
 import base64
 import json
 import os
@@ -28,29 +27,62 @@ import time
 from io import BytesIO
 
 from agent import BrowserAgent
-from computers import BrowserbaseComputer, PlaywrightComputer, EnvState
-from logger_config import setup_logger, get_logger
+from computers import AgentCancelled, BrowserbaseComputer, PlaywrightComputer, EnvState
+from logger_config import add_log_file, get_logger, log_context
+from event_broker import TooManyClientsError, format_sse
+from sessions import AgentSession, SessionRegistry, SessionLimitError
+from job_queue import JobScheduler, QueueFullError, SchedulerClosedError
+from screenshot_variants import VARIANTS, get_renderer
+from metrics import REGISTRY as METRICS, STEPS
+from tracing import configure_tracing
 
 PLAYWRIGHT_SCREEN_SIZE = (1440, 900)
+# Segundos aguardando os agentes cancelados liberarem o navegador no desligamento
+CANCEL_GRACE_SECONDS = 10
 
-# Configurar logging para Flask e aplicação
-setup_logger("gemini_computer_use", log_file="logs/app.log", detailed=True)
+# Configurar logging para Flask e aplicação: o arquivo fica no logger raiz,
+# que recebe (por propagação) os registros de todos os loggers do projeto
+add_log_file("", "logs/app.log", detailed=True)
+# Spans só com TRACE_SPANS_FILE ou OTEL_EXPORTER_OTLP_ENDPOINT definidos
+configure_tracing()
 logger = get_logger(__name__)
 flask_logger = get_logger("flask")
 
 app = Flask(__name__)
 
-# Estado global
-agent_state = {
-    'is_running': False,
-    'logs': [],
-    'latest_screenshot': None,
-    'status': 'Pronto',
-    'current_url': None,
-    'agent_thread': None,
-    'log_queue': queue.Queue(),
-    'screenshot_queue': queue.Queue(),
-}
+# Registro de sessões: cada execução do agente tem logs, screenshot, status
+# e canal SSE próprios
+sessions = SessionRegistry()
+
+# Sessão vazia usada pelas rotas legadas (/api/*) antes da primeira execução
+_idle_session = AgentSession('idle')
+
+# Limite global de streams SSE abertos: cada stream ocupa uma thread do
+# servidor, então o limite deve deixar threads livres para as demais rotas
+_stream_slots = threading.BoundedSemaphore(int(os.environ.get('WEB_MAX_STREAMS', 500)))
+
+
+def configure_stream_limit(max_streams):
+    """Ajusta o limite de streams SSE simultâneos (chamar antes de servir)"""
+    global _stream_slots
+    _stream_slots = threading.BoundedSemaphore(max(1, max_streams))
+
+
+def resolve_session(session_id=None):
+    """
+    Obtém a sessão de uma rota
+
+    Rotas /api/sessions/<id>/... usam a sessão indicada (404 se não existir).
+    As rotas legadas /api/... usam a sessão mais recente.
+    """
+    if session_id is None:
+        return sessions.latest() or _idle_session
+    session = sessions.get(session_id)
+    if session is None:
+        response = jsonify({'error': 'Sessão não encontrada', 'session_id': session_id})
+        response.status_code = 404
+        abort(response)
+    return session
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -298,6 +330,16 @@ HTML_TEMPLATE = """
                         </small>
                     </div>
                     
+                    <div class="form-group">
+                        <div class="checkbox-group">
+                            <input type="checkbox" id="reuse_session" name="reuse_session">
+                            <label for="reuse_session">Reutilizar sessão autenticada do serviço</label>
+                        </div>
+                        <small style="color: #666; font-size: 12px; margin-top: 5px; display: block;">
+                            Salva cookies após um login bem-sucedido (criptografados) e os restaura nas próximas execuções
+                        </small>
+                    </div>
+                    
                     <div class="form-group">
                         <label for="env">Ambiente:</label>
                         <select id="env" name="env">
@@ -311,6 +353,29 @@ HTML_TEMPLATE = """
                         <input type="url" id="initial_url" name="initial_url" value="https://www.google.com">
                     </div>
                     
+                    <div class="form-group">
+                        <label for="resource_profile">Bloqueio de recursos:</label>
+                        <select id="resource_profile" name="resource_profile">
+                            <option value="none">Nenhum</option>
+                            <option value="no-media">Sem mídia (vídeo, áudio e fontes)</option>
+                            <option value="no-third-party-trackers">Sem rastreadores de terceiros</option>
+                            <option value="lean">Enxuto (mídia + rastreadores)</option>
+                        </select>
+                    </div>
+                    
+                    <div class="form-group">
+                        <label for="block_domains">Domínios bloqueados (opcional):</label>
+                        <input type="text" id="block_domains" name="block_domains" placeholder="ex: ads.example.com, cdn.tracker.net">
+                    </div>
+                    
+                    <div class="form-group">
+                        <label for="browser_profile">Perfil persistente do navegador (opcional):</label>
+                        <input type="text" id="browser_profile" name="browser_profile" placeholder="ex: github">
+                        <small style="color: #666; font-size: 12px; margin-top: 5px; display: block;">
+                            Reutiliza cookies e cache HTTP entre execuções (apenas Playwright)
+                        </small>
+                    </div>
+                    
                     <div class="form-group">
                         <label for="model">Modelo:</label>
                         <input type="text" id="model" name="model" value="gemini-2.5-computer-use-preview-10-2025">
@@ -323,6 +388,16 @@ HTML_TEMPLATE = """
                         </div>
                     </div>
                     
+                    <div class="form-group">
+                        <label for="sessionSelect">Sessão acompanhada:</label>
+                        <select id="sessionSelect" onfocus="loadSessions()" onchange="attachSession(this.value)">
+                            <option value="">Nova sessão</option>
+                        </select>
+                        <small style="color: #666; font-size: 12px; margin-top: 5px; display: block;">
+                            Cada execução tem sua própria sessão; compartilhe o link da página para acompanhá-la
+                        </small>
+                    </div>
+                    
                     <div class="buttons">
                         <button type="button" class="btn-primary" id="startBtn" onclick="startAgent()">▶ Iniciar</button>
                         <button type="button" class="btn-danger" id="stopBtn" onclick="stopAgent()" disabled>⏹ Parar</button>
@@ -350,13 +425,12 @@ HTML_TEMPLATE = """
                 <span class="status-indicator ready" id="statusIndicator"></span>
                 <span id="statusText">Pronto</span>
             </div>
+            <div id="tokenUsage" style="font-size: 12px; opacity: 0.8;"></div>
             <div id="currentUrl" style="font-size: 12px; opacity: 0.8;"></div>
         </div>
     </div>
     
     <script>
-        let updateInterval;
-        
         function addLog(message, level = 'info') {
             const logsDiv = document.getElementById('logs');
             const entry = document.createElement('div');
@@ -367,46 +441,202 @@ HTML_TEMPLATE = """
             logsDiv.scrollTop = logsDiv.scrollHeight;
         }
         
+        let lastScreenshotVersion = 0;
+        
+        // Sessão acompanhada (?session=<id>); sem sessão, as rotas legadas
+        // /api/... mostram a execução mais recente
+        let sessionId = new URLSearchParams(window.location.search).get('session');
+        
+        function apiUrl(path) {
+            return sessionId ? `/api/sessions/${sessionId}${path}` : `/api${path}`;
+        }
+        
+        function applyStatus(data) {
+            document.getElementById('statusText').textContent = data.status;
+            const indicator = document.getElementById('statusIndicator');
+            indicator.className = 'status-indicator ' + (data.is_running ? 'running' : 'ready');
+            
+            if (data.current_url) {
+                document.getElementById('currentUrl').textContent = data.current_url;
+            }
+            if (data.token_usage) {
+                const usage = data.token_usage;
+                document.getElementById('tokenUsage').textContent =
+                    `${usage.total} tokens (${usage.prompt_image} de imagem) · US$ ${usage.cost_usd.toFixed(4)}`;
+            }
+            
+            const startBtn = document.getElementById('startBtn');
+            const stopBtn = document.getElementById('stopBtn');
+            startBtn.disabled = data.is_running;
+            stopBtn.disabled = !data.is_running;
+            
+            updateScreenshot(data.screenshot_version);
+        }
+        
         function updateStatus() {
-            fetch('/api/status')
+            const id = sessionId;
+            return fetch(apiUrl('/status'))
                 .then(r => r.json())
                 .then(data => {
-                    document.getElementById('statusText').textContent = data.status;
-                    const indicator = document.getElementById('statusIndicator');
-                    indicator.className = 'status-indicator ' + (data.is_running ? 'running' : 'ready');
-                    
-                    if (data.current_url) {
-                        document.getElementById('currentUrl').textContent = data.current_url;
+                    // Resposta de uma sessão que já não está na tela
+                    if (id === sessionId) {
+                        applyStatus(data);
                     }
-                    
-                    const startBtn = document.getElementById('startBtn');
-                    const stopBtn = document.getElementById('stopBtn');
-                    startBtn.disabled = data.is_running;
-                    stopBtn.disabled = !data.is_running;
+                    return data;
                 });
         }
         
+        // Cursor do último log recebido - o servidor envia apenas o que é novo
+        let lastLogSeq = 0;
+        
+        function appendLogEntry(log) {
+            if (log.seq <= lastLogSeq) {
+                return;
+            }
+            lastLogSeq = log.seq;
+            addLog(log.message, log.level);
+        }
+        
         function updateLogs() {
-            fetch('/api/logs')
+            const id = sessionId;
+            return fetch(apiUrl(`/logs?since=${lastLogSeq}`))
                 .then(r => r.json())
                 .then(data => {
-                    const logsDiv = document.getElementById('logs');
-                    const currentLength = logsDiv.children.length;
-                    if (data.logs.length > currentLength) {
-                        data.logs.slice(currentLength).forEach(log => {
-                            addLog(log.message, log.level);
-                        });
+                    if (id !== sessionId) {
+                        return lastLogSeq;
                     }
+                    data.logs.forEach(appendLogEntry);
+                    lastLogSeq = Math.max(lastLogSeq, data.last_seq);
+                    return lastLogSeq;
                 });
         }
         
-        function updateScreenshot() {
-            fetch('/api/screenshot')
-                .then(r => r.json())
-                .then(data => {
-                    const container = document.getElementById('screenshotContainer');
-                    if (data.screenshot) {
-                        container.innerHTML = `<img src="data:image/png;base64,${data.screenshot}" alt="Screenshot">`;
+        // Baixa a imagem binária apenas quando a versão avança
+        function updateScreenshot(version) {
+            if (!version || version <= lastScreenshotVersion) {
+                return;
+            }
+            lastScreenshotVersion = version;
+            const container = document.getElementById('screenshotContainer');
+            let img = container.querySelector('img');
+            if (!img) {
+                container.innerHTML = '';
+                img = document.createElement('img');
+                img.alt = 'Screenshot';
+                container.appendChild(img);
+            }
+            img.src = apiUrl(screenshotPath(version, container));
+        }
+        
+        // Baixa apenas a resolução exibida: variantes reduzidas geradas no servidor
+        function screenshotPath(version, container) {
+            const width = Math.min(container.clientWidth - 30, 960) * (window.devicePixelRatio || 1);
+            if (width <= 600) {
+                return `/screenshot/${version}/thumb.jpg`;
+            }
+            if (width <= 960) {
+                return `/screenshot/${version}/preview.jpg`;
+            }
+            return `/screenshot/${version}.png`;
+        }
+        
+        // Canal de eventos (SSE). Se não estiver disponível, usa polling adaptativo
+        // e tenta reabrir o SSE a cada SSE_RETRY_MS (ex: quando vagar um stream).
+        const SSE_RETRY_MS = 30000;
+        let eventSource = null;
+        let sseRetryTimer = null;
+        function stopEvents() {
+            if (eventSource) {
+                eventSource.close();
+                eventSource = null;
+            }
+            clearTimeout(sseRetryTimer);
+            stopAdaptivePolling();
+        }
+        
+        function connectEvents() {
+            if (eventSource) {
+                eventSource.close();
+                eventSource = null;
+            }
+            if (!window.EventSource) {
+                startAdaptivePolling();
+                return;
+            }
+            const source = new EventSource(apiUrl('/events'));
+            eventSource = source;
+            let failures = 0;
+            source.addEventListener('open', () => {
+                failures = 0;
+                if (polling) {
+                    // SSE de volta: para o polling e busca o que chegou nesse meio-tempo
+                    stopAdaptivePolling();
+                    updateLogs();
+                }
+            });
+            source.addEventListener('status', e => applyStatus(JSON.parse(e.data)));
+            source.addEventListener('log', e => {
+                const log = JSON.parse(e.data);
+                if (log.seq > lastLogSeq + 1) {
+                    // Lacuna (ex: eventos descartados) - buscar o que faltou
+                    updateLogs().then(() => appendLogEntry(log));
+                } else {
+                    appendLogEntry(log);
+                }
+            });
+            source.addEventListener('screenshot', e => {
+                updateScreenshot(JSON.parse(e.data).version);
+            });
+            source.addEventListener('resync', () => {
+                updateStatus();
+                updateLogs();
+            });
+            source.onerror = () => {
+                failures += 1;
+                if (source.readyState === EventSource.CLOSED || failures >= 3) {
+                    source.close();
+                    if (eventSource === source) {
+                        eventSource = null;
+                    }
+                    if (!polling) {
+                        startAdaptivePolling();
+                    }
+                    clearTimeout(sseRetryTimer);
+                    sseRetryTimer = setTimeout(connectEvents, SSE_RETRY_MS);
+                }
+            };
+        }
+        
+        // Polling adaptativo: 1s enquanto há mudanças, até 10s quando ocioso
+        let pollDelay = 1000;
+        let lastPollSignature = null;
+        let pollTimer = null;
+        let polling = false;
+        function stopAdaptivePolling() {
+            polling = false;
+            clearTimeout(pollTimer);
+            pollTimer = null;
+        }
+        
+        function startAdaptivePolling() {
+            clearTimeout(pollTimer);
+            polling = true;
+            const id = sessionId;
+            Promise.all([updateStatus(), updateLogs()])
+                .then(([status, logSeq]) => {
+                    const signature = JSON.stringify(status) + ':' + logSeq;
+                    if (signature === lastPollSignature) {
+                        pollDelay = Math.min(pollDelay * 2, 10000);
+                    } else {
+                        pollDelay = 1000;
+                    }
+                    lastPollSignature = signature;
+                })
+                .catch(() => { pollDelay = Math.min(pollDelay * 2, 10000); })
+                .finally(() => {
+                    // Parado ou trocado de sessão enquanto a requisição estava em andamento
+                    if (polling && id === sessionId) {
+                        pollTimer = setTimeout(startAdaptivePolling, pollDelay);
                     }
                 });
         }
@@ -416,9 +646,10 @@ HTML_TEMPLATE = """
             const formData = new FormData(form);
             const data = Object.fromEntries(formData);
             data.highlight_mouse = document.getElementById('highlight_mouse').checked;
+            data.reuse_session = document.getElementById('reuse_session').checked;
             data.service = document.getElementById('service').value;
             
-            fetch('/api/start', {
+            fetch('/api/sessions', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify(data)
@@ -426,8 +657,9 @@ HTML_TEMPLATE = """
             .then(r => r.json())
             .then(data => {
                 if (data.success) {
-                    addLog('Agente iniciado', 'info');
-                    updateStatus();
+                    attachSession(data.session_id);
+                    const position = data.queue_position ? `, posição ${data.queue_position} na fila` : '';
+                    addLog(`Agente enfileirado (sessão ${data.session_id}${position})`, 'info');
                 } else {
                     addLog('Erro: ' + data.error, 'error');
                 }
@@ -435,7 +667,7 @@ HTML_TEMPLATE = """
         }
         
         function stopAgent() {
-            fetch('/api/stop', {method: 'POST'})
+            fetch(apiUrl('/stop'), {method: 'POST'})
                 .then(r => r.json())
                 .then(data => {
                     addLog('Solicitação de parada enviada', 'warning');
@@ -444,7 +676,7 @@ HTML_TEMPLATE = """
         }
         
         function clearLogs() {
-            fetch('/api/clear_logs', {method: 'POST'})
+            fetch(apiUrl('/clear_logs'), {method: 'POST'})
                 .then(r => r.json())
                 .then(data => {
                     document.getElementById('logs').innerHTML = '';
@@ -452,23 +684,58 @@ HTML_TEMPLATE = """
                 });
         }
         
+        // Passa a acompanhar outra sessão: reinicia cursores, imagem e canal de eventos
+        function attachSession(id) {
+            stopEvents();
+            sessionId = id || null;
+            const url = new URL(window.location.href);
+            if (sessionId) {
+                url.searchParams.set('session', sessionId);
+            } else {
+                url.searchParams.delete('session');
+            }
+            window.history.replaceState(null, '', url);
+            lastLogSeq = 0;
+            lastScreenshotVersion = 0;
+            lastPollSignature = null;
+            pollDelay = 1000;
+            document.getElementById('logs').innerHTML = '';
+            document.getElementById('screenshotContainer').innerHTML =
+                '<p style="color: #888;">Nenhuma screenshot disponível</p>';
+            loadSessions();
+            updateStatus();
+            updateLogs().then(connectEvents);
+        }
+        
+        function loadSessions() {
+            return fetch('/api/sessions')
+                .then(r => r.json())
+                .then(data => {
+                    const select = document.getElementById('sessionSelect');
+                    select.innerHTML = '<option value="">Nova sessão</option>';
+                    data.sessions.forEach(s => {
+                        const option = document.createElement('option');
+                        option.value = s.session_id;
+                        option.textContent = `${s.session_id} - ${s.status} - ${s.query.slice(0, 40)}`;
+                        option.selected = s.session_id === sessionId;
+                        select.appendChild(option);
+                    });
+                });
+        }
+        
         function reloadPage() {
             if (confirm('Deseja recarregar a página? Isso irá limpar todos os logs e resetar o estado.')) {
                 window.location.reload();
             }
         }
         
-        // Atualizar status, logs e screenshot periodicamente
-        updateInterval = setInterval(() => {
-            updateStatus();
-            updateLogs();
-            updateScreenshot();
-        }, 1000);
-        
-        // Atualizar ao carregar
+        // Atualizar ao carregar e assinar eventos em tempo real
+        loadSessions();
         updateStatus();
-        updateLogs();
-        addLog('Interface carregada. Pronto para usar!', 'info');
+        updateLogs().then(() => {
+            addLog('Interface carregada. Pronto para usar!', 'info');
+            connectEvents();
+        });
     </script>
 </body>
 </html>
@@ -478,25 +745,36 @@ HTML_TEMPLATE = """
 class BrowserAgentWebWrapper(BrowserAgent):
     """Wrapper do BrowserAgent para interface web"""
     
-    def __init__(self, browser_computer, query, model_name, state):
+    def __init__(self, browser_computer, query, model_name, session, token_budget=None, cost_budget=None):
         logger.info(f"Inicializando BrowserAgentWebWrapper - Query: {query[:100]}...")
         logger.debug(f"Modelo: {model_name}")
-        super().__init__(browser_computer, query, model_name, verbose=False)
-        self.state = state
+        super().__init__(
+            browser_computer,
+            query,
+            model_name,
+            verbose=False,
+            cancellation_token=session.cancellation,
+            run_id=session.id,
+            token_budget=token_budget,
+            cost_budget=cost_budget,
+        )
+        self.session = session
         self._original_query = query  # Armazenar query original para referência
+        if self.memory_monitor:
+            self.memory_monitor.add_source("screenshots", session.screenshot_bytes)
+            self.memory_monitor.add_source("viewer_queues", session.events.queued_bytes)
+            self.memory_monitor.add_source("logs", session.log_bytes)
         logger.info("BrowserAgentWebWrapper inicializado com sucesso")
         
     def handle_action(self, action):
         """Override para capturar screenshots"""
-        logger.debug(f"BrowserAgentWebWrapper.handle_action: {action.name}")
+        logger.debug("BrowserAgentWebWrapper.handle_action: %s", action.name)
         result = super().handle_action(action)
         
         if isinstance(result, EnvState):
-            # Adicionar screenshot à fila
-            screenshot_size = len(result.screenshot)
-            logger.debug(f"Screenshot capturada: {screenshot_size} bytes, URL: {result.url}")
-            self.state['screenshot_queue'].put(result.screenshot)
-            self.state['current_url'] = result.url
+            # Publicar nova screenshot (versão + ETag)
+            logger.debug("Screenshot capturada: %s bytes, URL: %s", len(result.screenshot), result.url)
+            self.session.store_screenshot(result.screenshot, result.url)
             self._log(f"Ação executada: {action.name}", "info")
             self._log(f"URL atual: {result.url}", "info")
         
@@ -504,29 +782,21 @@ class BrowserAgentWebWrapper(BrowserAgent):
         
     def _log(self, message, level="info"):
         """Adicionar log"""
-        timestamp = time.strftime("%H:%M:%S")
-        log_entry = {
-            'timestamp': timestamp,
-            'message': message,
-            'level': level
-        }
-        self.state['log_queue'].put(log_entry)
-        self.state['logs'].append(log_entry)
-        # Manter apenas os últimos 1000 logs
-        if len(self.state['logs']) > 1000:
-            self.state['logs'] = self.state['logs'][-1000:]
+        self.session.log(message, level)
         
         # Também logar no sistema de logging
         log_func = getattr(logger, level, logger.info)
-        log_func(f"[WebGUI] {message}")
+        log_func("[WebGUI:%s] %s", self.session.id, message)
             
     def run_one_iteration(self):
         """Override para capturar logs"""
         from google.genai.types import FinishReason
         
+        STEPS.inc()
         try:
             self._log("Gerando resposta do Gemini Computer Use...", "info")
             response = self.get_model_response()
+            self.session.token_usage = self.usage.as_dict()
         except Exception as e:
             self._log(f"Erro ao gerar resposta: {e}", "error")
             return "COMPLETE"
@@ -634,6 +904,7 @@ class BrowserAgentWebWrapper(BrowserAgent):
         if not function_calls:
             self._log(f"Loop do agente concluído: {reasoning}", "info")
             self.final_reasoning = reasoning
+            self._record_trace_step(reasoning, candidate)
             return "COMPLETE"
             
         # Log das chamadas de função
@@ -651,6 +922,7 @@ class BrowserAgentWebWrapper(BrowserAgent):
                 
         # Processar chamadas de função
         function_responses = []
+        encoding_seconds = 0.0
         for function_call in function_calls:
             extra_fr_fields = {}
             if function_call.args and (
@@ -663,68 +935,23 @@ class BrowserAgentWebWrapper(BrowserAgent):
                 extra_fr_fields["safety_acknowledgement"] = "true"
                 
             self._log(f"Executando: {function_call.name}...", "info")
+            action_start = time.perf_counter()
             fc_result = self.handle_action(function_call)
-            
-            if isinstance(fc_result, EnvState):
-                from google.genai.types import FunctionResponse, FunctionResponsePart, FunctionResponseBlob
-                function_responses.append(
-                    FunctionResponse(
-                        name=function_call.name,
-                        response={
-                            "url": fc_result.url,
-                            **extra_fr_fields,
-                        },
-                        parts=[
-                            FunctionResponsePart(
-                                inline_data=FunctionResponseBlob(
-                                    mime_type="image/png", data=fc_result.screenshot
-                                )
-                            )
-                        ],
-                    )
-                )
-            elif isinstance(fc_result, dict):
-                from google.genai.types import FunctionResponse
-                function_responses.append(
-                    FunctionResponse(name=function_call.name, response=fc_result)
-                )
-                
-        from google.genai.types import Content, Part
-        self._contents.append(
-            Content(
-                role="user",
-                parts=[Part(function_response=fr) for fr in function_responses],
+            self._record_trace_step(
+                reasoning,
+                candidate,
+                function_call=function_call,
+                result=fc_result,
+                action_seconds=time.perf_counter() - action_start,
             )
-        )
-        
-        # Limpar screenshots antigas
-        from agent import MAX_RECENT_TURN_WITH_SCREENSHOTS, PREDEFINED_COMPUTER_USE_FUNCTIONS
-        turn_with_screenshots_found = 0
-        for content in reversed(self._contents):
-            if content.role == "user" and content.parts:
-                has_screenshot = False
-                for part in content.parts:
-                    if (
-                        part.function_response
-                        and part.function_response.parts
-                        and part.function_response.name
-                        in PREDEFINED_COMPUTER_USE_FUNCTIONS
-                    ):
-                        has_screenshot = True
-                        break
-                        
-                if has_screenshot:
-                    turn_with_screenshots_found += 1
-                    if turn_with_screenshots_found > MAX_RECENT_TURN_WITH_SCREENSHOTS:
-                        for part in content.parts:
-                            if (
-                                part.function_response
-                                and part.function_response.parts
-                                and part.function_response.name
-                                in PREDEFINED_COMPUTER_USE_FUNCTIONS
-                            ):
-                                part.function_response.parts = None
-                                
+            encoding_start = time.perf_counter()
+            function_response = self._function_response(function_call, fc_result, extra_fr_fields)
+            if function_response is not None:
+                function_responses.append(function_response)
+            encoding_seconds += time.perf_counter() - encoding_start
+                
+        # Histórico, limpeza de screenshots antigas e métricas (comum ao BrowserAgent)
+        self._finish_step(function_responses, encoding_seconds)
         return "CONTINUE"
         
     def _get_safety_confirmation(self, safety):
@@ -736,28 +963,35 @@ class BrowserAgentWebWrapper(BrowserAgent):
         return "CONTINUE"
 
 
-def run_agent_thread(config, state):
+def run_agent_thread(config, session):
     """Executa o agente em uma thread separada"""
     thread_logger = get_logger("agent_thread")
     
     try:
         thread_logger.info("=" * 60)
-        thread_logger.info("Thread do agente iniciada")
+        thread_logger.info(f"Thread do agente iniciada (sessão {session.id})")
         thread_logger.info("=" * 60)
         
-        state['is_running'] = True
-        state['status'] = 'Executando...'
+        session.set_status('Executando...', is_running=True)
         
         env_name = config.get('env', 'playwright')
         initial_url = config.get('initial_url', 'https://www.google.com')
         highlight_mouse = config.get('highlight_mouse', False)
         model_name = config.get('model', 'gemini-2.5-computer-use-preview-10-2025')
         query = config.get('query', '')
+        resource_profile = config.get('resource_profile') or 'none'
+        block_domains = config.get('block_domains') or ''
+        blocked_domains = [d for d in block_domains.split(',') if d.strip()]
+        browser_profile = (config.get('browser_profile') or '').strip() or None
+        service = config.get('service', 'github')  # Padrão: github
+        # Orçamento da execução (vazio = AGENT_TOKEN_BUDGET / AGENT_COST_BUDGET_USD)
+        token_budget = int(config['token_budget']) if config.get('token_budget') else None
+        cost_budget = float(config['cost_budget']) if config.get('cost_budget') else None
+        reuse_session = bool(config.get('reuse_session')) and env_name == "playwright"
         
         # Carregar e aplicar credenciais se disponíveis
         try:
             from credentials_loader import format_query
-            service = config.get('service', 'github')  # Padrão: github
             original_query = query
             query = format_query(query, service)
             if query != original_query:
@@ -771,6 +1005,16 @@ def run_agent_thread(config, state):
         thread_logger.info(f"  - URL inicial: {initial_url}")
         thread_logger.info(f"  - Highlight mouse: {highlight_mouse}")
         thread_logger.info(f"  - Modelo: {model_name}")
+        thread_logger.info(f"  - Bloqueio de recursos: {resource_profile} (+{len(blocked_domains)} domínios)")
+        thread_logger.info(f"  - Perfil persistente: {browser_profile or 'nenhum'}")
+        
+        # Restaurar sessão autenticada do serviço, se houver snapshot válido
+        restored_session = None
+        if reuse_session:
+            from session_store import get_store
+            restored_session = get_store().load(service)
+            if restored_session:
+                thread_logger.info(f"Sessão autenticada de {service} restaurada - login pode ser pulado")
         thread_logger.info(f"  - Query: {query[:200]}..." if len(query) > 200 else f"  - Query: {query}")
         
         # Criar ambiente
@@ -780,12 +1024,20 @@ def run_agent_thread(config, state):
                 screen_size=PLAYWRIGHT_SCREEN_SIZE,
                 initial_url=initial_url,
                 highlight_mouse=highlight_mouse,
+                resource_profile=resource_profile,
+                blocked_domains=blocked_domains,
+                profile_name=browser_profile,
+                storage_state=restored_session.storage_state if restored_session else None,
+                cancellation_token=session.cancellation,
             )
             thread_logger.info("PlaywrightComputer criado")
         elif env_name == "browserbase":
             env = BrowserbaseComputer(
                 screen_size=PLAYWRIGHT_SCREEN_SIZE,
-                initial_url=initial_url
+                initial_url=initial_url,
+                resource_profile=resource_profile,
+                blocked_domains=blocked_domains,
+                cancellation_token=session.cancellation,
             )
             thread_logger.info("BrowserbaseComputer criado")
         else:
@@ -803,30 +1055,68 @@ def run_agent_thread(config, state):
                 browser_computer=browser_computer,
                 query=query,
                 model_name=model_name,
-                state=state
+                session=session,
+                token_budget=token_budget,
+                cost_budget=cost_budget,
             )
             thread_logger.info("Agente criado - iniciando loop...")
             
             agent.agent_loop()
             
             thread_logger.info("Loop do agente finalizado")
+            session.resource_stats = browser_computer.resource_stats()
+            session.token_usage = agent.usage.as_dict()
+            agent._log(f"Uso de tokens: {agent.usage.format_summary()}", "info")
+            if agent.budget_exceeded:
+                agent._log(f"Execução interrompida: orçamento excedido ({agent.budget_exceeded})", "warning")
+            
+            if reuse_session and agent.final_reasoning and not agent.cancelled:
+                try:
+                    savings = get_store().record_run(
+                        service,
+                        browser_computer.storage_state(),
+                        steps=agent.iteration_count,
+                        tokens=agent.total_token_count,
+                        restored=restored_session,
+                    )
+                except (RuntimeError, OSError, ValueError) as e:
+                    agent._log(f"Não foi possível salvar a sessão de {service}: {e}", "warning")
+                    savings = None
+                if savings:
+                    agent._log(
+                        f"Sessão reutilizada: {savings['steps_saved']} passos e "
+                        f"{savings['tokens_saved']} tokens economizados",
+                        "info",
+                    )
             
-        state['status'] = 'Concluído'
-        state['is_running'] = False
+        if session.cancellation.cancelled:
+            finish_cancelled(session)
+        elif agent.budget_exceeded:
+            session.set_status('Orçamento excedido', is_running=False)
+        else:
+            session.set_status('Concluído', is_running=False)
         thread_logger.info("Thread do agente finalizada com sucesso")
         
+    except AgentCancelled:
+        # Cancelado antes do loop (ex.: durante a navegação inicial)
+        finish_cancelled(session)
     except Exception as e:
         thread_logger.error(f"Erro na thread do agente: {str(e)}", exc_info=True)
-        state['status'] = f'Erro: {str(e)}'
-        state['is_running'] = False
         import traceback
         error_trace = traceback.format_exc()
         thread_logger.error(f"Traceback completo:\n{error_trace}")
-        state['log_queue'].put({
-            'timestamp': time.strftime("%H:%M:%S"),
-            'message': f"Erro: {str(e)}\n{error_trace}",
-            'level': 'error'
-        })
+        session.log(f"Erro: {str(e)}\n{error_trace}", 'error')
+        session.set_status(f'Erro: {str(e)}', is_running=False)
+
+
+def finish_cancelled(session):
+    """Marca a sessão como cancelada e registra a latência até liberar o navegador"""
+    latency = session.cancellation.release_latency
+    if latency is not None:
+        session.log(f"Execução cancelada - navegador liberado em {latency:.2f}s", 'warning')
+    else:
+        session.log("Execução cancelada", 'warning')
+    session.set_status('Cancelado', is_running=False)
 
 
 @app.route('/')
@@ -836,102 +1126,288 @@ def index():
     return render_template_string(HTML_TEMPLATE)
 
 
+@app.route('/api/sessions', methods=['GET'])
+def list_sessions():
+    """Listar sessões (em execução e finalizadas recentemente)"""
+    return jsonify({
+        'sessions': [s.summary() for s in sessions.list()],
+        'max_sessions': sessions.max_sessions,
+        'queue': scheduler.stats(),
+    })
+
+
+@app.route('/api/queue', methods=['GET'])
+def get_queue_stats():
+    """Métricas da fila: espera, ocupação dos workers e jobs aguardando"""
+    return jsonify(scheduler.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas por passo do agente (modelo, ações, screenshots, tokens) no formato do Prometheus"""
+    return Response(METRICS.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/status', methods=['GET'])
-def get_status():
+@app.route('/api/sessions/<session_id>/status', methods=['GET'])
+def get_status(session_id=None):
     """Obter status atual"""
-    # Processar fila de screenshots
+    return jsonify(resolve_session(session_id).status_payload())
+
+
+@app.route('/api/events', methods=['GET'])
+@app.route('/api/sessions/<session_id>/events', methods=['GET'])
+def stream_events(session_id=None):
+    """Canal SSE com mudanças de status, novos logs e novas screenshots"""
+    session = resolve_session(session_id)
+    broker = session.events
+    slots = _stream_slots
+    if not slots.acquire(blocking=False):
+        logger.warning("Limite global de streams SSE atingido")
+        return jsonify({'error': 'Limite de streams SSE atingido'}), 503
     try:
-        while True:
-            screenshot = agent_state['screenshot_queue'].get_nowait()
-            agent_state['latest_screenshot'] = screenshot
-    except queue.Empty:
-        pass
+        subscription = broker.subscribe()
+    except TooManyClientsError as e:
+        slots.release()
+        logger.warning(str(e))
+        return jsonify({'error': str(e)}), 503
     
+    # Snapshot inicial para o cliente sincronizar ao (re)conectar. Na
+    # reconexão, o EventSource envia o seq do último log recebido.
+    initial = [format_sse('status', session.status_payload())]
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if last_event_id.isdigit():
+        for log_entry in session.log_buffer.since(int(last_event_id)):
+            initial.append(format_sse('log', log_entry, log_entry['seq']))
+    response = Response(
+        stream_with_context(broker.stream(subscription, initial)),
+        mimetype='text/event-stream',
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Chamado mesmo se o cliente desconectar antes do primeiro evento
+    response.call_on_close(slots.release)
+    return response
+
+
+@app.route('/api/logs', methods=['GET'])
+@app.route('/api/sessions/<session_id>/logs', methods=['GET'])
+def get_logs(session_id=None):
+    """Obter logs novos: /api/logs?since=<seq> retorna apenas entradas com seq maior"""
+    buffer = resolve_session(session_id).log_buffer
+    since = request.args.get('since', default=0, type=int)
+    limit = request.args.get('limit', default=None, type=int)
+    logs = buffer.since(since, limit)
     return jsonify({
-        'is_running': agent_state['is_running'],
-        'status': agent_state['status'],
-        'current_url': agent_state.get('current_url')
+        'logs': logs,
+        'last_seq': logs[-1]['seq'] if logs else max(since, buffer.first_seq - 1),
+        # Entradas entre 'since' e a mais antiga disponível foram sobrescritas
+        'truncated': since + 1 < buffer.first_seq and len(buffer) > 0,
     })
 
 
-@app.route('/api/logs', methods=['GET'])
-def get_logs():
-    """Obter logs"""
-    # Processar fila de logs
-    try:
-        while True:
-            log_entry = agent_state['log_queue'].get_nowait()
-            agent_state['logs'].append(log_entry)
-            if len(agent_state['logs']) > 1000:
-                agent_state['logs'] = agent_state['logs'][-1000:]
-    except queue.Empty:
-        pass
-    
-    return jsonify({'logs': agent_state['logs']})
+def _screenshot_response(image, cache_control, version=None):
+    """Resposta binária (frame PNG ou variante JPEG) com ETag forte e suporte a GET condicional (304)"""
+    response = Response(image.data, mimetype=getattr(image, 'mimetype', 'image/png'))
+    response.set_etag(image.etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['X-Screenshot-Version'] = str(image.version if version is None else version)
+    return response.make_conditional(request)
+
+
+@app.route('/api/screenshot.png', methods=['GET'])
+@app.route('/api/sessions/<session_id>/screenshot.png', methods=['GET'])
+def get_latest_screenshot_image(session_id=None):
+    """Screenshot mais recente em PNG (revalidada a cada uso via ETag)"""
+    frame = resolve_session(session_id).screenshot_frame
+    if frame is None:
+        return jsonify({'error': 'Nenhuma screenshot disponível'}), 404
+    return _screenshot_response(frame, 'no-cache')
+
+
+@app.route('/api/screenshot/<int:version>.png', methods=['GET'])
+@app.route('/api/sessions/<session_id>/screenshot/<int:version>.png', methods=['GET'])
+def get_screenshot_image(version, session_id=None):
+    """Screenshot de uma versão específica - o conteúdo de uma versão nunca muda"""
+    frame = resolve_session(session_id).screenshot_frame
+    if frame is None or frame.version != version:
+        # Apenas a versão mais recente é mantida em memória
+        return jsonify({
+            'error': 'Versão de screenshot não disponível',
+            'latest_version': frame.version if frame else None,
+        }), 404
+    return _screenshot_response(frame, 'private, max-age=31536000, immutable')
+
+
+@app.route('/api/screenshot/<int:version>/<variant>.jpg', methods=['GET'])
+@app.route('/api/sessions/<session_id>/screenshot/<int:version>/<variant>.jpg', methods=['GET'])
+def get_screenshot_variant(version, variant, session_id=None):
+    """Versão reduzida (thumb/preview) de uma screenshot, em JPEG"""
+    if variant not in VARIANTS:
+        return jsonify({'error': f'Variante desconhecida: {variant}', 'variants': list(VARIANTS)}), 404
+    frame = resolve_session(session_id).screenshot_frame
+    if frame is None or frame.version != version:
+        return jsonify({
+            'error': 'Versão de screenshot não disponível',
+            'latest_version': frame.version if frame else None,
+        }), 404
+    if not get_renderer().available:
+        # Sem Pillow: o visualizador recebe o PNG original
+        return redirect(request.path.rsplit('/', 1)[0] + '.png')
+    # Normalmente já gerada em segundo plano; senão é gerada agora, uma única vez
+    return _screenshot_response(frame.variants.get(variant), 'private, max-age=31536000, immutable', frame.version)
 
 
 @app.route('/api/screenshot', methods=['GET'])
 def get_screenshot():
-    """Obter screenshot atual"""
-    screenshot = agent_state.get('latest_screenshot')
+    """Obter screenshot atual (JSON com base64 - preferir /api/screenshot/<versão>.png)"""
+    session = resolve_session()
+    screenshot = session.latest_screenshot
     if screenshot:
         screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
-        return jsonify({'screenshot': screenshot_b64})
-    return jsonify({'screenshot': None})
+        return jsonify({'screenshot': screenshot_b64, 'version': session.screenshot_version})
+    return jsonify({'screenshot': None, 'version': session.screenshot_version})
 
 
 @app.route('/api/start', methods=['POST'])
+@app.route('/api/sessions', methods=['POST'])
 def start_agent():
-    """Iniciar agente"""
+    """Iniciar agente em uma nova sessão"""
     logger.info("Requisição para iniciar agente")
     
-    if agent_state['is_running']:
-        logger.warning("Tentativa de iniciar agente que já está em execução")
-        return jsonify({'success': False, 'error': 'Agente já está em execução'})
-    
     config = request.json
     logger.debug(f"Configuração recebida: {config}")
     
-    if not config.get('query'):
+    if not config or not config.get('query'):
         logger.warning("Tentativa de iniciar agente sem query")
         return jsonify({'success': False, 'error': 'Query é obrigatória'})
     
-    # Limpar estado anterior
-    logger.info("Limpando estado anterior do agente")
-    agent_state['logs'] = []
-    agent_state['latest_screenshot'] = None
-    agent_state['current_url'] = None
-    agent_state['current_query'] = config.get('query')  # Armazenar query atual
+    if not scheduler.started:
+        start_scheduler()
     
-    # Iniciar thread
-    logger.info("Iniciando thread do agente")
-    thread = threading.Thread(
-        target=run_agent_thread,
-        args=(config, agent_state),
-        daemon=True
-    )
-    thread.start()
-    agent_state['agent_thread'] = thread
-    logger.info("Thread do agente iniciada com sucesso")
+    try:
+        session = sessions.create(config)
+    except SessionLimitError as e:
+        logger.warning(str(e))
+        return jsonify({'success': False, 'error': str(e)}), 429
     
-    return jsonify({'success': True})
+    # Enfileirar - um worker do pool executará o agente
+    user = request.headers.get('X-User') or request.remote_addr or 'anonymous'
+    try:
+        scheduler.submit(session.id, config, user=user, priority=config.get('priority', 0))
+    except (QueueFullError, SchedulerClosedError) as e:
+        logger.warning(str(e))
+        session.set_status('Rejeitada', is_running=False)
+        sessions.remove(session.id)
+        status_code = 429 if isinstance(e, QueueFullError) else 503
+        return jsonify({'success': False, 'error': str(e)}), status_code
+    logger.info(f"Sessão {session.id} enfileirada (usuário {user})")
+    
+    return jsonify({
+        'success': True,
+        'session_id': session.id,
+        'queue_position': session.queue_position,
+    })
 
 
 @app.route('/api/stop', methods=['POST'])
-def stop_agent():
+@app.route('/api/sessions/<session_id>/stop', methods=['POST'])
+def stop_agent(session_id=None):
     """Parar agente"""
-    agent_state['is_running'] = False
-    agent_state['status'] = 'Parando...'
-    return jsonify({'success': True})
+    session = resolve_session(session_id)
+    if scheduler.cancel(session.id):
+        # Ainda aguardava na fila - nunca chegou a executar
+        session.queue_position = None
+        session.set_status('Cancelado', is_running=False)
+    elif session.is_running:
+        session.cancellation.cancel("Parado pelo usuário")
+        session.set_status('Parando...')
+    return jsonify({'success': True, 'session_id': session.id})
 
 
 @app.route('/api/clear_logs', methods=['POST'])
-def clear_logs():
+@app.route('/api/sessions/<session_id>/clear_logs', methods=['POST'])
+def clear_logs(session_id=None):
     """Limpar logs"""
-    agent_state['logs'] = []
+    resolve_session(session_id).log_buffer.clear()
     return jsonify({'success': True})
 
 
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """Remover uma sessão finalizada e liberar sua memória"""
+    resolve_session(session_id)
+    if not sessions.remove(session_id):
+        return jsonify({'success': False, 'error': 'Sessão ainda em execução'}), 409
+    return jsonify({'success': True})
+
+
+def run_job(job):
+    """Executa um job da fila (chamado em uma thread worker do pool)"""
+    session = sessions.get(job.id)
+    if session is None:
+        logger.warning(f"Sessão {job.id} não existe mais - job ignorado")
+        return
+    session.queue_position = None
+    # Todos os registros da execução (agente, navegador) levam o id da sessão
+    with log_context(run_id=session.id):
+        run_agent_thread(job.config, session)
+
+
+def publish_queue_positions():
+    """Atualiza a posição na fila das sessões aguardando"""
+    positions = scheduler.positions()
+    for session in sessions.list():
+        position = positions.get(session.id)
+        if position is not None and position != session.queue_position:
+            session.queue_position = position
+            session.set_status(f'Na fila (posição {position})')
+
+
+# Pool de workers que executa os agentes; /api/start apenas enfileira
+scheduler = JobScheduler(run_job, on_change=publish_queue_positions)
+
+
+def _recover_session(job):
+    sessions.create(job.config, session_id=job.id)
+
+
+def start_scheduler():
+    """Inicia os workers, recriando as sessões dos jobs recuperados da fila persistida"""
+    scheduler.start(on_recovered=_recover_session)
+
+
+def shutdown(timeout=None):
+    """
+    Desligamento gracioso: fecha a fila, aguarda os agentes em execução e
+    encerra os streams SSE
+
+    Execuções ainda na fila ficam persistidas e são retomadas na próxima
+    inicialização.
+
+    Args:
+        timeout: Segundos máximos aguardando os agentes (None = sem limite)
+
+    Returns:
+        True se todos os agentes terminaram dentro do timeout
+    """
+    running = scheduler.stats()['busy_workers']
+    logger.info(f"Desligamento: aguardando {running} agentes em execução")
+    drained = scheduler.shutdown(timeout)
+    if not drained:
+        logger.warning("Timeout no desligamento - cancelando agentes ainda em execução")
+        for session in sessions.list():
+            if session.is_running:
+                session.cancellation.cancel("Desligamento do servidor")
+        # Cancelamento cooperativo: os navegadores fecham em poucos segundos
+        scheduler.shutdown(CANCEL_GRACE_SECONDS)
+    for session in sessions.list() + [_idle_session]:
+        if session.queue_position is not None:
+            session.set_status('Na fila (será retomada após o reinício)')
+        session.events.close_all()
+    return drained
+
+
 if __name__ == '__main__':
     import sys
     
@@ -944,7 +1420,9 @@ if __name__ == '__main__':
     logger.info("=" * 60)
     logger.info("Gemini Computer Use - Interface Web")
     logger.info("=" * 60)
+    start_scheduler()
     logger.info(f"Iniciando servidor Flask na porta {port}")
+    logger.info("Servidor de desenvolvimento - em produção use: python serve.py")
     logger.info(f"Acesse em: http://localhost:{port}")
     logger.info("Pressione Ctrl+C para parar o servidor")
     logger.info("=" * 60)